@@ -4,7 +4,7 @@ a = Analysis(
     pathex=['/Users/steveharnell/Desktop/DITools_V2_GTP_temp'],
     binaries=[],
     datas=[],
-    hiddenimports=['file_comparator', 'project', 'render_check', 'sync', 'trash', 'tree_generator', 'ui_style', 'main'],
+    hiddenimports=['app_paths', 'checksums', 'compare_engine', 'compare_report', 'copy_engine', 'devices', 'ditools', 'file_comparator', 'log_view', 'log_writer', 'mhl', 'project', 'render_check', 'render_engine', 'rsync_progress', 'size_watcher', 'scan_cache', 'source_scan', 'sync', 'sync_jobs', 'transfer_journal', 'trash', 'traversal', 'tree_engine', 'tree_export', 'tree_generator', 'ui_style', 'main'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,12 @@
+import os
+import sys
+
+
+def app_support_dir():
+    """Per-user directory for DITools state (caches, queues, journals)."""
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support/DITools")
+    else:
+        base = os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "DITools")
+    os.makedirs(base, exist_ok=True)
+    return base
@@ -0,0 +1,336 @@
+import os
+import queue
+import sqlite3
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import traversal
+from checksums import hash_file
+from devices import physical_device
+from mhl import load_manifest_hashes
+
+# key is the path relative to the drive root; directories end with os.sep
+Entry = namedtuple("Entry", "key is_dir size mtime ctime")
+# kind is one of missing, type, size, mod_date, creation_date, checksum, checksum_error, unverifiable
+Discrepancy = namedtuple("Discrepancy", "drive kind path message")
+
+BATCH_SIZE = 512
+QUEUE_BATCHES = 8
+# Files whose hashes may be in flight before the merge waits for the oldest
+MAX_PENDING_HASHES = 64
+
+_DONE = object()
+
+
+def compare_filter(skip_hidden=False, skip_mhl=False):
+    """What drive comparisons ignore: _gsdata_ folders, .DS_Store and optionally hidden folders and MHL files."""
+    return traversal.TraversalFilter(skip_hidden_dirs=skip_hidden, skip_dirs=('_gsdata_',), skip_files=('.DS_Store',),
+                                     skip_extensions=('.mhl',) if skip_mhl else ())
+
+
+def sorted_entries(root, skip_hidden=False, skip_mhl=False, use_cache=False, cancel_event=None, listing_pool=None,
+                   stats=None):
+    """
+    Yield an Entry for everything under root in plain string order of key.
+    Sibling entries are ordered by key (a directory sorts as "name/"), and each
+    directory's subtree is emitted right after its own key, which is exactly
+    the global sort order. Only the open directories are held in memory.
+    listing_pool is passed to traversal.walk so drives on one disk share it.
+    """
+    root = os.path.abspath(root)
+    prefix_len = len(root.rstrip(os.sep)) + 1
+    # Each frame is an iterator over one directory's remaining sorted entries
+    stack = []
+    expected = root
+    for dirpath, subdirs, files, _links in traversal.walk(root, compare_filter(skip_hidden, skip_mhl), use_cache,
+                                                         cancel_event, stats=stats, pool=listing_pool):
+        # A directory the walker could not open is skipped without a yield;
+        # treat it as empty and carry on with its parent until the paths line up.
+        while dirpath != expected and stack:
+            expected = None
+            for entry in _drain(stack):
+                yield entry
+                if entry.is_dir:
+                    expected = os.path.join(root, entry.key[:-1])
+                    break
+        # The walker descends in list order, so match the order entries are emitted in
+        subdirs.sort(key=lambda name: name + os.sep)
+        rel_prefix = dirpath[prefix_len:] + os.sep if dirpath != root else ""
+        entries = [Entry(rel_prefix + name + os.sep, True, 0, 0.0, 0.0) for name in subdirs]
+        for info in files:
+            entries.append(Entry(rel_prefix + info.name, False, info.size, info.mtime, info.ctime))
+        entries.sort()
+        stack.append(iter(entries))
+        expected = None
+        for entry in _drain(stack):
+            yield entry
+            if entry.is_dir:
+                expected = os.path.join(root, entry.key[:-1])
+                break
+        if expected is None:
+            break
+    # Anything left belongs to directories that vanished or were cancelled mid-walk
+    if cancel_event is None or not cancel_event.is_set():
+        for entry in _drain(stack):
+            yield entry
+
+
+def _drain(stack):
+    """Yield pending entries, closing finished directories, until the caller breaks."""
+    while stack:
+        for entry in stack[-1]:
+            yield entry
+            if entry.is_dir:
+                # The caller descends into this directory next
+                break
+        else:
+            stack.pop()
+            continue
+        return
+
+
+def _produce(root, out_queue, stop_event, options):
+    batch = []
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                out_queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for entry in sorted_entries(root, **options):
+            batch.append(entry)
+            if len(batch) >= BATCH_SIZE:
+                if not put(batch):
+                    return
+                batch = []
+        if batch and not put(batch):
+            return
+        put(_DONE)
+    except Exception as e:
+        put(e)
+
+
+def stream_entries(root, stop_event, **options):
+    """
+    Run sorted_entries on a producer thread and yield its entries through a
+    bounded queue, so slow drives are read ahead without growing memory.
+    """
+    out_queue = queue.Queue(maxsize=QUEUE_BATCHES)
+    thread = threading.Thread(target=_produce, args=(root, out_queue, stop_event, options), daemon=True)
+    thread.start()
+    while True:
+        item = out_queue.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield from item
+
+
+def cached_hash(path, entry, algorithm, hash_cache=None, cancel_event=None):
+    """Digest of one file, reusing a cached digest while size and mtime are unchanged."""
+    if hash_cache is not None:
+        try:
+            digest = hash_cache.lookup(path, algorithm, entry.size, entry.mtime)
+        except sqlite3.Error:
+            digest = None
+        if digest:
+            return digest
+    digest = hash_file(path, algorithm, cancel_event=cancel_event)
+    if digest is not None and hash_cache is not None:
+        try:
+            hash_cache.store(path, algorithm, entry.size, entry.mtime, digest)
+        except sqlite3.Error:
+            pass
+    return digest
+
+
+def drive_manifest_hashes(drive, skip_hidden=False, use_cache=False, cancel_event=None):
+    """Collect every legacy MHL and ASC-MHL manifest on a drive into one {rel_path: (algorithm, digest)} lookup."""
+    filters = traversal.TraversalFilter(skip_hidden_dirs=skip_hidden, skip_dirs=('_gsdata_',), extensions=('.mhl',))
+    manifest_files = []
+    for dirpath, _subdirs, files, _links in traversal.walk(drive, filters, use_cache, cancel_event, ordered=False):
+        manifest_files.extend(os.path.join(dirpath, info.name) for info in files)
+    return load_manifest_hashes(drive, manifest_files)
+
+
+def compare_drives(drives, reference, compare_size, compare_date, compare_creation, on_discrepancy,
+                   skip_hidden=False, skip_mhl=False, use_cache=False, cancel_event=None, progress_callback=None,
+                   hash_algorithm=None, hash_cache=None, manifests=None, stats=None):
+    """
+    N-way merge of every drive's sorted entry stream. Each key is checked as
+    soon as it is the smallest head across all drives, and discrepancies are
+    reported through on_discrepancy(Discrepancy) as they are found.
+    With hash_algorithm set, files that match the reference in size are also
+    hashed and compared; each device gets one reader so drives are hashed in
+    parallel with sequential reads. manifests maps drives to the hashes from
+    their MHL files; a file listed there is checked against that hash instead
+    of re-hashing the reference copy. stats, if given, is filled with a
+    TraversalStats per drive. progress_callback(processed, drive_stats) gets
+    the items compared so far and each drive's TraversalStats, in drive order.
+    Returns the number of distinct items compared.
+    """
+    stop_event = threading.Event()
+    drive_devices = [physical_device(drive) for drive in drives]
+    # One listing pool per physical disk: drives on the same disk share its threads,
+    # so the disk never serves more listings at once than a single drive's walk
+    listing_pools = {device: ThreadPoolExecutor(max_workers=traversal.DEFAULT_WORKERS)
+                     for device in dict.fromkeys(drive_devices)}
+    streams = []
+    drive_stats = []
+    for drive, device in zip(drives, drive_devices):
+        drive_stats.append(traversal.TraversalStats(drive))
+        if stats is not None:
+            stats[drive] = drive_stats[-1]
+        streams.append(stream_entries(drive, stop_event, skip_hidden=skip_hidden, skip_mhl=skip_mhl,
+                                      use_cache=use_cache, cancel_event=cancel_event,
+                                      listing_pool=listing_pools[device], stats=drive_stats[-1]))
+    ref_index = drives.index(reference) if reference in drives else None
+    hash_pools = {}
+    manifest_lookups = []
+    if manifests:
+        # The reference drive's manifests are consulted first
+        order = sorted(range(len(drives)), key=lambda i: i != ref_index)
+        manifest_lookups = [(drives[i], manifests[drives[i]]) for i in order if manifests.get(drives[i])]
+    if (hash_algorithm and ref_index is not None) or manifest_lookups:
+        for device in drive_devices:
+            if device not in hash_pools:
+                hash_pools[device] = ThreadPoolExecutor(max_workers=1)
+    pending = deque()
+
+    def submit(index, entry, algorithm):
+        path = os.path.join(drives[index], entry.key)
+        return hash_pools[drive_devices[index]].submit(cached_hash, path, entry, algorithm,
+                                                       hash_cache, cancel_event)
+
+    def resolve(key, expected, jobs):
+        # expected is a manifest digest, or the future hashing the reference copy
+        label = "MHL"
+        if not isinstance(expected, str):
+            label = "Ref"
+            try:
+                expected = expected.result()
+            except OSError as e:
+                on_discrepancy(Discrepancy(reference, "checksum_error", key, f"Checksum failed for {key}: {e}"))
+                return
+            if expected is None:
+                return
+        for drive, future in jobs:
+            try:
+                digest = future.result()
+            except OSError as e:
+                on_discrepancy(Discrepancy(drive, "checksum_error", key, f"Checksum failed for {key}: {e}"))
+                continue
+            if digest is not None and digest != expected:
+                on_discrepancy(Discrepancy(drive, "checksum", key,
+                                           f"Checksum mismatch for {key} ({label}: {expected}, {drive}: {digest})"))
+
+    heads = [next(stream, None) for stream in streams]
+    processed = 0
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            keys = [head.key for head in heads if head is not None]
+            if not keys:
+                break
+            key = min(keys)
+            current = [head if head is not None and head.key == key else None for head in heads]
+            ref_entry = current[ref_index] if ref_index is not None else None
+            for drive, entry in zip(drives, current):
+                if entry is None:
+                    on_discrepancy(Discrepancy(drive, "missing", key, f"Missing item: {key}"))
+                elif ref_entry is not None:
+                    for kind, message in _attribute_mismatches(key, drive, ref_entry, entry,
+                                                               compare_size, compare_date, compare_creation):
+                        on_discrepancy(Discrepancy(drive, kind, key, message))
+            jobs = []
+            listed = None
+            if manifest_lookups:
+                listed, unusable = _manifest_hash(manifest_lookups, key)
+                if unusable is not None and listed is None:
+                    on_discrepancy(Discrepancy(unusable, "unverifiable", key,
+                                               f"No supported hash for {key} in MHL manifests"))
+            if listed is not None:
+                # The manifest hash stands in for the reference, so only the other copies are read
+                algorithm, expected = listed
+                jobs = [(drives[i], submit(i, entry, algorithm)) for i, entry in enumerate(current)
+                        if i != ref_index and entry is not None and not entry.is_dir]
+            elif hash_algorithm and hash_pools and ref_entry is not None and not ref_entry.is_dir:
+                for i, entry in enumerate(current):
+                    if i == ref_index or entry is None or entry.is_dir:
+                        continue
+                    if entry.size != ref_entry.size:
+                        # Different sizes cannot hash the same; no need to read them
+                        if not compare_size:
+                            on_discrepancy(Discrepancy(drives[i], "checksum", key,
+                                                                   f"Checksum mismatch for {key} (sizes differ)"))
+                        continue
+                    jobs.append((drives[i], submit(i, entry, hash_algorithm)))
+                if jobs:
+                    expected = submit(ref_index, ref_entry, hash_algorithm)
+            if jobs:
+                pending.append((key, expected, jobs))
+                while len(pending) > MAX_PENDING_HASHES:
+                    resolve(*pending.popleft())
+            for i, entry in enumerate(current):
+                if entry is not None:
+                    heads[i] = next(streams[i], None)
+            processed += 1
+            if progress_callback:
+                progress_callback(processed, drive_stats)
+        while pending and not (cancel_event is not None and cancel_event.is_set()):
+            resolve(*pending.popleft())
+    finally:
+        stop_event.set()
+        for stream in streams:
+            stream.close()
+        for pool in hash_pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        for pool in listing_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        if hash_cache is not None:
+            try:
+                hash_cache.flush()
+            except sqlite3.Error:
+                pass
+    return processed
+
+
+def _manifest_hash(manifest_lookups, key):
+    """
+    First usable (algorithm, digest) listed for key, plus the drive whose
+    manifest lists key only with hashes this machine can't compute.
+    """
+    unusable = None
+    for drive, lookup in manifest_lookups:
+        listed = lookup.get(key)
+        if listed is None:
+            continue
+        if listed[0] is not None:
+            return listed, unusable
+        unusable = unusable or drive
+    return None, unusable
+
+
+def _attribute_mismatches(key, drive, ref_entry, entry, compare_size, compare_date, compare_creation):
+    ref_type = "directory" if ref_entry.is_dir else "file"
+    comp_type = "directory" if entry.is_dir else "file"
+    if ref_type != comp_type:
+        return [("type", f"Type mismatch for {key} (Ref: {ref_type}, {drive}: {comp_type})")]
+    if entry.is_dir:
+        return []
+    messages = []
+    if compare_size and ref_entry.size != entry.size:
+        messages.append(("size", f"Size mismatch for {key} (Ref: {ref_entry.size}, {drive}: {entry.size})"))
+    if compare_date and ref_entry.mtime != entry.mtime:
+        messages.append(("mod_date", f"Modification date mismatch for {key}"))
+    if compare_creation and ref_entry.ctime != entry.ctime:
+        messages.append(("creation_date", f"Creation date mismatch for {key}"))
+    return messages
@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+from collections import Counter
+from datetime import datetime
+
+from log_writer import BufferedLogWriter
+
+EXPORT_FORMATS = ("None", "CSV", "JSON")
+
+KIND_LABELS = {
+    "missing": "missing",
+    "type": "type mismatches",
+    "size": "size mismatches",
+    "mod_date": "modification date mismatches",
+    "creation_date": "creation date mismatches",
+    "checksum": "checksum mismatches",
+    "checksum_error": "checksum failures",
+    "unverifiable": "files with no supported MHL hash",
+}
+
+
+class DiscrepancyReport:
+    """
+    Takes comparison discrepancies one at a time as they are found. Keeps only
+    per-drive counts in memory; every message goes straight to the global log,
+    the drive's own log and the optional CSV/JSON export, each opened on first use.
+    """
+
+    def __init__(self, drives, log_directory=None, global_log=False, dest_logs=False, export_format="None",
+                 on_line=None):
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.log_directory = log_directory
+        self.global_log = global_log
+        self.dest_logs = dest_logs
+        self.export_format = export_format if export_format in EXPORT_FORMATS else "None"
+        self.on_line = on_line
+        self.counts = {drive: Counter() for drive in drives}
+        self.global_log_path = None
+        self.dest_log_paths = {}
+        self.export_path = None
+        self.errors = []
+        self._files = []
+        self._global_writer = None
+        self._dest_writers = {}
+        self._export_file = None
+        self._csv_writer = None
+        self._json_rows = 0
+
+    @property
+    def total(self):
+        return sum(sum(counter.values()) for counter in self.counts.values())
+
+    def _output_path(self, name):
+        return os.path.join(self.log_directory, name) if self.log_directory else name
+
+    def _open(self, path):
+        f = open(path, "w", encoding="utf-8", newline="")
+        self._files.append(f)
+        return f
+
+    def add(self, discrepancy):
+        drive = discrepancy.drive
+        self.counts.setdefault(drive, Counter())[discrepancy.kind] += 1
+        if self.on_line:
+            self.on_line(f"{drive}: {discrepancy.message}\n")
+        if self.global_log:
+            self._write_global(discrepancy)
+        if self.dest_logs:
+            self._write_dest(discrepancy)
+        if self.export_format != "None":
+            self._write_export(discrepancy)
+
+    def _write_global(self, discrepancy):
+        if self._global_writer is None:
+            self.global_log_path = self._output_path(f"File_Comparison_Log_{self.timestamp}.txt")
+            try:
+                self._global_writer = BufferedLogWriter([(self._open(self.global_log_path), None)])
+            except OSError as e:
+                self.errors.append(f"Could not write global log {self.global_log_path}: {e}")
+                self.global_log = False
+                return
+        self._global_writer.write(f"{discrepancy.drive}: {discrepancy.message}\n")
+
+    def _write_dest(self, discrepancy):
+        drive = discrepancy.drive
+        writer = self._dest_writers.get(drive)
+        if writer is None:
+            if drive in self._dest_writers:
+                return
+            path = os.path.join(drive, f"File_Comparison_Log_{self.timestamp}.txt")
+            try:
+                f = self._open(path)
+            except OSError as e:
+                # Read-only or missing drive: remember the failure and stop trying
+                self._dest_writers[drive] = None
+                self.errors.append(f"Could not write destination log {path}: {e}")
+                return
+            f.write(f"Discrepancies for drive: {drive}\n")
+            writer = self._dest_writers[drive] = BufferedLogWriter([(f, None)])
+            self.dest_log_paths[drive] = path
+        writer.write("  " + discrepancy.message + "\n")
+
+    def _write_export(self, discrepancy):
+        if self._export_file is None:
+            extension = self.export_format.lower()
+            self.export_path = self._output_path(f"File_Comparison_Report_{self.timestamp}.{extension}")
+            try:
+                self._export_file = self._open(self.export_path)
+            except OSError as e:
+                self.errors.append(f"Could not write report {self.export_path}: {e}")
+                self.export_format = "None"
+                return
+            if self.export_format == "CSV":
+                self._csv_writer = csv.writer(self._export_file)
+                self._csv_writer.writerow(["drive", "kind", "path", "message"])
+            else:
+                self._export_file.write("[\n")
+        row = [discrepancy.drive, discrepancy.kind, discrepancy.path, discrepancy.message]
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(row)
+        else:
+            # Rows are appended one per line so the array never has to be held in memory
+            prefix = ",\n" if self._json_rows else ""
+            self._export_file.write(prefix + json.dumps(dict(zip(("drive", "kind", "path", "message"), row))))
+            self._json_rows += 1
+
+    def summary_lines(self):
+        lines = []
+        for drive, counter in self.counts.items():
+            total = sum(counter.values())
+            if not total:
+                lines.append(f"{drive}: no discrepancies")
+                continue
+            detail = ", ".join(f"{count} {KIND_LABELS.get(kind, kind)}" for kind, count in sorted(counter.items()))
+            lines.append(f"{drive}: {total} discrepancies ({detail})")
+        return lines
+
+    def close(self):
+        """Write the summary to the global log and close every output."""
+        if self._global_writer is not None:
+            self._global_writer.write("\nSummary\n" + "".join(f"  {line}\n" for line in self.summary_lines()))
+            self._global_writer.flush()
+        for writer in self._dest_writers.values():
+            if writer is not None:
+                writer.write("\n")
+                writer.flush()
+        if self._export_file is not None and self._csv_writer is None:
+            self._export_file.write("\n]\n")
+        for f in self._files:
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._files = []
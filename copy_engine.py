@@ -0,0 +1,415 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from checksums import hash_file, new_hasher
+from source_scan import scan_source
+
+# Read buffers are whole multiples of 1 MiB so every read stays aligned to the
+# block size of the card reader and the destination drives.
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_FILE_WORKERS = 4
+PROGRESS_INTERVAL = 0.5
+# With a journal, large files are synced to disk and checkpointed this often
+CHECKPOINT_BYTES = 256 * 1024 * 1024
+
+
+def copy_target_root(source, dest):
+    # Mirror rsync semantics: "src/" copies the contents, "src" copies the folder itself
+    if source.endswith(os.sep):
+        return dest
+    return os.path.join(dest, os.path.basename(os.path.normpath(source)))
+
+
+class FanOutCopier:
+    """
+    Copies one source tree to several destinations, reading every source block
+    exactly once and writing it to all destinations in parallel.
+    """
+
+    def __init__(self, source, dest_list, cancel_event=None, progress_callback=None,
+                 chunk_size=CHUNK_SIZE, max_workers=MAX_FILE_WORKERS, hash_algorithm=None, scan=None,
+                 journal=None):
+        self.source = source
+        self.source_root = os.path.normpath(source)
+        self.dest_list = list(dest_list)
+        self.target_roots = [copy_target_root(source, dest) for dest in self.dest_list]
+        self.cancel_event = cancel_event or threading.Event()
+        self.progress_callback = progress_callback
+        self.chunk_size = max(1024 * 1024, (chunk_size // (1024 * 1024)) * 1024 * 1024)
+        self.max_workers = max(1, max_workers)
+        self.total_bytes = 0
+        self.total_files = 0
+        self.bytes_done = [0] * len(self.dest_list)
+        self.files_done = [0] * len(self.dest_list)
+        self.errors = [None] * len(self.dest_list)
+        # With a hash algorithm set, every copied file is hashed from the source stream
+        # and compared against a read-back of each destination copy. Copies skipped
+        # as up to date are read back too, unless the journal has their digest.
+        self.hash_algorithm = hash_algorithm
+        # A SourceScan from the sync pre-scan saves walking the source a second time
+        self.scan = scan
+        # A TransferJournal lets an interrupted run skip finished files and resume partial ones
+        self.journal = journal
+        self._journal_keys = [os.path.abspath(root) for root in self.target_roots]
+        self._journal_source = os.path.abspath(self.source_root)
+        self._finished = None
+        self.resumed_files = 0
+        self.manifests = [[] for _ in self.dest_list]
+        self.mismatches = [[] for _ in self.dest_list]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_report = 0.0
+
+    def active_destinations(self):
+        return [i for i, error in enumerate(self.errors) if error is None]
+
+    def fail_destination(self, index, error):
+        with self._lock:
+            if self.errors[index] is None:
+                self.errors[index] = error
+
+    def run(self):
+        if self.scan is None:
+            self.scan = scan_source(self.source, self.cancel_event)
+        dirs, files, links = self.scan.dirs, self.scan.files, self.scan.links
+        self.total_bytes = self.scan.total_bytes
+        self.total_files = self.scan.file_count
+        if self.journal is not None and self.hash_algorithm:
+            # Verified copies from an interrupted run, read once per destination
+            self._finished = [self.journal.entries(self._journal_source, key) for key in self._journal_keys]
+        self._report(force=True)
+
+        for i in self.active_destinations():
+            try:
+                for rel_dir in dirs:
+                    os.makedirs(os.path.join(self.target_roots[i], rel_dir), exist_ok=True)
+            except OSError as e:
+                self.fail_destination(i, f"Could not create directories: {e}")
+
+        writer_count = (len(self.dest_list) + 1) * self.max_workers
+        in_flight = threading.BoundedSemaphore(self.max_workers * 2)
+        with ThreadPoolExecutor(max_workers=writer_count) as writer_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as file_pool:
+            futures = []
+            for rel_path, size, mtime in files:
+                if self.cancel_event.is_set() or not self.active_destinations():
+                    break
+                in_flight.acquire()
+                future = file_pool.submit(self._copy_file, rel_path, size, mtime, writer_pool)
+                future.add_done_callback(lambda _f: in_flight.release())
+                futures.append(future)
+            for future in futures:
+                future.result()
+
+        if not self.cancel_event.is_set():
+            self._copy_links(links)
+            self._copy_dir_stats(dirs)
+        if self.journal is not None:
+            self.journal.flush()
+        self._report(force=True)
+        return self.errors
+
+    def journal_done(self, index):
+        """Drop a destination's journal rows once it finished cleanly and its manifest is written."""
+        if self.journal is not None:
+            self.journal.discard(self._journal_source, self._journal_keys[index])
+
+    def _buffers(self):
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = (bytearray(self.chunk_size), bytearray(self.chunk_size))
+            self._local.buffers = buffers
+        return buffers
+
+    def _needs_copy(self, index, rel_path, size, mtime):
+        # Same quick check rsync uses: matching size and whole-second mtime means up to date
+        try:
+            st = os.stat(os.path.join(self.target_roots[index], rel_path))
+        except OSError:
+            return True
+        return st.st_size != size or int(st.st_mtime) != int(mtime)
+
+    def _already_copied(self, index, rel_path, size, mtime):
+        # A journaled copy verified with the same algorithm goes straight into the manifest
+        if self._finished is None:
+            return False
+        entry = self._finished[index].get(rel_path)
+        if (entry is not None and entry.size == size and entry.mtime == mtime
+                and entry.algorithm == self.hash_algorithm and entry.digest):
+            with self._lock:
+                self.manifests[index].append((rel_path, size, mtime, entry.digest))
+            return True
+        return False
+
+    def _resume_offset(self, targets, rel_path, size, mtime):
+        """Common offset every target can resume from; 0 unless all have a checkpoint."""
+        if self.journal is None:
+            return 0
+        offsets = []
+        for i in targets:
+            offset = self.journal.resume_offset(self._journal_source, self._journal_keys[i], rel_path, size, mtime)
+            try:
+                on_disk = os.stat(os.path.join(self.target_roots[i], rel_path)).st_size
+            except OSError:
+                on_disk = 0
+            offsets.append(offset if offset <= on_disk else 0)
+        return min(offsets)
+
+    def _checkpoint(self, targets, rel_path, size, mtime, outputs, position):
+        for i in targets:
+            handle = outputs.get(i)
+            if handle is None or self.errors[i] is not None:
+                continue
+            try:
+                os.fsync(handle.fileno())
+            except OSError:
+                continue
+            self.journal.checkpoint(self._journal_source, self._journal_keys[i], rel_path, size, mtime, position)
+
+    def _copy_file(self, rel_path, size, mtime, writer_pool):
+        try:
+            targets = []
+            # Up-to-date copies with no verified digest in the journal
+            unverified = []
+            for i in self.active_destinations():
+                if self._needs_copy(i, rel_path, size, mtime):
+                    targets.append(i)
+                else:
+                    if self.hash_algorithm and not self._already_copied(i, rel_path, size, mtime):
+                        unverified.append(i)
+                    self._add_progress(i, size, file_done=True)
+            if not targets:
+                if unverified:
+                    self._verify_skipped(rel_path, size, mtime, None, unverified, writer_pool)
+                return
+
+            src_path = os.path.join(self.source_root, rel_path)
+            hasher = new_hasher(self.hash_algorithm) if self.hash_algorithm else None
+            offset = self._resume_offset(targets, rel_path, size, mtime)
+            outputs = {}
+            for i in targets:
+                dest_path = os.path.join(self.target_roots[i], rel_path)
+                try:
+                    if offset:
+                        outputs[i] = open(dest_path, "r+b", buffering=0)
+                        outputs[i].seek(offset)
+                        outputs[i].truncate()
+                    else:
+                        outputs[i] = open(dest_path, "wb", buffering=0)
+                except OSError as e:
+                    self.fail_destination(i, f"{rel_path}: {e}")
+            if offset:
+                with self._lock:
+                    self.resumed_files += 1
+                for i in outputs:
+                    self._add_progress(i, offset)
+
+            checkpoint = None
+            if self.journal is not None and size >= CHECKPOINT_BYTES:
+                checkpoint = partial(self._checkpoint, list(outputs), rel_path, size, mtime, outputs)
+
+            try:
+                with open(src_path, "rb", buffering=0) as src:
+                    if offset:
+                        self._skip_to(src, offset, hasher)
+                    self._stream(src, outputs, writer_pool, hasher, checkpoint, offset)
+            except OSError as e:
+                # A source read error affects every destination equally
+                for i in list(outputs):
+                    self.fail_destination(i, f"Read error on {rel_path}: {e}")
+            finally:
+                for handle in outputs.values():
+                    try:
+                        if hasher is not None:
+                            # Flush to the drive so the read-back verifies what is really on disk
+                            os.fsync(handle.fileno())
+                    except OSError:
+                        pass
+                    try:
+                        handle.close()
+                    except OSError:
+                        pass
+
+            if self.cancel_event.is_set():
+                return
+            verified = [i for i in outputs if self.errors[i] is None]
+            digest = None
+            if hasher is not None:
+                digest = hasher.hexdigest()
+                verified = self._verify(rel_path, size, mtime, digest, verified, writer_pool)[0]
+                if unverified:
+                    self._verify_skipped(rel_path, size, mtime, digest, unverified, writer_pool)
+            for i in verified:
+                try:
+                    shutil.copystat(src_path, os.path.join(self.target_roots[i], rel_path))
+                except OSError:
+                    pass
+                if self.journal is not None:
+                    self.journal.complete(self._journal_source, self._journal_keys[i], rel_path, size, mtime,
+                                          self.hash_algorithm, digest)
+                with self._lock:
+                    self.files_done[i] += 1
+        except Exception as e:
+            for i in self.active_destinations():
+                self.fail_destination(i, f"{rel_path}: {e}")
+
+    def _verify(self, rel_path, size, mtime, source_digest, targets, writer_pool):
+        # Destinations are read back in parallel; the source was hashed while streaming
+        futures = {i: writer_pool.submit(hash_file, os.path.join(self.target_roots[i], rel_path),
+                                         self.hash_algorithm, self.chunk_size, True, self.cancel_event)
+                   for i in targets}
+        verified = []
+        mismatched = []
+        for i, future in futures.items():
+            try:
+                digest = future.result()
+            except OSError as e:
+                digest = f"unreadable ({e})"
+            if digest is None:
+                continue
+            with self._lock:
+                if digest == source_digest:
+                    self.manifests[i].append((rel_path, size, mtime, source_digest))
+                    verified.append(i)
+                else:
+                    self.mismatches[i].append(rel_path)
+                    mismatched.append(i)
+                    if self.journal is not None:
+                        self.journal.forget(self._journal_source, self._journal_keys[i], rel_path)
+        # Mismatched copies keep their fresh mtime so the quick check recopies them next run
+        return verified, mismatched
+
+    def _verify_skipped(self, rel_path, size, mtime, source_digest, targets, writer_pool):
+        """Read back copies the quick check skipped, so the manifest covers every file."""
+        if source_digest is None:
+            try:
+                source_digest = hash_file(os.path.join(self.source_root, rel_path), self.hash_algorithm,
+                                          self.chunk_size, False, self.cancel_event)
+            except OSError as e:
+                for i in targets:
+                    self.fail_destination(i, f"Read error on {rel_path}: {e}")
+                return
+            if source_digest is None:
+                return
+        verified, mismatched = self._verify(rel_path, size, mtime, source_digest, targets, writer_pool)
+        for i in verified:
+            if self.journal is not None:
+                self.journal.complete(self._journal_source, self._journal_keys[i], rel_path, size, mtime,
+                                      self.hash_algorithm, source_digest)
+        for i in mismatched:
+            # These still carry the source mtime; touch them so the next run copies them again
+            try:
+                os.utime(os.path.join(self.target_roots[i], rel_path))
+            except OSError:
+                pass
+
+    def _skip_to(self, src, offset, hasher):
+        # The hash covers the whole file, so a resumed copy re-reads the prefix from the source
+        if hasher is None:
+            src.seek(offset)
+            return
+        view = memoryview(self._buffers()[0])
+        remaining = offset
+        while remaining and not self.cancel_event.is_set():
+            count = src.readinto(view[:min(remaining, len(view))])
+            if not count:
+                break
+            hasher.update(view[:count])
+            remaining -= count
+
+    def _stream(self, src, outputs, writer_pool, hasher=None, checkpoint=None, position=0):
+        # Double buffering: the next block is read while the previous one is being
+        # written, and a buffer is only reused once every destination has written it.
+        buffers = self._buffers()
+        pending = []
+        slot = 0
+        last_checkpoint = position
+        while not self.cancel_event.is_set():
+            view = memoryview(buffers[slot])
+            count = src.readinto(view)
+            for future in pending:
+                future.result()
+            if checkpoint is not None and position - last_checkpoint >= CHECKPOINT_BYTES:
+                checkpoint(position)
+                last_checkpoint = position
+            if not count:
+                break
+            position += count
+            block = view[:count]
+            pending = [writer_pool.submit(self._write_block, i, outputs[i], block)
+                       for i in outputs if self.errors[i] is None]
+            if not pending:
+                break
+            if hasher is not None:
+                pending.append(writer_pool.submit(hasher.update, block))
+            slot ^= 1
+        for future in pending:
+            future.result()
+        if checkpoint is not None and self.cancel_event.is_set() and position > last_checkpoint:
+            # Record how far a cancelled copy got so the next run continues from there
+            checkpoint(position)
+
+    def _write_block(self, index, handle, block):
+        try:
+            written = 0
+            while written < len(block):
+                written += handle.write(block[written:])
+        except OSError as e:
+            self.fail_destination(index, str(e))
+            return
+        self._add_progress(index, len(block))
+
+    def _add_progress(self, index, byte_count, file_done=False):
+        with self._lock:
+            self.bytes_done[index] += byte_count
+            if file_done:
+                self.files_done[index] += 1
+        self._report()
+
+    def _report(self, force=False):
+        if not self.progress_callback:
+            return
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_report < PROGRESS_INTERVAL:
+                return
+            self._last_report = now
+        self.progress_callback(self)
+
+    def _copy_links(self, links):
+        # A link that can't be read from the source is missing on every destination,
+        # but the remaining links still go across before the destinations are failed
+        unreadable = None
+        for rel_path in links:
+            try:
+                link_target = os.readlink(os.path.join(self.source_root, rel_path))
+            except OSError as e:
+                unreadable = unreadable or f"{rel_path}: {e}"
+                continue
+            for i in self.active_destinations():
+                dest_path = os.path.join(self.target_roots[i], rel_path)
+                try:
+                    if os.path.lexists(dest_path):
+                        if os.path.islink(dest_path) and os.readlink(dest_path) == link_target:
+                            continue
+                        os.remove(dest_path)
+                    os.symlink(link_target, dest_path)
+                except OSError as e:
+                    self.fail_destination(i, f"{rel_path}: {e}")
+        if unreadable is not None:
+            for i in self.active_destinations():
+                self.fail_destination(i, unreadable)
+
+    def _copy_dir_stats(self, dirs):
+        # Deepest directories first so setting a parent's mtime is not undone by its children
+        for rel_dir in sorted(dirs, key=lambda d: d.count(os.sep), reverse=True):
+            src_dir = os.path.join(self.source_root, rel_dir)
+            for i in self.active_destinations():
+                try:
+                    shutil.copystat(src_dir, os.path.join(self.target_roots[i], rel_dir))
+                except OSError:
+                    pass
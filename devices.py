@@ -0,0 +1,255 @@
+import os
+import plistlib
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+def device_id(path):
+    """
+    Identify the device a path lives on. A path that doesn't exist yet (a
+    destination about to be created) belongs to its nearest existing parent;
+    unreadable paths get their own key.
+    """
+    current = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(current).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        except OSError:
+            break
+    return f"unknown:{path}"
+
+
+# Physical disks
+
+_physical_cache = {}
+_physical_lock = threading.Lock()
+
+
+def _sysfs_disk(major, minor):
+    # /sys/dev/block/MAJ:MIN points at the block device; a partition's parent is its disk
+    try:
+        node = os.path.realpath(f"/sys/dev/block/{major}:{minor}")
+    except OSError:
+        return None
+    if not os.path.isdir(node):
+        return None
+    if os.path.exists(os.path.join(node, "partition")):
+        node = os.path.dirname(node)
+    return os.path.basename(node)
+
+
+def _mount_source(path):
+    """Block device named in the mount table for the mount holding path (Linux)."""
+    best, source = "", None
+    try:
+        with open("/proc/self/mountinfo", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if " - " not in line or len(fields) < 5:
+                    continue
+                mount_point = fields[4].replace("\\040", " ")
+                tail = line.split(" - ", 1)[1].split()
+                if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) >= len(best):
+                    best, source = mount_point, tail[1] if len(tail) > 1 else None
+    except OSError:
+        return None
+    return source if source and source.startswith("/dev/") else None
+
+
+def _linux_disk(path, st_dev):
+    disk = _sysfs_disk(os.major(st_dev), os.minor(st_dev))
+    if disk:
+        return disk
+    # btrfs, overlay and similar report an anonymous st_dev; fall back to the mount table
+    source = _mount_source(path)
+    if source:
+        try:
+            rdev = os.stat(source).st_rdev
+        except OSError:
+            return os.path.basename(source)
+        return _sysfs_disk(os.major(rdev), os.minor(rdev)) or os.path.basename(source)
+    return None
+
+
+def _macos_disk(path):
+    # APFS volumes live in a synthesized container; its physical store is the real disk
+    try:
+        result = subprocess.run(["diskutil", "info", "-plist", path], capture_output=True, timeout=5, check=False)
+        info = plistlib.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    stores = info.get("APFSPhysicalStores") or []
+    name = stores[0].get("APFSPhysicalStore") if stores else info.get("ParentWholeDisk")
+    match = re.match(r"disk\d+", name or "")
+    return match.group(0) if match else None
+
+
+def physical_device(path):
+    """
+    Key for the physical disk behind path: partitions and volumes that share a
+    disk share a key. Resolved through sysfs and the mount table on Linux and
+    diskutil on macOS; anything else falls back to device_id().
+    """
+    dev = device_id(path)
+    if not isinstance(dev, int):
+        return dev
+    with _physical_lock:
+        if dev in _physical_cache:
+            return _physical_cache[dev]
+    current = os.path.abspath(path)
+    while not os.path.exists(current) and os.path.dirname(current) != current:
+        current = os.path.dirname(current)
+    disk = None
+    if sys.platform.startswith("linux"):
+        disk = _linux_disk(current, dev)
+    elif sys.platform == "darwin":
+        disk = _macos_disk(current)
+    key = f"disk:{disk}" if disk else dev
+    with _physical_lock:
+        _physical_cache[dev] = key
+    return key
+
+
+class DeviceScheduler:
+    """
+    Caps how many streams use each physical disk at once. A stream asks for all
+    of its disks together and starts as soon as every one has room, so a copy
+    waiting on a busy disk doesn't hold back one that uses idle disks.
+
+    Readers of the same source (the destinations of one sync group) share a
+    single read slot: they walk the same files in step and mostly hit the page
+    cache. A stream that needs more slots on one disk than the limit allows
+    (copying within a disk) runs once that disk is otherwise idle.
+    """
+
+    def __init__(self, streams_per_device=1):
+        self.streams_per_device = streams_per_device
+        self._cond = threading.Condition()
+        self._holders = {}  # device -> Counter of stream tokens
+
+    def _claims(self, reads, writes, group):
+        claims = {}
+        for path in reads:
+            claims.setdefault(physical_device(path), set()).add(("read", group or path))
+        for path in writes:
+            claims.setdefault(physical_device(path), set()).add(("write", path, id(claims)))
+        return claims
+
+    def _fits(self, claims):
+        for device, tokens in claims.items():
+            holders = self._holders.get(device)
+            if not holders:
+                continue
+            if len(set(holders) | tokens) > self.streams_per_device:
+                return False
+        return True
+
+    def acquire(self, reads=(), writes=(), group=None, cancel_event=None):
+        """Block until every disk has room. Returns a claim for release(), or None if cancelled."""
+        claims = self._claims(reads, writes, group)
+        with self._cond:
+            while not self._fits(claims):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                self._cond.wait(timeout=0.5)
+            for device, tokens in claims.items():
+                self._holders.setdefault(device, Counter()).update(tokens)
+        return claims
+
+    def release(self, claims):
+        if not claims:
+            return
+        with self._cond:
+            for device, tokens in claims.items():
+                holders = self._holders.get(device)
+                if holders is None:
+                    continue
+                holders.subtract(tokens)
+                for token in tokens:
+                    if holders[token] <= 0:
+                        del holders[token]
+                if not holders:
+                    del self._holders[device]
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, reads=(), writes=(), group=None, cancel_event=None):
+        claims = self.acquire(reads, writes, group, cancel_event)
+        try:
+            yield claims
+        finally:
+            self.release(claims)
+
+    def busy(self, paths):
+        """True if any disk behind paths is in use right now."""
+        # Resolved before taking the lock: on macOS this may run diskutil
+        devices = {physical_device(path) for path in paths}
+        with self._cond:
+            return any(self._holders.get(device) for device in devices)
+
+
+class ThroughputMeter:
+    """
+    Aggregate and per-disk write throughput of the running streams. Streams
+    report their running byte totals; sample() returns the rates since the
+    previous sample.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = {}  # stream id -> [device, bytes_total]
+        self._done = Counter()  # device -> bytes from finished streams
+        self._next_id = 0
+        self._last_time = time.monotonic()
+        self._last_bytes = Counter()
+        self.total_bytes = 0
+
+    def start(self, dest):
+        with self._lock:
+            self._next_id += 1
+            self._streams[self._next_id] = [physical_device(dest), 0]
+            return self._next_id
+
+    def update(self, stream, bytes_total):
+        with self._lock:
+            if stream in self._streams:
+                self._streams[stream][1] = bytes_total
+
+    def finish(self, stream):
+        with self._lock:
+            device, bytes_total = self._streams.pop(stream, (None, 0))
+            if device is not None:
+                self._done[device] += bytes_total
+
+    @property
+    def active(self):
+        with self._lock:
+            return len(self._streams)
+
+    def _device_bytes(self):
+        totals = Counter(self._done)
+        for device, bytes_total in self._streams.values():
+            totals[device] += bytes_total
+        return totals
+
+    def sample(self):
+        """Returns (aggregate bytes/s, {device: bytes/s}) since the last sample."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._last_time, 1e-6)
+            totals = self._device_bytes()
+            rates = {device: max(totals[device] - self._last_bytes[device], 0) / elapsed for device in totals}
+            self.total_bytes = sum(totals.values())
+            self._last_time = now
+            self._last_bytes = totals
+        return sum(rates.values()), rates
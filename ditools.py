@@ -0,0 +1,250 @@
+"""
+Headless DITools: run a sync, drive comparison, render check or tree export
+without Tk. Progress and results are printed to stdout as one JSON object per
+line, so jobs can be scripted on carts and run under nice/ionice.
+
+    python -m ditools sync SOURCE DEST [DEST ...]
+    python -m ditools compare DRIVE DRIVE [...] --reference DRIVE
+    python -m ditools render-check ORIGINALS TRANSCODES
+    python -m ditools tree ROOT [--format jsonl csv html] [--hash xxh64]
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from checksums import ALGORITHMS, resolve_algorithm
+from compare_engine import compare_drives, drive_manifest_hashes
+from compare_report import DiscrepancyReport
+from copy_engine import FanOutCopier
+from mhl import write_ascmhl_generation, write_flat_manifest
+from render_engine import check_render
+from scan_cache import shared_hash_cache
+from source_scan import scan_source
+from transfer_journal import shared_journal
+from traversal import TraversalStats
+from tree_engine import tree_output_path
+from tree_export import REPORT_FORMATS, write_tree_reports
+
+PROGRESS_INTERVAL = 0.5
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CANCELLED = 130
+
+
+def emit(event, **fields):
+    print(json.dumps({"event": event, "time": round(time.time(), 3), **fields}), flush=True)
+
+
+def cancel_on_signals():
+    """Turn SIGINT/SIGTERM into a cancel event so engines can stop cleanly."""
+    cancel_event = threading.Event()
+
+    def handler(signum, _frame):
+        cancel_event.set()
+        emit("cancel_requested", signal=signum)
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+    return cancel_event
+
+
+def run_sync(args):
+    cancel_event = cancel_on_signals()
+    hash_algorithm = None
+    if args.checksum or args.manifest != "none":
+        hash_algorithm = resolve_algorithm(args.checksum or "xxh64")
+    emit("scan_started", source=args.source)
+    scan = scan_source(args.source, cancel_event, use_cache=args.scan_cache)
+    emit("scan_finished", files=scan.file_count, bytes=scan.total_bytes)
+    if cancel_event.is_set():
+        return EXIT_CANCELLED
+
+    def on_progress(copier):
+        emit("progress", total_bytes=copier.total_bytes, total_files=copier.total_files,
+             destinations=[{"dest": dest, "bytes_done": copier.bytes_done[i], "files_done": copier.files_done[i],
+                            "error": copier.errors[i]}
+                           for i, dest in enumerate(copier.dest_list)])
+
+    copier = FanOutCopier(args.source, args.dest, cancel_event=cancel_event, progress_callback=on_progress,
+                          hash_algorithm=hash_algorithm, scan=scan,
+                          journal=None if args.no_journal else shared_journal())
+    copier.run()
+    if copier.resumed_files:
+        emit("resumed", files=copier.resumed_files)
+    status = EXIT_OK
+    for i, dest in enumerate(copier.dest_list):
+        result = {"dest": dest, "files_done": copier.files_done[i], "bytes_done": copier.bytes_done[i],
+                  "error": copier.errors[i], "mismatches": copier.mismatches[i]}
+        if copier.errors[i] is not None or copier.mismatches[i]:
+            status = EXIT_FAILED
+        elif not cancel_event.is_set():
+            finished = True
+            if args.manifest != "none" and copier.manifests[i]:
+                try:
+                    if args.manifest == "ascmhl":
+                        result["manifest"] = write_ascmhl_generation(copier.target_roots[i], copier.manifests[i],
+                                                                     hash_algorithm)
+                    else:
+                        result["manifest"] = write_flat_manifest(copier.target_roots[i], copier.manifests[i],
+                                                                 hash_algorithm)
+                except OSError as e:
+                    result["error"] = f"Could not write manifest: {e}"
+                    status = EXIT_FAILED
+                    finished = False
+            if finished:
+                copier.journal_done(i)
+        emit("destination_finished", **result)
+    if cancel_event.is_set():
+        return EXIT_CANCELLED
+    emit("finished", status=status)
+    return status
+
+
+def run_compare(args):
+    cancel_event = cancel_on_signals()
+    drives = [os.path.abspath(drive) for drive in args.drives]
+    reference = os.path.abspath(args.reference) if args.reference else None
+    if args.hash and reference not in drives:
+        emit("error", message="Checksum comparison needs --reference set to one of the drives")
+        return EXIT_FAILED
+    hash_algorithm = resolve_algorithm(args.hash) if args.hash else None
+    hash_cache = shared_hash_cache() if (hash_algorithm or args.verify_mhl) and not args.no_hash_cache else None
+    manifests = None
+    if args.verify_mhl:
+        manifests = {drive: drive_manifest_hashes(drive, args.skip_hidden, args.scan_cache, cancel_event)
+                     for drive in drives}
+        emit("manifests_loaded", files={drive: len(hashes) for drive, hashes in manifests.items()})
+
+    report = DiscrepancyReport(drives, log_directory=args.log_dir, global_log=args.global_log,
+                               dest_logs=args.dest_logs, export_format=args.export.upper() if args.export else "None")
+    last_progress = [0.0]
+    walk_stats = {}
+
+    def on_discrepancy(discrepancy):
+        emit("discrepancy", **discrepancy._asdict())
+        report.add(discrepancy)
+
+    def on_progress(processed, drive_stats):
+        now = time.time()
+        if now - last_progress[0] >= PROGRESS_INTERVAL:
+            last_progress[0] = now
+            emit("progress", items=processed, discrepancies=report.total,
+                 drives=[{"drive": stats.root, "entries": stats.entries, "dirs": stats.dirs}
+                         for stats in drive_stats])
+
+    try:
+        total_items = compare_drives(drives, reference, not args.no_size, args.mtime, args.ctime, on_discrepancy,
+                                     skip_hidden=args.skip_hidden, skip_mhl=not args.include_mhl,
+                                     use_cache=args.scan_cache, cancel_event=cancel_event,
+                                     progress_callback=on_progress, hash_algorithm=hash_algorithm,
+                                     hash_cache=hash_cache, manifests=manifests, stats=walk_stats)
+    finally:
+        report.close()
+    if cancel_event.is_set():
+        return EXIT_CANCELLED
+    emit("finished", items=total_items, discrepancies=report.total, summary=report.summary_lines(),
+         global_log=report.global_log_path, dest_logs=report.dest_log_paths, export=report.export_path,
+         errors=report.errors,
+         scanned=[{"drive": drive, "entries": stats.entries, "seconds": round(stats.elapsed, 3),
+                   "entries_per_sec": round(stats.entries_per_sec, 1), "volume": str(stats.volume)}
+                  for drive, stats in walk_stats.items()])
+    return EXIT_FAILED if report.total else EXIT_OK
+
+
+def run_render_check(args):
+    originals, missing, extra = check_render(args.originals, args.transcodes)
+    emit("finished", originals=len(originals), missing_in_transcodes=sorted(missing),
+         extra_in_transcodes=sorted(extra))
+    return EXIT_FAILED if missing or extra else EXIT_OK
+
+
+def run_tree(args):
+    cancel_event = cancel_on_signals()
+    output_file = args.output or tree_output_path(args.root)
+    emit("started", root=args.root, output=output_file)
+    algorithm = resolve_algorithm(args.hash) if args.hash else None
+    stats = TraversalStats(os.path.abspath(args.root))
+    last_progress = [0.0]
+
+    def on_progress(stats):
+        now = time.time()
+        if now - last_progress[0] >= PROGRESS_INTERVAL:
+            last_progress[0] = now
+            emit("progress", entries=stats.entries, bytes=stats.bytes,
+                 entries_per_sec=round(stats.entries_per_sec, 1))
+
+    total, reports = write_tree_reports(args.root, output_file, args.format or (), algorithm,
+                                        skip_hidden=not args.include_hidden, stats=stats,
+                                        cancel_event=cancel_event, progress_callback=on_progress)
+    if cancel_event.is_set():
+        emit("cancelled", output=output_file, reports=reports, entries=stats.entries)
+        return EXIT_CANCELLED
+    emit("finished", output=output_file, total_bytes=total, reports=reports, entries=stats.entries,
+         seconds=round(stats.elapsed, 3), entries_per_sec=round(stats.entries_per_sec, 1))
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ditools", description="Headless DITools engines with JSON progress.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync = commands.add_parser("sync", help="copy a source to one or more destinations with the built-in engine")
+    sync.add_argument("source")
+    sync.add_argument("dest", nargs="+")
+    sync.add_argument("--checksum", choices=ALGORITHMS, help="verify every copy with this hash")
+    sync.add_argument("--manifest", choices=("none", "ascmhl", "flat"), default="none")
+    sync.add_argument("--scan-cache", action="store_true",
+                      help="list the source through the scan cache; files rewritten in place may be skipped")
+    sync.add_argument("--no-journal", action="store_true", help="don't record or resume from the transfer journal")
+    sync.set_defaults(func=run_sync)
+
+    compare = commands.add_parser("compare", help="compare drives against a reference")
+    compare.add_argument("drives", nargs="+")
+    compare.add_argument("--reference")
+    compare.add_argument("--no-size", action="store_true", help="do not compare file sizes")
+    compare.add_argument("--mtime", action="store_true", help="compare modification dates")
+    compare.add_argument("--ctime", action="store_true", help="compare creation dates")
+    compare.add_argument("--hash", choices=ALGORITHMS, help="compare file contents with this hash")
+    compare.add_argument("--verify-mhl", action="store_true", help="check files against MHL manifests on the drives")
+    compare.add_argument("--no-hash-cache", action="store_true", help="rehash files even if a verified hash is cached")
+    compare.add_argument("--include-hidden", dest="skip_hidden", action="store_false")
+    compare.add_argument("--include-mhl", action="store_true", help="compare .mhl files too")
+    compare.add_argument("--scan-cache", action="store_true", help="use the scan cache for directory listings")
+    compare.add_argument("--log-dir")
+    compare.add_argument("--global-log", action="store_true")
+    compare.add_argument("--dest-logs", action="store_true")
+    compare.add_argument("--export", choices=("csv", "json"))
+    compare.set_defaults(func=run_compare)
+
+    render = commands.add_parser("render-check", help="check every camera original has a transcode")
+    render.add_argument("originals")
+    render.add_argument("transcodes")
+    render.set_defaults(func=run_render_check)
+
+    tree = commands.add_parser("tree", help="write a text tree of a directory")
+    tree.add_argument("root")
+    tree.add_argument("--output", help="defaults to INDEX_OF_<dir>_<timestamp>.txt inside root")
+    tree.add_argument("--include-hidden", action="store_true")
+    tree.add_argument("--format", nargs="+", choices=REPORT_FORMATS,
+                      help="also write these reports next to the text tree")
+    tree.add_argument("--hash", choices=ALGORITHMS, help="include a hash of every file in the reports")
+    tree.set_defaults(func=run_tree)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except OSError as e:
+        emit("error", message=str(e))
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,15 @@
 import os
 import re
 import threading
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-
-def scan_drive_attributes(root_path, compare_size, compare_date, compare_creation, skip_hidden=False, skip_mhl=False):
-    files_dict = {}
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        # Exclude specific directories
-        dirnames[:] = [d for d in dirnames if d != '_gsdata_']
-        if skip_hidden:
-            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
-        rel_dir = os.path.relpath(dirpath, root_path)
-        if rel_dir != ".":
-            key = rel_dir + os.sep
-            files_dict[key] = {"type": "directory"}
-        for filename in filenames:
-            if filename == ".DS_Store":
-                continue
-            if skip_mhl and filename.lower().endswith(".mhl"):
-                continue
-            full_path = os.path.join(dirpath, filename)
-            rel_path = os.path.relpath(full_path, root_path)
-            attr = {"type": "file"}
-            if compare_size:
-                try:
-                    attr['size'] = os.path.getsize(full_path)
-                except Exception:
-                    attr['size'] = None
-            if compare_date:
-                try:
-                    attr['mod_date'] = os.path.getmtime(full_path)
-                except Exception:
-                    attr['mod_date'] = None
-            if compare_creation:
-                try:
-                    attr['creation_date'] = os.path.getctime(full_path)
-                except Exception:
-                    attr['creation_date'] = None
-            files_dict[rel_path] = attr
-    return files_dict
+from tkinter import ttk, filedialog, messagebox
+import scan_cache
+from checksums import ALGORITHMS, resolve_algorithm
+from compare_engine import compare_drives, drive_manifest_hashes
+from compare_report import EXPORT_FORMATS, DiscrepancyReport
+from log_view import ScrolledLogView
 
 class FileComparatorFrame(ttk.Frame):
     def __init__(self, parent):
@@ -87,6 +56,11 @@ class FileComparatorFrame(ttk.Frame):
         self.compare_creation_var = tk.BooleanVar(value=False)
         self.skip_hidden_var = tk.BooleanVar(value=True)
         self.skip_mhl_var = tk.BooleanVar(value=True)
+        self.use_scan_cache_var = tk.BooleanVar(value=False)
+        self.compare_hash_var = tk.BooleanVar(value=False)
+        self.hash_algorithm_var = tk.StringVar(value="xxh64")
+        self.reuse_hashes_var = tk.BooleanVar(value=True)
+        self.verify_mhl_var = tk.BooleanVar(value=False)
         self.cb_size = ttk.Checkbutton(options_frame, text="Compare Size", variable=self.compare_size_var)
         self.cb_size.grid(row=0, column=0, padx=5, pady=2, sticky="w")
         self.cb_date = ttk.Checkbutton(options_frame, text="Compare Modification Date", variable=self.compare_date_var)
@@ -97,6 +71,17 @@ class FileComparatorFrame(ttk.Frame):
         self.cb_hidden.grid(row=1, column=0, padx=5, pady=2, sticky="w")
         self.cb_mhl = ttk.Checkbutton(options_frame, text="Skip .mhl Files", variable=self.skip_mhl_var)
         self.cb_mhl.grid(row=1, column=1, padx=5, pady=2, sticky="w")
+        self.cb_cache = ttk.Checkbutton(options_frame, text="Use Scan Cache (Faster Rescans)", variable=self.use_scan_cache_var)
+        self.cb_cache.grid(row=1, column=2, padx=5, pady=2, sticky="w")
+        
+        self.cb_hash = ttk.Checkbutton(options_frame, text="Compare Checksums", variable=self.compare_hash_var)
+        self.cb_hash.grid(row=0, column=3, padx=5, pady=2, sticky="w")
+        ttk.Combobox(options_frame, textvariable=self.hash_algorithm_var, values=ALGORITHMS,
+                     state="readonly", width=8).grid(row=1, column=3, padx=5, pady=2, sticky="w")
+        self.cb_reuse_hashes = ttk.Checkbutton(options_frame, text="Reuse Verified Hashes", variable=self.reuse_hashes_var)
+        self.cb_reuse_hashes.grid(row=2, column=3, padx=5, pady=2, sticky="w")
+        self.cb_verify_mhl = ttk.Checkbutton(options_frame, text="Verify MHL Manifests", variable=self.verify_mhl_var)
+        self.cb_verify_mhl.grid(row=3, column=3, padx=5, pady=2, sticky="w")
         
         # Logging options
         self.fc_global_logging_enabled = tk.BooleanVar(value=False)
@@ -107,6 +92,12 @@ class FileComparatorFrame(ttk.Frame):
             .grid(row=2, column=1, padx=5, pady=2, sticky="w")
         ttk.Button(options_frame, text="Log Directory", style="DIT.TButton", command=self.choose_log_directory)\
             .grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        self.export_format_var = tk.StringVar(value="None")
+        export_frame = ttk.Frame(options_frame)
+        export_frame.grid(row=3, column=1, padx=5, pady=2, sticky="w")
+        ttk.Label(export_frame, text="Export Report:").pack(side=tk.LEFT)
+        ttk.Combobox(export_frame, textvariable=self.export_format_var, values=EXPORT_FORMATS,
+                     state="readonly", width=6).pack(side=tk.LEFT, padx=(5, 0))
         
         # Progress bar and status label
         self.progress_bar = ttk.Progressbar(self, orient="horizontal", length=500, mode="determinate")
@@ -119,7 +110,7 @@ class FileComparatorFrame(ttk.Frame):
         self.compare_button.pack(pady=5)
         
         # Scrolled text area for output
-        self.text_area = scrolledtext.ScrolledText(self, width=80, height=15)
+        self.text_area = ScrolledLogView(self, width=80, height=15)
         self.text_area.pack(pady=5, fill="x", padx=10)
         
         # Bottom frame for clear status
@@ -243,6 +234,9 @@ class FileComparatorFrame(ttk.Frame):
         if len(self.drive_paths) < 1:
             messagebox.showwarning("No Drives", "Please add at least one drive.")
             return
+        if self.compare_hash_var.get() and self.reference_drive not in self.drive_paths:
+            messagebox.showwarning("No Reference", "Checksum comparison needs a reference drive to compare against.")
+            return
         self.text_area.delete("1.0", tk.END)
         self.progress_bar['value'] = 0
         self.status_label.config(text="Status: Starting comparison...")
@@ -255,114 +249,96 @@ class FileComparatorFrame(ttk.Frame):
         compare_creation = self.compare_creation_var.get()
         skip_hidden = self.skip_hidden_var.get()
         skip_mhl = self.skip_mhl_var.get()
-        self.update_status("Scanning all drives...")
-        drive_files = {}
-        for drive in self.drive_paths:
-            self.update_status(f"Scanning drive: {drive}")
-            drive_files[drive] = scan_drive_attributes(
-                drive, compare_size, compare_date, compare_creation, 
-                skip_hidden=skip_hidden, skip_mhl=skip_mhl
+        use_cache = self.use_scan_cache_var.get()
+        hash_algorithm = None
+        hash_cache = None
+        if self.compare_hash_var.get():
+            hash_algorithm = resolve_algorithm(self.hash_algorithm_var.get())
+            if hash_algorithm != self.hash_algorithm_var.get():
+                self.append_text(f"{self.hash_algorithm_var.get()} needs the xxhash module; using {hash_algorithm} instead.\n")
+            if self.reuse_hashes_var.get():
+                hash_cache = scan_cache.shared_hash_cache()
+        manifests = None
+        if self.verify_mhl_var.get():
+            manifests = self.load_manifests(skip_hidden, use_cache)
+            if hash_cache is None and self.reuse_hashes_var.get():
+                hash_cache = scan_cache.shared_hash_cache()
+        self.update_status("Scanning and comparing all drives...")
+        # Every drive is walked in sorted order on its own thread and the
+        # streams are merged, so memory stays flat however many files there are.
+        # Every discrepancy goes to the log view, which spools old lines to disk,
+        # and straight to the log files.
+        report = DiscrepancyReport(
+            self.drive_paths, log_directory=self.log_directory,
+            global_log=self.fc_global_logging_enabled.get(), dest_logs=self.fc_dest_logging_enabled.get(),
+            export_format=self.export_format_var.get(), on_line=self.append_text
+        )
+        last_report = [0.0]
+        walk_stats = {}
+
+        def progress(processed, drive_stats):
+            now = time.time()
+            if now - last_report[0] >= 0.25:
+                last_report[0] = now
+                drives = " | ".join(f"{os.path.basename(st.root.rstrip(os.sep)) or st.root}: "
+                                    f"{st.entries} entries in {st.dirs} folders" for st in drive_stats)
+                self.update_status(f"Compared {processed} items, {report.total} discrepancies so far - {drives}")
+
+        try:
+            total_items = compare_drives(
+                list(self.drive_paths), self.reference_drive, compare_size, compare_date, compare_creation, report.add,
+                skip_hidden=skip_hidden, skip_mhl=skip_mhl, use_cache=use_cache, progress_callback=progress,
+                hash_algorithm=hash_algorithm, hash_cache=hash_cache, manifests=manifests, stats=walk_stats
             )
-        all_keys = set()
-        for files_dict in drive_files.values():
-            all_keys.update(files_dict.keys())
-        total_keys = len(all_keys)
-        if total_keys == 0:
+        finally:
+            report.close()
+        self.update_progress(1, 1)
+        for drive_stats in walk_stats.values():
+            self.append_text(f"Scanned {drive_stats.summary()}\n")
+        for error in report.errors:
+            self.append_text(error + "\n")
+        if total_items == 0:
             self.append_text("No files or directories found on any drive.\n")
             self.update_status("Scan complete. No items found.")
             return
-        self.update_status("Comparing items across all drives...")
-        discrepancies = {}
-        processed = 0
-        ref_drive = self.reference_drive if self.reference_drive in drive_files else None
-        for key in all_keys:
-            processed += 1
-            self.update_progress(processed, total_keys)
-            ref_attr = drive_files[ref_drive].get(key) if ref_drive else None
-            for drive, files_dict in drive_files.items():
-                if key not in files_dict:
-                    discrepancies.setdefault(drive, []).append(f"Missing item: {key}")
-                else:
-                    comp_attr = files_dict[key]
-                    if ref_attr:
-                        if ref_attr.get("type") != comp_attr.get("type"):
-                            discrepancies.setdefault(drive, []).append(
-                                f"Type mismatch for {key} (Ref: {ref_attr.get('type')}, {drive}: {comp_attr.get('type')})"
-                            )
-                        elif ref_attr.get("type") == "file":
-                            messages = []
-                            if compare_size and ref_attr.get('size') != comp_attr.get('size'):
-                                messages.append(f"Size mismatch for {key} (Ref: {ref_attr.get('size')}, {drive}: {comp_attr.get('size')})")
-                            if compare_date and ref_attr.get('mod_date') != comp_attr.get('mod_date'):
-                                messages.append(f"Modification date mismatch for {key}")
-                            if compare_creation and ref_attr.get('creation_date') != comp_attr.get('creation_date'):
-                                messages.append(f"Creation date mismatch for {key}")
-                            if messages:
-                                discrepancies.setdefault(drive, []).extend(messages)
-        if not discrepancies:
+        if not report.total:
             self.append_text("All drives have the same items and attributes.\n")
             self.update_status("Comparison complete. No discrepancies found.")
             self.after(0, lambda: messagebox.showinfo("Comparison Result", "All drives match across all items."))
         else:
-            result_text = ""
-            for drive, messages in discrepancies.items():
-                result_text += f"Discrepancies for drive: {drive}\n"
-                for msg in messages:
-                    result_text += "  " + msg + "\n"
-                result_text += "\n"
-            self.append_text(result_text)
-            log_files = {}
-            if self.fc_global_logging_enabled.get():
-                log_files["global"] = self.write_global_log(discrepancies)
-            if self.fc_dest_logging_enabled.get():
-                log_files["destination"] = self.write_dest_logs(discrepancies)
-            self.update_status("Comparison complete with discrepancies.")
-            log_message = "Discrepancies found."
-            if log_files:
+            summary = report.summary_lines()
+            self.append_text("\nSummary\n" + "".join(f"  {line}\n" for line in summary))
+            self.update_status(f"Comparison complete with {report.total} discrepancies.")
+            log_message = "Discrepancies found.\n\n" + "\n".join(summary)
+            if report.global_log_path or report.dest_log_paths or report.export_path:
                 log_message += "\n\nLog files generated:"
-                if "global" in log_files:
-                    log_message += f"\n- Global log: {log_files['global']}"
-                if "destination" in log_files and log_files["destination"]:
+                if report.global_log_path:
+                    log_message += f"\n- Global log: {report.global_log_path}"
+                if report.dest_log_paths:
                     log_message += "\n- Destination logs:"
-                    for drive, path in log_files["destination"].items():
+                    for drive, path in report.dest_log_paths.items():
                         log_message += f"\n  - {os.path.basename(drive)}: {path}"
+                if report.export_path:
+                    log_message += f"\n- Full report: {report.export_path}"
             else:
-                log_message += " No log files were generated (logging disabled)."
+                log_message += "\n\nNo log files were generated (logging disabled)."
             self.after(0, lambda: messagebox.showwarning("Differences Found", log_message))
     
-    def write_global_log(self, discrepancies):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if self.log_directory:
-            log_filename = os.path.join(self.log_directory, f"File_Comparison_Log_{timestamp}.txt")
-        else:
-            log_filename = f"File_Comparison_Log_{timestamp}.txt"
-        with open(log_filename, "w") as log_file:
-            for drive, messages in discrepancies.items():
-                log_file.write(f"Discrepancies for drive: {drive}\n")
-                for msg in messages:
-                    log_file.write("  " + msg + "\n")
-                log_file.write("\n")
-        return log_filename
-    
-    def write_dest_logs(self, discrepancies):
-        dest_log_files = {}
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        for drive, messages in discrepancies.items():
-            if messages:
-                dest_log_path = os.path.join(drive, f"File_Comparison_Log_{timestamp}.txt")
-                with open(dest_log_path, "w") as log_file:
-                    log_file.write(f"Discrepancies for drive: {drive}\n")
-                    for msg in messages:
-                        log_file.write("  " + msg + "\n")
-                    log_file.write("\n")
-                dest_log_files[drive] = dest_log_path
-        return dest_log_files
+    def load_manifests(self, skip_hidden, use_cache):
+        self.update_status("Reading MHL manifests...")
+        with ThreadPoolExecutor(max_workers=max(1, len(self.drive_paths))) as pool:
+            results = pool.map(lambda drive: drive_manifest_hashes(drive, skip_hidden, use_cache), self.drive_paths)
+            manifests = dict(zip(self.drive_paths, results))
+        for drive, hashes in manifests.items():
+            self.append_text(f"{drive}: {len(hashes)} files listed in MHL manifests.\n")
+        return manifests
     
     def update_status(self, message):
         self.status_label.after(0, lambda: self.status_label.config(text=f"Status: {message}"))
     
     def append_text(self, text):
-        self.text_area.after(0, lambda: self.text_area.insert(tk.END, text))
+        # LogView batches inserts itself and is safe to call from the comparison thread
+        self.text_area.insert(tk.END, text)
     
     def update_progress(self, value, maximum):
         self.progress_bar.after(0, lambda: self.progress_bar.config(value=value, maximum=maximum))
\ No newline at end of file
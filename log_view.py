@@ -0,0 +1,166 @@
+import tempfile
+import threading
+import tkinter as tk
+from array import array
+
+MAX_LINES = 5000
+PAGE_LINES = 1000
+FLUSH_INTERVAL = 100  # ms
+
+
+class LogView(tk.Text):
+    """
+    Text widget for tool output that stays cheap however long a job runs.
+    insert(tk.END, ...) may be called from any thread; text is buffered and
+    added in one insert per tick. Only the newest max_lines are kept in the
+    widget; older lines are paged out to a temp file and can be brought back
+    a page at a time by clicking the marker line at the top.
+    """
+
+    def __init__(self, master=None, max_lines=MAX_LINES, page_lines=PAGE_LINES, flush_interval=FLUSH_INTERVAL, **kw):
+        super().__init__(master, **kw)
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self.flush_interval = flush_interval
+        self._limit = max_lines
+        self._pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._spool = None
+        self._offsets = array("q")  # start of every spooled line, oldest first
+        self._marker = False
+        self.tag_configure("older_marker", foreground="gray")
+        self.tag_bind("older_marker", "<Button-1>", lambda event: self.load_older())
+
+    def insert(self, index, chars, *args):
+        if index not in (tk.END, "end") or args:
+            return super().insert(index, chars, *args)
+        with self._lock:
+            self._pending.append(chars)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.after(self.flush_interval, self.flush)
+
+    def write(self, text):
+        self.insert(tk.END, text)
+
+    def flush(self):
+        with self._lock:
+            data = "".join(self._pending)
+            self._pending = []
+            self._scheduled = False
+        if not data:
+            return
+        at_bottom = self.yview()[1] >= 0.999
+        disabled = str(self.cget("state")) == tk.DISABLED
+        if disabled:
+            self.config(state=tk.NORMAL)
+        super().insert(tk.END, data)
+        self._trim()
+        if disabled:
+            self.config(state=tk.DISABLED)
+        if at_bottom:
+            self.see(tk.END)
+
+    def _line_count(self):
+        return int(self.index("end-1c").split(".")[0])
+
+    def _trim(self):
+        first = 2 if self._marker else 1
+        excess = self._line_count() - first + 1 - self._limit
+        if excess <= 0:
+            return
+        cut = f"{first + excess}.0"
+        self._spool_lines(super().get(f"{first}.0", cut))
+        super().delete(f"{first}.0", cut)
+        self._update_marker()
+
+    def _spool_lines(self, text):
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile()
+        self._spool.seek(0, 2)
+        position = self._spool.tell()
+        chunks = []
+        for line in text.splitlines(keepends=True):
+            data = line.encode("utf-8")
+            self._offsets.append(position)
+            position += len(data)
+            chunks.append(data)
+        self._spool.write(b"".join(chunks))
+
+    def load_older(self, count=None):
+        """Move the newest page of spooled lines back into the widget."""
+        if not self._offsets:
+            return
+        count = min(count or self.page_lines, len(self._offsets))
+        start = self._offsets[-count]
+        self._spool.seek(start)
+        data = self._spool.read().decode("utf-8", errors="replace")
+        self._spool.truncate(start)
+        del self._offsets[-count:]
+        # Lines the user asked for stay visible until the view is cleared
+        self._limit += count
+        disabled = str(self.cget("state")) == tk.DISABLED
+        if disabled:
+            self.config(state=tk.NORMAL)
+        super().insert("2.0" if self._marker else "1.0", data)
+        self._update_marker()
+        if disabled:
+            self.config(state=tk.DISABLED)
+
+    def _update_marker(self):
+        if self._marker:
+            super().delete("1.0", "2.0")
+            self._marker = False
+        if self._offsets:
+            text = f"[{len(self._offsets)} older lines hidden - click to show more]\n"
+            super().insert("1.0", text, ("older_marker",))
+            self._marker = True
+
+    def delete(self, index1, index2=None):
+        if index1 == "1.0" and index2 in (tk.END, "end"):
+            self.clear()
+            return
+        super().delete(index1, index2)
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        self._offsets = array("q")
+        self._marker = False
+        self._limit = self.max_lines
+        super().delete("1.0", tk.END)
+
+    def get(self, index1, index2=None):
+        if index1 != "1.0" or index2 not in (tk.END, "end"):
+            return super().get(index1, index2)
+        # The full log: paged-out lines, then what is on screen and still pending
+        self.flush()
+        older = ""
+        if self._spool is not None:
+            self._spool.seek(0)
+            older = self._spool.read().decode("utf-8", errors="replace")
+        return older + super().get("2.0" if self._marker else "1.0", tk.END)
+
+
+class ScrolledLogView(LogView):
+    """LogView with a vertical scrollbar, laid out like scrolledtext.ScrolledText."""
+
+    def __init__(self, master=None, **kw):
+        self.frame = tk.Frame(master)
+        self.vbar = tk.Scrollbar(self.frame)
+        self.vbar.pack(side=tk.RIGHT, fill=tk.Y)
+        kw["yscrollcommand"] = self.vbar.set
+        super().__init__(self.frame, **kw)
+        self.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.vbar["command"] = self.yview
+        # Geometry calls go to the surrounding frame
+        text_methods = vars(tk.Text).keys()
+        methods = vars(tk.Pack).keys() | vars(tk.Grid).keys() | vars(tk.Place).keys()
+        for name in methods.difference(text_methods):
+            if name[0] != "_" and name not in ("config", "configure"):
+                setattr(self, name, getattr(self.frame, name))
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+
+
+class BufferedLogWriter:
+    """
+    Collects log lines and writes them to one or more open files in batches,
+    so a transfer of millions of files doesn't cost a write and flush per line.
+    targets is a list of (file, lock) pairs; lock may be None.
+    """
+
+    def __init__(self, targets, flush_interval=1.0, max_lines=2000):
+        self.targets = [(f, lock) for f, lock in targets if f]
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self._lines = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if not self.targets:
+            return
+        with self._lock:
+            self._lines.append(text)
+            due = len(self._lines) >= self.max_lines or time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            data = "".join(self._lines)
+            self._lines = []
+            self._last_flush = time.time()
+        if not data:
+            return
+        for f, lock in self.targets:
+            if lock:
+                with lock:
+                    f.write(data)
+                    f.flush()
+            else:
+                f.write(data)
+                f.flush()
+
+
+class BatchedQueueWriter:
+    """
+    Joins lines bound for a Tk output queue into one chunk per interval. At most
+    max_lines are forwarded per chunk; the rest are summarised in a single line,
+    so UI cost per tick stays flat however many files go by.
+    """
+
+    def __init__(self, out_queue, flush_interval=0.25, max_lines=200):
+        self.out_queue = out_queue
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self._lines = []
+        self._dropped = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            if len(self._lines) < self.max_lines:
+                self._lines.append(text)
+            else:
+                self._dropped += 1
+            due = time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines = self._lines
+            dropped = self._dropped
+            self._lines = []
+            self._dropped = 0
+            self._last_flush = time.time()
+        if dropped:
+            lines.append(f"... {dropped} more lines (see log files for the full list)\n")
+        if lines:
+            self.out_queue.put("".join(lines))
+
+
+class UIQueue(queue.Queue):
+    """
+    Queue of text bound for a Tk widget. Each item is stamped with the time it
+    was queued so the consumer can measure UI lag, and on_put (if set) is
+    called after every put so a suspended poller can be woken up.
+    get()/get_nowait() return (queued_at, text) pairs.
+    """
+
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.on_put = None
+
+    def _put(self, item):
+        super()._put((time.monotonic(), item))
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        if self.on_put is not None:
+            self.on_put()
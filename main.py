@@ -2,19 +2,112 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import subprocess
 import importlib
+import json
+import logging
+import os
 import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from app_paths import app_support_dir
+
+LOG_FILE = "ditools.log"
+SETTINGS_FILE = "settings.json"
+LOG_MAX_BYTES = 1024 * 1024
+
+log = logging.getLogger("ditools")
 
 THEME_SETTINGS = {
     "light": {"bg": "#FFFFFF", "fg": "#000000", "canvas_bg": "#F0F0F0", "button_bg": "#EFEFEF", "highlight_bg": "#E0E0E0"},
     "dark": {"bg": "#2D2D2D", "fg": "#FFFFFF", "canvas_bg": "#333333", "button_bg": "#404040", "highlight_bg": "#3D3D3D"}
 }
 
-def get_macos_appearance():
+# Last detected system appearance; only macOS needs a child process to find it,
+# so there it is refreshed on a background thread and read from here. It is
+# also saved in settings.json so the next launch paints in the right theme.
+_appearance = {"theme": None, "refreshing": False}
+_appearance_lock = threading.Lock()
+
+def _settings_path():
+    return os.path.join(app_support_dir(), SETTINGS_FILE)
+
+def load_app_settings():
+    try:
+        with open(_settings_path(), encoding="utf-8") as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+def save_app_setting(key, value):
+    settings = load_app_settings()
+    if settings.get(key) == value:
+        return
+    settings[key] = value
     try:
-        result = subprocess.run(['defaults', 'read', '-g', 'AppleInterfaceStyle'], capture_output=True, text=True)
-        return "dark" if "Dark" in result.stdout else "light"
-    except:
-        return "light"
+        path = _settings_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def detect_appearance():
+    if sys.platform == "darwin":
+        try:
+            result = subprocess.run(['defaults', 'read', '-g', 'AppleInterfaceStyle'],
+                                    capture_output=True, text=True, timeout=5)
+            return "dark" if "Dark" in result.stdout else "light"
+        except (OSError, subprocess.SubprocessError):
+            return "light"
+    if sys.platform == "win32":
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                                r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize") as key:
+                value, _ = winreg.QueryValueEx(key, "AppsUseLightTheme")
+            return "light" if value else "dark"
+        except OSError:
+            return "light"
+    return "dark" if "dark" in os.environ.get("GTK_THEME", "").lower() else "light"
+
+def get_macos_appearance():
+    """
+    Cached appearance; never blocks. On macOS it is the appearance saved by
+    the last launch (or "light" on the very first) until the background check finishes.
+    """
+    theme = _appearance["theme"]
+    if theme is None:
+        if sys.platform == "darwin":
+            saved = load_app_settings().get("appearance")
+            theme = saved if saved in THEME_SETTINGS else None
+        else:
+            # Environment and registry lookups are cheap enough to do inline
+            theme = detect_appearance()
+        _appearance["theme"] = theme
+    return theme or "light"
+
+def refresh_appearance_async(root, callback):
+    """Re-detect the appearance off the main thread, then call callback(theme) on it."""
+    with _appearance_lock:
+        if _appearance["refreshing"]:
+            return
+        _appearance["refreshing"] = True
+
+    def worker():
+        theme = detect_appearance()
+        with _appearance_lock:
+            _appearance["theme"] = theme
+            _appearance["refreshing"] = False
+        save_app_setting("appearance", theme)
+        try:
+            root.after(0, callback, theme)
+        except (RuntimeError, tk.TclError):
+            pass  # Window closed while the check was running
+
+    threading.Thread(target=worker, daemon=True).start()
 
 def apply_theme(root, theme):
     style = ttk.Style()
@@ -35,17 +128,36 @@ def safe_import(module_name):
         messagebox.showwarning("Module Import Warning", f"Module '{module_name}' failed to load: {e}")
         return None
 
-modules = {
-    "project": safe_import("project"),
-    "sync": safe_import("sync"),
-    "file_comparator": safe_import("file_comparator"),
-    "render_check": safe_import("render_check"),
-    "tree_generator": safe_import("tree_generator"),
-    "trash": safe_import("trash"),
-}
+# Tool modules are imported and their tabs built the first time a tab is selected
+TABS = [
+    ("Project", "project", "ProjectFrame"),
+    ("Sync", "sync", "NewSyncFrame"),
+    ("File Comparator", "file_comparator", "FileComparatorFrame"),
+    ("Render Check", "render_check", "RenderCheckFrame"),
+    ("Tree Generator", "tree_generator", "TreeGeneratorFrame"),
+    ("Trash .drx Files", "trash", "TrashDrxFrame"),
+]
 
-def create_scrollable_tab(notebook, theme_settings, FrameClass):
-    container = ttk.Frame(notebook)
+def setup_logging():
+    """App diagnostics go to a small rotating log in the application support folder (and stderr from a terminal)."""
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+    try:
+        handler = RotatingFileHandler(os.path.join(app_support_dir(), LOG_FILE), maxBytes=LOG_MAX_BYTES,
+                                      backupCount=1, encoding="utf-8")
+        handler.setFormatter(formatter)
+        log.addHandler(handler)
+    except OSError:
+        pass
+    if sys.stderr is not None and sys.stderr.isatty():
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        log.addHandler(console)
+    log.setLevel(logging.INFO)
+
+def report_startup_time(label, seconds):
+    log.info("[startup] %s: %.0f ms", label, seconds * 1000)
+
+def populate_scrollable_tab(container, theme_settings, FrameClass):
     canvas = tk.Canvas(container, bg=theme_settings["canvas_bg"], highlightthickness=0)
     scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
     scrollable_frame = ttk.Frame(canvas)
@@ -95,49 +207,57 @@ def create_scrollable_tab(notebook, theme_settings, FrameClass):
     frame_content = FrameClass(scrollable_frame)
     frame_content.pack(fill="both", expand=True)
 
-    return container
-
 def main():
+    launch_time = time.perf_counter()
+    setup_logging()
     root = tk.Tk()
     root.title("DITools")
     root.geometry("900x1100")
     root.minsize(600, 700)
 
-    current_theme = get_macos_appearance()
-    apply_theme(root, current_theme)
-    theme_settings = root.theme_settings
+    # Theme saved by the last launch now; the detected appearance is applied after first paint
+    apply_theme(root, get_macos_appearance())
 
     notebook = ttk.Notebook(root)
     notebook.pack(fill="both", expand=True)
 
+    # Every tab starts as an empty container; its module is imported and its
+    # frame built on first selection.
     tab_frames = {}
-    available_tabs = {
-        "Project": modules["project"].ProjectFrame if modules["project"] else None,
-        "Sync": modules["sync"].NewSyncFrame if modules["sync"] else None,
-        "File Comparator": modules["file_comparator"].FileComparatorFrame if modules["file_comparator"] else None,
-        "Render Check": modules["render_check"].RenderCheckFrame if modules["render_check"] else None,
-        "Tree Generator": modules["tree_generator"].TreeGeneratorFrame if modules["tree_generator"] else None,
-        "Trash .drx Files": modules["trash"].TrashDrxFrame if modules["trash"] else None,
-    }
-
-    for tab_name, FrameClass in available_tabs.items():
-        if FrameClass:
-            tab_frame = create_scrollable_tab(notebook, theme_settings, FrameClass)
-            tab_frames[tab_name] = tab_frame
-            notebook.add(tab_frame, text=tab_name)
+    tab_specs = {}
+    for tab_name, module_name, class_name in TABS:
+        tab_frame = ttk.Frame(notebook)
+        tab_frames[tab_name] = tab_frame
+        tab_specs[str(tab_frame)] = (tab_name, module_name, class_name)
+        notebook.add(tab_frame, text=tab_name)
+
+    def build_tab(tab_id):
+        spec = tab_specs.pop(str(tab_id), None)
+        if spec is None:
+            return
+        tab_name, module_name, class_name = spec
+        start = time.perf_counter()
+        module = safe_import(module_name)
+        imported = time.perf_counter()
+        if module is None:
+            ttk.Label(tab_frames[tab_name], text=f"{tab_name} is unavailable: module '{module_name}' failed to load.")\
+                .pack(padx=20, pady=20)
+            return
+        populate_scrollable_tab(tab_frames[tab_name], root.theme_settings, getattr(module, class_name))
+        built = time.perf_counter()
+        report_startup_time(f"{tab_name} tab (import {(imported - start) * 1000:.0f} ms, build {(built - imported) * 1000:.0f} ms)",
+                            built - start)
 
     # Force theme refresh when tab is changed
     def on_tab_changed(event):
+        selected = notebook.select()
+        if selected:
+            build_tab(selected)
         # Update the current theme when switching tabs
-        new_theme = get_macos_appearance()
-        if new_theme != root.current_theme:
-            apply_theme(root, new_theme)
+        refresh_appearance_async(root, update_theme)
         
         # Also re-apply even if it's the same theme to ensure all elements are updated
-        selected_tab = notebook.select()
-        if selected_tab:
-            index = notebook.index(selected_tab)
-            tab_name = list(tab_frames.keys())[index]
+        if selected:
             # Update canvas background for the selected tab
             for frame in tab_frames.values():
                 for child in frame.winfo_children():
@@ -146,28 +266,36 @@ def main():
     
     notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
 
-    def monitor_theme_changes():
-        nonlocal current_theme
-        new_theme = get_macos_appearance()
-        if new_theme != current_theme:
-            current_theme = new_theme
-            apply_theme(root, new_theme)
-            
-            # Update all tab frames when theme changes
-            for frame in tab_frames.values():
-                for child in frame.winfo_children():
-                    if isinstance(child, tk.Canvas):
-                        child.config(bg=root.theme_settings["canvas_bg"])
-                    
-                    # Force text widgets to update foreground color
-                    for widget in child.winfo_children():
-                        if isinstance(widget, tk.Text):
-                            widget.config(fg=root.theme_settings["fg"])
+    def update_theme(new_theme):
+        if new_theme == root.current_theme:
+            return
+        apply_theme(root, new_theme)
         
+        # Update all tab frames when theme changes
+        for frame in tab_frames.values():
+            for child in frame.winfo_children():
+                if isinstance(child, tk.Canvas):
+                    child.config(bg=root.theme_settings["canvas_bg"])
+                
+                # Force text widgets to update foreground color
+                for widget in child.winfo_children():
+                    if isinstance(widget, tk.Text):
+                        widget.config(fg=root.theme_settings["fg"])
+
+    def monitor_theme_changes():
+        refresh_appearance_async(root, update_theme)
         root.after(5000, monitor_theme_changes)  # Check more frequently
 
     root.after(5000, monitor_theme_changes)
 
+    def report_first_paint():
+        report_startup_time("window shown", time.perf_counter() - launch_time)
+        # The initially selected tab is built once the empty window is up
+        build_tab(notebook.select())
+        refresh_appearance_async(root, update_theme)
+
+    root.after_idle(report_first_paint)
+
     root.protocol("WM_DELETE_WINDOW", root.destroy)
     root.mainloop()
 
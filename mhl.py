@@ -0,0 +1,206 @@
+import hashlib
+import os
+import re
+import socket
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+from checksums import VERIFY_ALGORITHMS, can_hash, c4_encode
+
+ASCMHL_FOLDER = "ascmhl"
+ASCMHL_CHAIN = "ascmhl_chain.xml"
+ASCMHL_NAMESPACE = "urn:ASC:MHL:v2.0"
+ASCMHL_DIRECTORY_NAMESPACE = "urn:ASC:MHL:DIRECTORY:v2.0"
+TOOL_NAME = "DITools"
+TOOL_VERSION = "2.0.0"
+
+# Hash element names in legacy MHL (1.x) and ASC-MHL, mapped to checksums algorithm names
+MANIFEST_ALGORITHMS = {"xxh64": "xxh64", "xxhash64be": "xxh64", "xxh3": "xxh3", "xxh128": "xxh128",
+                       "md5": "md5", "sha1": "sha1", "c4": "c4"}
+
+ManifestHash = namedtuple("ManifestHash", "path size algorithm digest")
+
+def c4_id(data):
+    return c4_encode(hashlib.sha512(data).digest())
+
+
+def iso_date(timestamp=None):
+    if timestamp is None:
+        moment = datetime.now(timezone.utc)
+    else:
+        moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    return moment.replace(microsecond=0).isoformat()
+
+
+def manifest_path(rel_path):
+    # Manifests always use forward slashes regardless of platform
+    return rel_path.replace(os.sep, "/")
+
+
+def write_flat_manifest(root, entries, algorithm):
+    """
+    Write a '<digest>  <relative path>' manifest (md5sum/xxhsum style) into root.
+    entries is an iterable of (rel_path, size, mtime, digest).
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = os.path.basename(os.path.normpath(root)).replace(" ", "_")
+    manifest_file = os.path.join(root, f"{name}_{timestamp}.{algorithm}")
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        for rel_path, _size, _mtime, digest in sorted(entries):
+            f.write(f"{digest}  {manifest_path(rel_path)}\n")
+    return manifest_file
+
+
+def next_generation(root):
+    folder = os.path.join(root, ASCMHL_FOLDER)
+    highest = 0
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            match = re.match(r"^(\d{4})_.*\.mhl$", name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def write_ascmhl_generation(root, entries, algorithm, process="transfer"):
+    """
+    Append a new ASC-MHL generation for root: writes ascmhl/NNNN_<root>_<date>.mhl
+    and records it with its C4 hash in ascmhl/ascmhl_chain.xml.
+    entries is an iterable of (rel_path, size, mtime, digest).
+    """
+    folder = os.path.join(root, ASCMHL_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    generation = next_generation(root)
+    now = datetime.now(timezone.utc)
+    root_name = os.path.basename(os.path.normpath(root))
+    manifest_name = f"{generation:04d}_{root_name}_{now.strftime('%Y-%m-%d_%H%M%SZ')}.mhl"
+    creation_date = iso_date()
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<hashlist version="2.0" xmlns="{ASCMHL_NAMESPACE}">',
+        "  <creatorinfo>",
+        f"    <creationdate>{creation_date}</creationdate>",
+        f"    <hostname>{escape(socket.gethostname())}</hostname>",
+        f'    <tool version="{TOOL_VERSION}">{TOOL_NAME}</tool>',
+        "  </creatorinfo>",
+        "  <processinfo>",
+        f"    <process>{process}</process>",
+        "    <ignore>",
+        "      <pattern>.DS_Store</pattern>",
+        f"      <pattern>{ASCMHL_FOLDER}</pattern>",
+        "    </ignore>",
+        "  </processinfo>",
+        "  <hashes>",
+    ]
+    for rel_path, size, mtime, digest in sorted(entries):
+        path_attrs = f'size="{size}" lastmodificationdate="{iso_date(mtime)}"'
+        lines.append("    <hash>")
+        lines.append(f"      <path {path_attrs}>{escape(manifest_path(rel_path))}</path>")
+        lines.append(f'      <{algorithm} action="original" hashdate="{creation_date}">{digest}</{algorithm}>')
+        lines.append("    </hash>")
+    lines.append("  </hashes>")
+    lines.append("</hashlist>")
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+
+    manifest_file = os.path.join(folder, manifest_name)
+    with open(manifest_file, "wb") as f:
+        f.write(data)
+    append_chain_entry(folder, generation, manifest_name, c4_id(data))
+    return manifest_file
+
+
+def append_chain_entry(folder, generation, manifest_name, c4):
+    chain_file = os.path.join(folder, ASCMHL_CHAIN)
+    existing = []
+    if os.path.exists(chain_file):
+        try:
+            tree = ET.parse(chain_file)
+            for hashlist in tree.getroot():
+                fields = {child.tag.split("}")[-1]: (child.text or "") for child in hashlist}
+                existing.append((hashlist.get("sequencenr"), fields.get("path", ""), fields.get("c4", "")))
+        except ET.ParseError:
+            existing = []
+    existing.append((str(generation), manifest_name, c4))
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<ascmhldirectory xmlns="{ASCMHL_DIRECTORY_NAMESPACE}">',
+    ]
+    for sequence, path, digest in existing:
+        lines.append(f"  <hashlist sequencenr={quoteattr(str(sequence))}>")
+        lines.append(f"    <path>{escape(path)}</path>")
+        lines.append(f"    <c4>{escape(digest)}</c4>")
+        lines.append("  </hashlist>")
+    lines.append("</ascmhldirectory>")
+    with open(chain_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _local_name(tag):
+    return tag.split("}")[-1]
+
+
+def manifest_base(manifest_file):
+    """Folder a manifest's paths are relative to: the parent of ascmhl/, or the manifest's own folder."""
+    folder = os.path.dirname(os.path.abspath(manifest_file))
+    if os.path.basename(folder) == ASCMHL_FOLDER:
+        return os.path.dirname(folder)
+    return folder
+
+
+def parse_mhl(manifest_file):
+    """
+    Yield a ManifestHash for each file listed in a legacy MHL or ASC-MHL
+    manifest, using the fastest hash this machine can compute. Files with no
+    hash it can compute are yielded with algorithm and digest set to None.
+    Paths are relative to manifest_base and use the platform separator.
+    """
+    for _event, elem in ET.iterparse(manifest_file):
+        if _local_name(elem.tag) != "hash":
+            continue
+        path = None
+        size = None
+        hashes = {}
+        for child in elem:
+            tag = _local_name(child.tag)
+            if tag in ("path", "file"):
+                path = (child.text or "").strip()
+                size = child.get("size", size)
+            elif tag == "size":
+                size = child.text
+            elif tag in MANIFEST_ALGORITHMS and child.text:
+                digest = child.text.strip()
+                # C4 IDs are base58 and case sensitive; the rest are hex
+                hashes.setdefault(MANIFEST_ALGORITHMS[tag], digest if tag == "c4" else digest.lower())
+        elem.clear()
+        if not path:
+            continue
+        algorithm = next((name for name in VERIFY_ALGORITHMS if name in hashes and can_hash(name)), None)
+        try:
+            size = int(size) if size is not None else None
+        except ValueError:
+            size = None
+        yield ManifestHash(os.path.normpath(path.replace("/", os.sep)), size, algorithm, hashes.get(algorithm))
+
+
+def load_manifest_hashes(root, manifest_files):
+    """
+    Merge manifests found under root into {rel_path: (algorithm, digest)} with
+    paths relative to root; files listed without a usable hash map to
+    (None, None). Legacy manifests are read first and ASC-MHL generations in
+    order, so the newest record for a file wins.
+    """
+    root = os.path.abspath(root)
+    ordered = sorted(manifest_files, key=lambda f: (os.path.basename(os.path.dirname(f)) == ASCMHL_FOLDER, f))
+    hashes = {}
+    for manifest_file in ordered:
+        base = os.path.relpath(manifest_base(manifest_file), root)
+        try:
+            for entry in parse_mhl(manifest_file):
+                rel_path = entry.path if base == "." else os.path.normpath(os.path.join(base, entry.path))
+                hashes[rel_path] = (entry.algorithm, entry.digest)
+        except (OSError, ET.ParseError):
+            continue
+    return hashes
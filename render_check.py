@@ -1,8 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import re
 from datetime import datetime
+from log_view import LogView
+from render_engine import camera_original_names, transcode_names
+from traversal import TraversalStats
 
 class RenderCheckFrame(ttk.Frame):
     def __init__(self, parent):
@@ -17,9 +19,7 @@ class RenderCheckFrame(ttk.Frame):
         self.enable_logging_2 = tk.BooleanVar(value=False)
         # Logging directory and shared paths
         self.render_check_path = os.path.expanduser("~/Library/RenderCheck")
-        self.log_path = os.path.expanduser("~/Desktop/RenderCheckLogs")
-        os.makedirs(self.render_check_path, exist_ok=True)
-        os.makedirs(self.log_path, exist_ok=True)
+        self.log_path = os.path.expanduser("~/Desktop/RenderCheckLogs")  # Created on first log write
         self.create_gui()
     
     def create_gui(self):
@@ -107,7 +107,7 @@ class RenderCheckFrame(ttk.Frame):
         status_frame.pack(fill="both", expand=True)
         scrollbar = ttk.Scrollbar(status_frame)
         scrollbar.pack(side="right", fill="y")
-        self.results_text = tk.Text(status_frame, height=10, width=80, bg="black", fg="white")
+        self.results_text = LogView(status_frame, height=10, width=80, bg="black", fg="white")
         self.results_text.pack(side="left", fill="both", expand=True)
         self.results_text.config(yscrollcommand=scrollbar.set)
         scrollbar.config(command=self.results_text.yview)
@@ -139,48 +139,16 @@ class RenderCheckFrame(ttk.Frame):
     def write_to_log(self, message, enable_logging_flag):
         if enable_logging_flag:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            os.makedirs(self.log_path, exist_ok=True)
             log_file = os.path.join(self.log_path, f"RenderCheck_Log_{timestamp}.txt")
             with open(log_file, 'a') as f:
                 f.write(f"{message}\n")
     
-    def process_camera_originals(self, folder_path):
-        file_list = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if any(file.lower().endswith(ext) for ext in ('.mov', '.mxf', '.rdc', '.cine', '.mp4', '.ari', '.arx', '.dng')):
-                    file_list.append(os.path.join(root, file))
-        processed_names = set()
-        for file_path in file_list:
-            filename = os.path.basename(file_path)
-            name = re.sub(r'\.(MXF|mxf|mov|MOV|RDC|cine|mp4|MP4|ari|arx|dng|DNG)$', '', filename)
-            if any(x in name for x in ('Cine', 'Blackmagic', '_201')):
-                processed_name = name
-            else:
-                processed_name = name[:10]
-            processed_name = re.sub(r'_[0-9A-Z]$', '', processed_name)
-            processed_name = re.sub(r'_$', '', processed_name)
-            processed_names.add(processed_name)
-        return processed_names
+    def process_camera_originals(self, folder_path, stats=None):
+        return camera_original_names(folder_path, stats)
     
-    def process_transcodes(self, folder_path):
-        file_list = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if file.lower().endswith(('.mov', '.mxf')):
-                    if not re.search(r'_A\d+\.mxf$', file):
-                        file_list.append(os.path.join(root, file))
-        processed_names = set()
-        for file_path in file_list:
-            filename = os.path.basename(file_path)
-            name = re.sub(r'\.(mxf|mov)$', '', filename)
-            if any(x in name for x in ('Cine', 'Blackmagic', '_201')):
-                processed_name = name
-            else:
-                processed_name = name[:10]
-            processed_name = re.sub(r'_[0-9A-Z]$', '', processed_name)
-            processed_name = re.sub(r'_$', '', processed_name)
-            processed_names.add(processed_name)
-        return processed_names
+    def process_transcodes(self, folder_path, stats=None):
+        return transcode_names(folder_path, stats)
     
     def run_comparison_1(self):
         self.results_text.insert(tk.END, "\n===== Render Check 1 =====\n")
@@ -200,13 +168,17 @@ class RenderCheckFrame(ttk.Frame):
             self.results_text.insert(tk.END, msg)
             return
         
-        originals = self.process_camera_originals(originals_path)
-        transcodes = self.process_transcodes(transcodes_path)
+        originals_stats = TraversalStats(originals_path)
+        transcodes_stats = TraversalStats(transcodes_path)
+        originals = self.process_camera_originals(originals_path, originals_stats)
+        transcodes = self.process_transcodes(transcodes_path, transcodes_stats)
         
         msg_info = (
             f"Camera Originals Directory: {originals_path}\n"
             f"Transcodes Directory: {transcodes_path}\n"
             f"Found {len(originals)} original files\n"
+            f"Scanned {originals_stats.summary()}\n"
+            f"Scanned {transcodes_stats.summary()}\n"
         )
         self.results_text.insert(tk.END, msg_info)
         self.write_to_log(msg_info, enable_logging_flag)
@@ -0,0 +1,53 @@
+import re
+
+import traversal
+
+ORIGINAL_EXTENSIONS = ('.mov', '.mxf', '.rdc', '.cine', '.mp4', '.ari', '.arx', '.dng')
+TRANSCODE_EXTENSIONS = ('.mov', '.mxf')
+
+
+def clip_name(name):
+    """Reduce a file name (without extension) to the clip name both sides are matched on."""
+    if any(x in name for x in ('Cine', 'Blackmagic', '_201')):
+        processed_name = name
+    else:
+        processed_name = name[:10]
+    processed_name = re.sub(r'_[0-9A-Z]$', '', processed_name)
+    processed_name = re.sub(r'_$', '', processed_name)
+    return processed_name
+
+
+def camera_original_names(folder_path, stats=None):
+    processed_names = set()
+    filters = traversal.TraversalFilter(extensions=ORIGINAL_EXTENSIONS)
+    for _root, _, files, _ in traversal.walk(folder_path, filters, use_cache=True, ordered=False, stats=stats):
+        for file in (info.name for info in files):
+            name = re.sub(r'\.(MXF|mxf|mov|MOV|RDC|cine|mp4|MP4|ari|arx|dng|DNG)$', '', file)
+            processed_names.add(clip_name(name))
+    return processed_names
+
+
+def transcode_names(folder_path, stats=None):
+    processed_names = set()
+    filters = traversal.TraversalFilter(extensions=TRANSCODE_EXTENSIONS)
+    for _root, _, files, _ in traversal.walk(folder_path, filters, use_cache=True, ordered=False, stats=stats):
+        for file in (info.name for info in files):
+            # Skip audio-only MXF tracks (_A1.mxf, _A2.mxf, ...)
+            if not re.search(r'_A\d+\.mxf$', file):
+                name = re.sub(r'\.(mxf|mov)$', '', file)
+                processed_names.add(clip_name(name))
+    return processed_names
+
+
+def check_render(originals_path, transcodes_path, stats=None):
+    """
+    Return (originals, missing_in_transcodes, extra_in_transcodes) as sets of
+    clip names. stats, if given, gets one TraversalStats per folder.
+    """
+    originals_stats = traversal.TraversalStats(originals_path)
+    transcodes_stats = traversal.TraversalStats(transcodes_path)
+    originals = camera_original_names(originals_path, originals_stats)
+    transcodes = transcode_names(transcodes_path, transcodes_stats)
+    if stats is not None:
+        stats.extend([originals_stats, transcodes_stats])
+    return originals, originals - transcodes, transcodes - originals
@@ -0,0 +1,109 @@
+import codecs
+import re
+from collections import namedtuple
+
+# Prefix used with --out-format so file lines can't be confused with rsync's own output
+FILE_MARKER = "DIT|"
+OUT_FORMAT = f"--out-format={FILE_MARKER}%l|%n"
+
+FileStarted = namedtuple("FileStarted", "name size")
+Progress = namedtuple("Progress", "bytes percent rate eta transfers to_check total")
+FileDone = namedtuple("FileDone", "transfers")
+Summary = namedtuple("Summary", "sent received total_size text")
+Message = namedtuple("Message", "text")
+
+# Matches both --info=progress2 (whole transfer) and legacy --progress (per file) lines:
+#   1,234,567  45%   12.34MB/s    0:00:10 (xfr#12, to-chk=100/200)
+PROGRESS_RE = re.compile(
+    r"^\s*([\d,.]+)\s+(\d+)%\s+(\S+/s)\s+(\d+:\d{2}:\d{2})"
+    r"(?:\s+\((?:xfe?r#(\d+),\s*)?(?:ir|to)-che?c?k=(\d+)/(\d+)\))?"
+)
+SENT_RE = re.compile(r"^sent ([\d,.]+) bytes\s+received ([\d,.]+) bytes")
+TOTAL_RE = re.compile(r"^total size is ([\d,.]+)")
+
+
+def _number(text):
+    return int(text.replace(",", "").replace(".", ""))
+
+
+def supports_progress2(major, minor):
+    return (major, minor) >= (3, 1)
+
+
+def structured_command(command, progress2):
+    """
+    Rewrite an rsync command so its output follows the structured protocol:
+    one marked line per file (--out-format) plus --info=progress2 when available.
+    """
+    result = []
+    for arg in command:
+        if arg == "--progress" and progress2:
+            result.append("--info=progress2")
+        else:
+            result.append(arg)
+    # Options must come before the source/destination operands
+    result.insert(len(result) - 2, OUT_FORMAT)
+    return result
+
+
+class RsyncProgressParser:
+    """
+    Incremental parser for rsync stdout. Feed raw bytes as they arrive and get
+    back typed events; lines are split on both '\\r' and '\\n' because rsync
+    redraws progress lines in place.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self.transfers = 0
+
+    def feed(self, data):
+        text = self._pending + self._decoder.decode(data)
+        parts = re.split(r"[\r\n]", text)
+        self._pending = parts.pop()
+        events = []
+        for line in parts:
+            if line.strip():
+                events.extend(self.parse_line(line))
+        return events
+
+    def close(self):
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        return self.parse_line(text) if text.strip() else []
+
+    def parse_line(self, line):
+        if line.startswith(FILE_MARKER):
+            size, _, name = line[len(FILE_MARKER):].partition("|")
+            try:
+                size = int(size)
+            except ValueError:
+                size = 0
+            return [FileStarted(name, size)]
+
+        match = PROGRESS_RE.match(line)
+        if match:
+            events = []
+            transfers = int(match.group(5)) if match.group(5) else self.transfers
+            if transfers > self.transfers:
+                events.append(FileDone(transfers))
+                self.transfers = transfers
+            events.insert(0, Progress(
+                bytes=_number(match.group(1)),
+                percent=int(match.group(2)),
+                rate=match.group(3),
+                eta=match.group(4),
+                transfers=transfers,
+                to_check=int(match.group(6)) if match.group(6) else None,
+                total=int(match.group(7)) if match.group(7) else None,
+            ))
+            return events
+
+        match = SENT_RE.match(line)
+        if match:
+            return [Summary(_number(match.group(1)), _number(match.group(2)), None, line)]
+        match = TOTAL_RE.match(line)
+        if match:
+            return [Summary(None, None, _number(match.group(1)), line)]
+        return [Message(line)]
@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import namedtuple
+
+from app_paths import app_support_dir
+
+CachedFile = namedtuple("CachedFile", "name size mtime ctime inode")
+
+DB_NAME = "scan_cache.sqlite3"
+COMMIT_INTERVAL = 1.0
+
+# Entry kinds: d = directory, f = regular file, s = symlink to a file,
+# l = any other symlink (dangling or pointing at a directory)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    device INTEGER,
+    inode INTEGER,
+    mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    dir_path TEXT,
+    name TEXT,
+    kind TEXT,
+    size INTEGER,
+    mtime REAL,
+    ctime REAL,
+    inode INTEGER,
+    PRIMARY KEY (dir_path, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT,
+    algorithm TEXT,
+    size INTEGER,
+    mtime REAL,
+    digest TEXT,
+    PRIMARY KEY (path, algorithm)
+) WITHOUT ROWID;
+"""
+
+
+def list_directory(path):
+    """
+    List one directory with os.scandir and a single stat per entry.
+    Returns (subdirs, files, links, rows) where files are CachedFile tuples and
+    links names every symlink; symlinks to files also appear in files, as they
+    would with os.walk + os.path.getsize.
+    """
+    subdirs = []
+    files = []
+    links = []
+    rows = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    rows.append((entry.name, "d", None, None, None, None))
+                    continue
+                if entry.is_symlink():
+                    links.append(entry.name)
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        st = None
+                    if st is None or stat.S_ISDIR(st.st_mode):
+                        rows.append((entry.name, "l", None, None, None, None))
+                        continue
+                    kind = "s"
+                else:
+                    st = entry.stat(follow_symlinks=False)
+                    kind = "f"
+            except OSError:
+                continue
+            info = CachedFile(entry.name, st.st_size, st.st_mtime, st.st_ctime, st.st_ino)
+            files.append(info)
+            rows.append((entry.name, kind, info.size, info.mtime, info.ctime, info.inode))
+    return subdirs, files, links, rows
+
+
+class ScanCache:
+    """
+    On-disk (SQLite) cache of directory listings with size, mtime, ctime and
+    inode per entry. A directory is trusted as long as its device, inode and
+    mtime are unchanged, so a rescan of an unchanged volume costs one stat per
+    directory instead of one per file. Files rewritten in place without any
+    entry being added, removed or renamed in their directory are not noticed.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(app_support_dir(), DB_NAME)
+        conn = self.connect()
+        try:
+            conn.executescript(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def lookup(self, conn, path, st):
+        row = conn.execute("SELECT device, inode, mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row != (st.st_dev, st.st_ino, st.st_mtime_ns):
+            return None
+        subdirs = []
+        files = []
+        links = []
+        for name, kind, size, mtime, ctime, inode in conn.execute(
+                "SELECT name, kind, size, mtime, ctime, inode FROM entries WHERE dir_path = ?", (path,)):
+            if kind == "d":
+                subdirs.append(name)
+                continue
+            if kind in ("s", "l"):
+                links.append(name)
+            if kind in ("f", "s"):
+                files.append(CachedFile(name, size, mtime, ctime, inode))
+        return subdirs, files, links
+
+    def store(self, conn, path, st, subdirs, rows):
+        previous = {name for (name,) in conn.execute(
+            "SELECT name FROM entries WHERE dir_path = ? AND kind = 'd'", (path,))}
+        for name in previous.difference(subdirs):
+            self.forget_tree(conn, os.path.join(path, name))
+        conn.execute("DELETE FROM entries WHERE dir_path = ?", (path,))
+        conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         [(path,) + row for row in rows])
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                     (path, st.st_dev, st.st_ino, st.st_mtime_ns))
+
+    def forget_tree(self, conn, path):
+        # Everything under path sorts between "path/" and "path0" ('0' follows '/')
+        low, high = path + os.sep, path + chr(ord(os.sep) + 1)
+        conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        conn.execute("DELETE FROM entries WHERE dir_path = ? OR (dir_path >= ? AND dir_path < ?)", (path, low, high))
+
+
+class HashCache:
+    """
+    Content digests keyed by absolute path and algorithm. A digest is reused
+    only while the file's size and mtime still match the values it was
+    computed for. Safe to share between hashing threads.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(app_support_dir(), DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._last_commit = time.time()
+
+    def lookup(self, path, algorithm, size, mtime):
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime, digest FROM hashes WHERE path = ? AND algorithm = ?",
+                                     (path, algorithm)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime:
+            return None
+        return row[2]
+
+    def store(self, path, algorithm, size, mtime, digest):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                               (path, algorithm, size, mtime, digest))
+            if time.time() - self._last_commit >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._last_commit = time.time()
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._last_commit = time.time()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = ScanCache()
+            except (OSError, sqlite3.Error):
+                _shared_cache = False
+    return _shared_cache or None
+
+
+_shared_hash_cache = None
+
+
+def shared_hash_cache():
+    global _shared_hash_cache
+    with _shared_lock:
+        if _shared_hash_cache is None:
+            try:
+                _shared_hash_cache = HashCache()
+            except (OSError, sqlite3.Error):
+                _shared_hash_cache = False
+    return _shared_hash_cache or None
@@ -0,0 +1,88 @@
+import os
+
+
+class DestinationSizeWatcher:
+    """
+    Tracks how many bytes have landed under a destination tree without
+    rescanning it. A directory is only re-listed when its mtime changes, and
+    only files that may still be growing are stat'ed again: an external copier
+    like cp writes files one after another, so once newer files appear the
+    previous ones are finished and their size is final.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.settled_bytes = 0
+        self._dir_mtimes = {}
+        self._dir_children = {}
+        self._seen = set()
+        self._active = {}
+        self._untouched = {}  # files there before the copy -> (size, mtime_ns)
+
+    def baseline(self):
+        """
+        Record what is already under root; call before the copy starts. Those
+        files only count once the copier rewrites them, so a re-sync starts at zero.
+        """
+        for path in self._new_files():
+            st = self._stat(path)
+            if st is not None:
+                self._untouched[path] = (st.st_size, st.st_mtime_ns)
+
+    def poll(self):
+        new_files = self._new_files()
+        # Files overwritten in place keep their directory's mtime, so they are checked one by one
+        for path, before in list(self._untouched.items()):
+            st = self._stat(path)
+            if st is not None and (st.st_size, st.st_mtime_ns) != before:
+                del self._untouched[path]
+                new_files.append(path)
+
+        if new_files:
+            # Newer files exist, so everything still marked active is complete:
+            # take its final size once and stop watching it.
+            for path in self._active:
+                self.settled_bytes += self._size_of(path)
+            self._active = {path: 0 for path in new_files}
+        for path in self._active:
+            self._active[path] = self._size_of(path)
+        return self.settled_bytes + sum(self._active.values())
+
+    def _new_files(self):
+        new_files = []
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if self._dir_mtimes.get(path) != mtime:
+                self._dir_mtimes[path] = mtime
+                subdirs = []
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.path)
+                                elif entry.path not in self._seen:
+                                    self._seen.add(entry.path)
+                                    new_files.append(entry.path)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+                self._dir_children[path] = subdirs
+            stack.extend(self._dir_children.get(path, ()))
+        return new_files
+
+    def _stat(self, path):
+        try:
+            return os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+
+    def _size_of(self, path):
+        st = self._stat(path)
+        return st.st_size if st is not None else 0
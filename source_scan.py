@@ -0,0 +1,47 @@
+import os
+
+from traversal import walk
+
+
+class SourceScan:
+    """
+    Result of one pass over a sync source: every directory, regular file and
+    symlink with the totals needed for progress. Built once per sync and shared
+    by all destination workers.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.normpath(root)
+        self.dirs = []
+        self.files = []  # (rel_path, size, mtime), sorted by path
+        self.links = []
+        self.total_bytes = 0
+        self.complete = True
+
+    @property
+    def file_count(self):
+        return len(self.files)
+
+
+def scan_source(source, cancel_event=None, use_cache=False):
+    """Walk the source once, collecting sizes and mtimes from a single stat per entry."""
+    scan = SourceScan(source)
+    root = os.path.abspath(source)
+    prefix_len = len(root.rstrip(os.sep)) + 1
+    for dirpath, _subdirs, files, links in walk(root, use_cache=use_cache, cancel_event=cancel_event, ordered=False):
+        rel_dir = dirpath[prefix_len:] if dirpath != root else ""
+        scan.dirs.append(rel_dir)
+        link_names = set(links)
+        for name in links:
+            scan.links.append(os.path.join(rel_dir, name))
+        for info in files:
+            if info.name in link_names:
+                continue
+            scan.files.append((os.path.join(rel_dir, info.name), info.size, info.mtime))
+            scan.total_bytes += info.size
+    if cancel_event is not None and cancel_event.is_set():
+        scan.complete = False
+    # Path order keeps each clip's files together and matches rsync's transfer order
+    scan.files.sort()
+    scan.dirs.sort()
+    return scan
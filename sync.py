@@ -1,10 +1,34 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import subprocess, os, threading, re, queue, math
+import subprocess, os, threading, re, queue, math, time
 from datetime import datetime, timedelta
 import json
+from copy_engine import FanOutCopier, copy_target_root
+from devices import DeviceScheduler, ThroughputMeter
+from checksums import ALGORITHMS, resolve_algorithm
+from mhl import write_ascmhl_generation, write_flat_manifest
+from rsync_progress import (RsyncProgressParser, FileStarted, Progress, FileDone,
+                            supports_progress2, structured_command)
+from log_view import LogView
+from log_writer import BufferedLogWriter, BatchedQueueWriter, UIQueue
+from size_watcher import DestinationSizeWatcher
+from source_scan import scan_source
+from transfer_journal import shared_journal
+from sync_jobs import JobQueue, JobScheduler, SyncJob, PRIORITIES, QUEUED, RUNNING, CANCELLED, run_job
 # Note: For XXH64 checksum functionality, install the xxhash module: pip install xxhash
 
+# Output polling: drain at most POLL_BATCH_LINES per tick, poll quickly while
+# output is flowing, back off when quiet and stop entirely once idle (the next
+# put wakes it up again).
+POLL_BATCH_LINES = 500
+POLL_BACKLOG_MS = 10
+POLL_BUSY_MS = 50
+POLL_IDLE_MS = 500
+POLL_IDLE_TICKS = 4
+
+# Aggregate copy throughput is logged this often while any stream is running
+THROUGHPUT_LOG_MS = 10000
+
 def transform_imported_settings(settings, current_module="sync"):
     """
     For this update we no longer modify the directory paths.
@@ -15,7 +39,13 @@ def transform_imported_settings(settings, current_module="sync"):
 class NewSyncFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
-        self.out_queue = queue.Queue()
+        self.out_queue = UIQueue()
+        self.out_queue.on_put = self.wake_poll
+        self._poll_lock = threading.Lock()
+        self._poll_scheduled = True
+        self._idle_ticks = 0
+        # Output pipeline instrumentation, shown under the output window while a sync runs
+        self.queue_stats = {"depth": 0, "peak_depth": 0, "ui_lag": 0.0, "max_ui_lag": 0.0, "lines": 0}
         self.global_logging_enabled = tk.BooleanVar(value=False)
         self.logging_dest_enabled = tk.BooleanVar(value=False)
         self.simultaneous_sync_enabled = tk.BooleanVar(value=True)
@@ -23,11 +53,30 @@ class NewSyncFrame(ttk.Frame):
         self.use_higher_process_priority = tk.BooleanVar(value=True)
         self.use_native_cp = tk.BooleanVar(value=False)  # Use native cp command instead of rsync
         self.use_xxh64_checksum = tk.BooleanVar(value=False)  # XXH64 checksum option, disabled by default
+        self.use_copy_engine = tk.BooleanVar(value=False)  # Built-in engine: one source read fanned out to every destination
+        self.checksum_algorithm = tk.StringVar(value="xxh64")  # Inline verification hash used by the built-in engine
+        self.manifest_format = tk.StringVar(value="None")  # "None", "ASC-MHL" or "Flat Manifest"
         self.global_log_dir = tk.StringVar(value="")
+        self.streams_per_device = tk.IntVar(value=1)  # Concurrent copy streams allowed on one physical disk
+        # Shared by Sync Option 1 and 2 so two syncs off the same card or onto the same RAID take turns
+        self.io_scheduler = DeviceScheduler()
+        self.throughput = ThroughputMeter()
+        self._throughput_busy_since = None
         self.sync1_cancel_event = threading.Event()
         self.sync2_cancel_event = threading.Event()
+        # Job queue: any number of source -> destinations jobs run by the built-in engine
+        self.job_queue = JobQueue()
+        self.job_scheduler = JobScheduler(self.job_queue, on_update=self.on_job_update, runner=self.run_queue_job)
+        self.job_priority = tk.StringVar(value="Normal")
+        self.job_device_limit = tk.IntVar(value=1)
+        self._jobs_lock = threading.Lock()
+        self._jobs_refresh_scheduled = False
         self.create_widgets()
+        self.refresh_job_list()
+        if self.job_queue.resumed:
+            self.out_queue.put(f"{self.job_queue.resumed} interrupted queue jobs will resume when the queue is started.\n")
         self.after(100, self.poll_queue)
+        self.after(THROUGHPUT_LOG_MS, self.log_throughput)
     
     def format_size(self, size_bytes):
         """Format bytes to human-readable size"""
@@ -39,15 +88,101 @@ class NewSyncFrame(ttk.Frame):
         s = round(size_bytes / p, 2)
         return f"{s} {size_names[i]}"
 
+    def build_progress_status(self, bytes_done, total_size, start_time, max_percent=100):
+        """Build the 'In Progress (x%) - done/total - speed - ETA' status string"""
+        if total_size <= 0:
+            return f"In Progress - {self.format_size(bytes_done)}"
+        elapsed = time.time() - start_time
+        progress = min(int((bytes_done / total_size) * 100), max_percent)
+        if elapsed <= 0:
+            return f"In Progress ({progress}%) - {self.format_size(bytes_done)}/{self.format_size(total_size)}"
+        speed_bps = bytes_done / elapsed
+        speed_str = self.format_size(speed_bps) + "/s"
+        if speed_bps > 0 and progress < max_percent:
+            eta_seconds = (total_size - bytes_done) / speed_bps
+            eta_str = str(timedelta(seconds=int(eta_seconds)))
+            return f"In Progress ({progress}%) - {self.format_size(bytes_done)}/{self.format_size(total_size)} - {speed_str} - ETA: {eta_str}"
+        return f"In Progress ({progress}%) - {self.format_size(bytes_done)}/{self.format_size(total_size)} - {speed_str}"
+
     def poll_queue(self):
+        lines = []
+        oldest = None
         try:
-            while True:
-                line = self.out_queue.get_nowait()
-                self.output_window.insert(tk.END, line)
-                self.output_window.see(tk.END)
+            while len(lines) < POLL_BATCH_LINES:
+                queued_at, line = self.out_queue.get_nowait()
+                if oldest is None:
+                    oldest = queued_at
+                lines.append(line)
         except queue.Empty:
             pass
-        self.after(100, self.poll_queue)
+        depth = self.out_queue.qsize()
+        stats = self.queue_stats
+        stats["depth"] = depth
+        stats["peak_depth"] = max(stats["peak_depth"], depth + len(lines))
+        if lines:
+            self.output_window.insert(tk.END, "".join(lines))
+            stats["lines"] += len(lines)
+            stats["ui_lag"] = time.monotonic() - oldest
+            stats["max_ui_lag"] = max(stats["max_ui_lag"], stats["ui_lag"])
+            self._idle_ticks = 0
+            self.update_queue_stats_label()
+        else:
+            self._idle_ticks += 1
+        if depth:
+            delay = POLL_BACKLOG_MS
+        elif lines:
+            delay = POLL_BUSY_MS
+        elif self._idle_ticks <= POLL_IDLE_TICKS:
+            delay = POLL_IDLE_MS
+        else:
+            with self._poll_lock:
+                # Re-check under the lock so a put racing with suspension isn't missed
+                if self.out_queue.empty():
+                    self._poll_scheduled = False
+                    return
+            delay = POLL_BACKLOG_MS
+        self.after(delay, self.poll_queue)
+
+    def wake_poll(self):
+        # Called from whichever thread put output on the queue
+        with self._poll_lock:
+            if self._poll_scheduled:
+                return
+            self._poll_scheduled = True
+        self.after(0, self.poll_queue)
+
+    def log_throughput(self):
+        rate, device_rates = self.throughput.sample()
+        if self.throughput.active:
+            if self._throughput_busy_since is None:
+                self._throughput_busy_since = (time.monotonic(), self.throughput.total_bytes)
+            detail = ", ".join(f"{device} {self.format_size(device_rate)}/s"
+                               for device, device_rate in sorted(device_rates.items(), key=lambda item: str(item[0]))
+                               if device_rate)
+            self.out_queue.put(f"Throughput: {self.format_size(rate)}/s total" + (f" ({detail})\n" if detail else "\n"))
+        elif self._throughput_busy_since is not None:
+            started, start_bytes = self._throughput_busy_since
+            elapsed = max(time.monotonic() - started, 1e-6)
+            moved = self.throughput.total_bytes - start_bytes
+            self.out_queue.put(f"Throughput: {self.format_size(moved)} at {self.format_size(moved / elapsed)}/s average\n")
+            self._throughput_busy_since = None
+        self.after(THROUGHPUT_LOG_MS, self.log_throughput)
+
+    def acquire_device_slot(self, source, dests, scan, cancel_event, sync_status_list, indices, status_box):
+        """Wait for room on every disk the copy touches. Returns the claim, or None if cancelled."""
+        if self.io_scheduler.busy([source] + dests):
+            self.out_queue.put(f"Waiting for a free drive slot: {source} -> {', '.join(dests)}\n")
+            for i in indices:
+                self.update_sync_status(sync_status_list, i, "Waiting for drive", status_box)
+        # Destinations of one sync share the source read slot (they read the same files in step)
+        return self.io_scheduler.acquire(reads=[source], writes=dests, group=scan, cancel_event=cancel_event)
+
+    def update_queue_stats_label(self):
+        stats = self.queue_stats
+        self.queue_stats_label.config(
+            text=f"Output queue: {stats['depth']} pending (peak {stats['peak_depth']}) | "
+                 f"UI lag: {stats['ui_lag'] * 1000:.0f} ms (max {stats['max_ui_lag'] * 1000:.0f} ms)"
+        )
 
     def refresh_status_box(self, status_list, status_box):
         status_box.config(state=tk.NORMAL)
@@ -72,8 +207,17 @@ class NewSyncFrame(ttk.Frame):
         if directory:
             self.global_log_dir.set(directory)
 
+    def prescan_source(self, source, cancel_event=None):
+        # One scandir pass per source; every destination worker reuses the result.
+        # Never from the scan cache: a file rewritten in place doesn't change its
+        # folder's mtime, and a stale size/mtime would make the copy skip it.
+        self.out_queue.put("Calculating total size...\n")
+        scan = scan_source(source, cancel_event)
+        self.out_queue.put(f"Total transfer size: {self.format_size(scan.total_bytes)} in {scan.file_count} files\n")
+        return scan
+
     def run_sync_for_dest(self, source, dest, global_log_file, global_log_lock,
-                          sync_status_list, index, status_box, cancel_event):
+                          sync_status_list, index, status_box, cancel_event, scan=None):
         import time
         
         # Ensure we start with a clean state
@@ -115,46 +259,9 @@ class NewSyncFrame(ttk.Frame):
             self.out_queue.put(f"Sync cancelled for {dest}\n")
             return
         
-        self.out_queue.put("Calculating total size...\n")
-        try:
-            if os.name == 'posix':
-                du_command = ["du", "-sk", source]
-                du_process = subprocess.Popen(du_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                du_output, _ = du_process.communicate()
-                if du_process.returncode == 0:
-                    size_kb = int(du_output.split()[0])
-                    total_size = size_kb * 1024
-                    find_command = ["find", source, "-type", "f", "|", "wc", "-l"]
-                    find_process = subprocess.Popen(" ".join(find_command), shell=True, stdout=subprocess.PIPE, text=True)
-                    find_output, _ = find_process.communicate()
-                    total_files = int(find_output.strip())
-                    self.out_queue.put(f"Total transfer size: {self.format_size(total_size)} in approximately {total_files} files\n")
-                else:
-                    raise Exception("du command failed")
-            else:
-                size_command = ["rsync", "--stats", "--dry-run", "-a", source, dest]
-                size_process = subprocess.Popen(size_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                total_size = 0
-                total_files = 0
-                for line in size_process.stdout:
-                    if "Total file size:" in line:
-                        size_match = re.search(r'Total file size: ([\d,]+) bytes', line)
-                        if size_match:
-                            total_size = int(size_match.group(1).replace(',', ''))
-                    if "Number of files:" in line:
-                        files_match = re.search(r'Number of files: ([\d,]+)', line)
-                        if files_match:
-                            total_files = int(files_match.group(1).replace(',', ''))
-                size_process.wait()
-                if total_size > 0:
-                    self.out_queue.put(f"Total transfer size: {self.format_size(total_size)} in {total_files} files\n")
-                else:
-                    raise Exception("Could not parse rsync --stats output")
-        except Exception as e:
-            self.out_queue.put(f"Could not calculate total size accurately: {e}\n")
-            self.out_queue.put("Will estimate progress based on individual file transfers instead.\n")
-            total_size = 0
-            total_files = 0
+        if scan is None:
+            scan = self.prescan_source(source, cancel_event)
+        total_size = scan.total_bytes
         
         if self.use_native_cp.get() and os.name == 'posix':
             command = ["cp", "-R", source, dest]
@@ -162,6 +269,7 @@ class NewSyncFrame(ttk.Frame):
             using_rsync = False
         else:
             using_rsync = True
+            progress2 = False
             try:
                 version_process = subprocess.Popen(["rsync", "--version"], stdout=subprocess.PIPE, text=True)
                 version_output = version_process.stdout.readline()
@@ -171,6 +279,8 @@ class NewSyncFrame(ttk.Frame):
                     
                     # Check if rsync supports XXH64 checksum (3.2.0+)
                     supports_xxh64 = (major > 3) or (major == 3 and minor >= 2)
+                    # rsync 3.1.0+ can report whole-transfer progress with --info=progress2
+                    progress2 = supports_progress2(major, minor)
                     
                     if major >= 3:
                         if self.fast_sync_enabled.get():
@@ -231,6 +341,7 @@ class NewSyncFrame(ttk.Frame):
             except Exception as e:
                 self.out_queue.put(f"Error detecting rsync version: {e}. Using basic command...\n")
                 command = ["rsync", "-a", "--progress", source, dest]
+            command = structured_command(command, progress2)
         
         if self.use_higher_process_priority.get() and os.name == 'posix':
             try:
@@ -245,14 +356,30 @@ class NewSyncFrame(ttk.Frame):
             except Exception as e:
                 self.out_queue.put(f"Could not adjust process priority: {e}. Continuing without priority adjustment.\n")
         
+        claim = self.acquire_device_slot(source, [dest], scan, cancel_event, sync_status_list, [index], status_box)
+        if claim is None:
+            self.update_sync_status(sync_status_list, index, "Cancelled", status_box)
+            self.out_queue.put(f"Sync cancelled for {dest}\n")
+            if dest_log_file:
+                dest_log_file.close()
+            return
+        stream = self.throughput.start(dest)
+        self.update_sync_status(sync_status_list, index, "In Progress", status_box)
         start_time = time.time()
         bytes_transferred = 0
         last_update_time = start_time
         
         try:
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            native_cp = self.use_native_cp.get() and os.name == 'posix'
+            if native_cp:
+                # Counts bytes under the copy's own target folder incrementally instead of running du;
+                # whatever is there before cp starts is left out
+                watcher = DestinationSizeWatcher(copy_target_root(source, dest))
+                watcher.baseline()
+            # rsync output is read as raw bytes and handed to the progress parser in chunks
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=not using_rsync)
             
-            if self.use_native_cp.get() and os.name == 'posix':
+            if native_cp:
                 self.update_sync_status(sync_status_list, index, "In Progress - Using native CP command", status_box)
                 while process.poll() is None:
                     if cancel_event.is_set():
@@ -270,25 +397,11 @@ class NewSyncFrame(ttk.Frame):
                             current_time = time.time()
                             if current_time - last_update_time >= 1.0:
                                 last_update_time = current_time
-                                if os.path.exists(dest):
-                                    du_dest_cmd = ["du", "-sk", dest]
-                                    du_dest_process = subprocess.Popen(du_dest_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                                    du_dest_output, _ = du_dest_process.communicate()
-                                    if du_dest_process.returncode == 0:
-                                        dest_size_kb = int(du_dest_output.split()[0])
-                                        dest_size = dest_size_kb * 1024
-                                        elapsed = current_time - start_time
-                                        speed_bps = dest_size / elapsed if elapsed > 0 else 0
-                                        progress = min(int((dest_size / total_size) * 100), 99)
-                                        speed_str = self.format_size(speed_bps) + "/s"
-                                        if speed_bps > 0 and progress < 99:
-                                            remaining_bytes = total_size - dest_size
-                                            eta_seconds = remaining_bytes / speed_bps
-                                            eta_str = str(timedelta(seconds=int(eta_seconds)))
-                                            status_msg = f"In Progress ({progress}%) - {self.format_size(dest_size)}/{self.format_size(total_size)} - {speed_str} - ETA: {eta_str}"
-                                        else:
-                                            status_msg = f"In Progress ({progress}%) - {self.format_size(dest_size)}/{self.format_size(total_size)} - {speed_str}"
-                                        self.update_sync_status(sync_status_list, index, status_msg, status_box)
+                                dest_size = watcher.poll()
+                                self.throughput.update(stream, dest_size)
+                                # cp gives no completion signal per byte, so hold at 99% until it exits
+                                status_msg = self.build_progress_status(dest_size, total_size, start_time, max_percent=99)
+                                self.update_sync_status(sync_status_list, index, status_msg, status_box)
                         except Exception as e:
                             pass
                     time.sleep(0.5)
@@ -302,6 +415,33 @@ class NewSyncFrame(ttk.Frame):
                     self.update_sync_status(sync_status_list, index, f"Failed (code {process.returncode})", status_box)
                     self.out_queue.put(f"Sync failed for {dest} with code {process.returncode}\n")
             else:
+                parser = RsyncProgressParser()
+                log_writer = BufferedLogWriter([(global_log_file, global_log_lock), (dest_log_file, None)])
+                ui_writer = BatchedQueueWriter(self.out_queue)
+                current_file = ""
+                current_size = 0
+                completed_bytes = 0
+                files_done = 0
+                latest = None
+
+                def handle_event(event):
+                    nonlocal current_file, current_size, completed_bytes, files_done, latest
+                    if isinstance(event, FileStarted):
+                        # Legacy --progress counts bytes per file, so keep a running total
+                        completed_bytes += current_size
+                        current_file, current_size = event.name, event.size
+                        line = event.name + "\n"
+                    elif isinstance(event, Progress):
+                        latest = event
+                        return
+                    elif isinstance(event, FileDone):
+                        files_done = event.transfers
+                        return
+                    else:
+                        line = event.text + "\n"
+                    ui_writer.write(line)
+                    log_writer.write(line)
+
                 while True:
                     if cancel_event.is_set():
                         process.terminate()
@@ -313,55 +453,30 @@ class NewSyncFrame(ttk.Frame):
                         self.update_sync_status(sync_status_list, index, "Cancelled", status_box)
                         self.out_queue.put(f"Sync cancelled for {dest}\n")
                         break
-                    line = process.stdout.readline()
-                    if not line and process.poll() is not None:
+                    data = process.stdout.read1(65536)
+                    if not data:
                         break
-                    if line:
-                        self.out_queue.put(line)
-                    sent_match = re.search(r'sent (\d+,?\d*) bytes', line)
-                    if sent_match and total_size > 0:
-                        sent_bytes = int(sent_match.group(1).replace(',', ''))
-                        if sent_bytes > bytes_transferred:
-                            bytes_transferred = sent_bytes
-                            current_time = time.time()
-                            if current_time - last_update_time >= 1.0:
-                                last_update_time = current_time
-                                elapsed = current_time - start_time
-                                overall_percentage = min(int((bytes_transferred / total_size) * 100), 100)
-                                if elapsed > 0:
-                                    speed_bps = bytes_transferred / elapsed
-                                    speed_str = self.format_size(speed_bps) + "/s"
-                                    if speed_bps > 0 and overall_percentage < 100:
-                                        remaining_bytes = total_size - bytes_transferred
-                                        eta_seconds = remaining_bytes / speed_bps
-                                        eta_str = str(timedelta(seconds=int(eta_seconds)))
-                                        status_msg = f"In Progress ({overall_percentage}%) - {self.format_size(bytes_transferred)}/{self.format_size(total_size)} - {speed_str} - ETA: {eta_str}"
-                                    else:
-                                        status_msg = f"In Progress ({overall_percentage}%) - {self.format_size(bytes_transferred)}/{self.format_size(total_size)} - {speed_str}"
-                                else:
-                                    status_msg = f"In Progress ({overall_percentage}%) - {self.format_size(bytes_transferred)}/{self.format_size(total_size)}"
-                                self.update_sync_status(sync_status_list, index, status_msg, status_box)
-                    match = re.search(r'(\d+)%', line)
-                    if match:
-                        file_progress = int(match.group(1))
-                        file_match = re.search(r'([^\s/]+)$', line.strip())
-                        current_file = file_match.group(1) if file_match else "current file"
-                        if total_size > 0 and bytes_transferred > 0:
-                            overall_percentage = min(int((bytes_transferred / total_size) * 100), 100)
-                            status_msg = f"Total: {overall_percentage}% - File: {file_progress}% - {current_file}"
+                    for event in parser.feed(data):
+                        handle_event(event)
+                    current_time = time.time()
+                    if latest and current_time - last_update_time >= 0.5:
+                        last_update_time = current_time
+                        bytes_transferred = latest.bytes if progress2 else completed_bytes + latest.bytes
+                        self.throughput.update(stream, bytes_transferred)
+                        if total_size > 0:
+                            status_msg = self.build_progress_status(bytes_transferred, total_size, start_time)
                         else:
-                            status_msg = f"File: {file_progress}% - {current_file}"
+                            status_msg = f"In Progress ({latest.percent}%) - {latest.rate} - {files_done} files"
                         self.update_sync_status(sync_status_list, index, status_msg, status_box)
-                    
-                    # Write to log files if enabled
-                    if global_log_file and global_log_lock:
-                        with global_log_lock:
-                            global_log_file.write(line)
-                            global_log_file.flush()
-                    if dest_log_file:
-                        dest_log_file.write(line)
-                        dest_log_file.flush()
-            if not cancel_event.is_set():
+                for event in parser.close():
+                    handle_event(event)
+                ui_writer.flush()
+                log_writer.flush()
+                process.wait()
+                if not cancel_event.is_set() and process.returncode != 0:
+                    self.update_sync_status(sync_status_list, index, f"Failed (code {process.returncode})", status_box)
+                    self.out_queue.put(f"Sync failed for {dest} with code {process.returncode}\n")
+            if using_rsync and not cancel_event.is_set() and process.returncode == 0:
                 self.update_sync_status(sync_status_list, index, "Completed", status_box)
                 self.out_queue.put(f"Sync completed for {dest}\n")
             if dest_log_file:
@@ -374,6 +489,120 @@ class NewSyncFrame(ttk.Frame):
         except Exception as e:
             self.out_queue.put(f"Execution Error on {dest}: {e}\n")
             self.update_sync_status(sync_status_list, index, "Failed", status_box)
+        finally:
+            self.throughput.finish(stream)
+            self.io_scheduler.release(claim)
+
+    def run_engine_sync(self, source, dest_list, global_log_file, global_log_lock,
+                        sync_status_list, status_box, cancel_event, scan=None):
+        # The built-in engine handles every destination of the group in one pass,
+        # so the source is read once no matter how many destinations are set.
+        indices = [i for i, dest in enumerate(dest_list) if dest.strip()]
+        dests = [dest_list[i] for i in indices]
+        self.out_queue.put(f"\nStarting built-in copy engine: {source} -> {', '.join(dests)}\n")
+        self.out_queue.put("Reading each source block once and writing it to all destinations...\n")
+        claim = self.acquire_device_slot(source, dests, scan, cancel_event, sync_status_list, indices, status_box)
+        if claim is None:
+            for i in indices:
+                self.update_sync_status(sync_status_list, i, "Cancelled", status_box)
+            self.out_queue.put(f"Sync cancelled for {source}\n")
+            return
+        try:
+            self._run_engine_sync(source, dest_list, indices, dests, global_log_file, global_log_lock,
+                                  sync_status_list, status_box, cancel_event, scan)
+        finally:
+            self.io_scheduler.release(claim)
+
+    def _run_engine_sync(self, source, dest_list, indices, dests, global_log_file, global_log_lock,
+                         sync_status_list, status_box, cancel_event, scan):
+        for i in indices:
+            self.update_sync_status(sync_status_list, i, "In Progress", status_box)
+
+        dest_log_files = {}
+        if self.logging_dest_enabled.get():
+            for dest in dests:
+                try:
+                    dest_log_files[dest] = open(os.path.join(dest, "rsync_log.txt"), "a")
+                    dest_log_files[dest].write(f"--- Sync started: {source} -> {dest} ---\n")
+                except Exception as e:
+                    self.out_queue.put(f"Destination Logging Error for {dest}: {e}\n")
+
+        hash_algorithm = None
+        manifest_format = self.manifest_format.get()
+        if self.use_xxh64_checksum.get() or manifest_format != "None":
+            requested = self.checksum_algorithm.get()
+            hash_algorithm = resolve_algorithm(requested)
+            if hash_algorithm != requested:
+                self.out_queue.put(f"{requested} requires the xxhash Python module (pip install xxhash). Using MD5 instead.\n")
+            self.out_queue.put(f"Verifying with {hash_algorithm}: source hashed while copying, every destination read back and compared...\n")
+
+        start_time = time.time()
+        streams = [self.throughput.start(dest) for dest in dests]
+
+        def on_progress(copier):
+            for pos, i in enumerate(indices):
+                self.throughput.update(streams[pos], copier.bytes_done[pos])
+                if copier.errors[pos] is None:
+                    status_msg = self.build_progress_status(copier.bytes_done[pos], copier.total_bytes, start_time)
+                    self.update_sync_status(sync_status_list, i, status_msg, status_box)
+
+        copier = FanOutCopier(source, dests, cancel_event=cancel_event, progress_callback=on_progress,
+                              hash_algorithm=hash_algorithm, scan=scan, journal=shared_journal())
+        try:
+            copier.run()
+        except Exception as e:
+            self.out_queue.put(f"Execution Error in copy engine: {e}\n")
+            for i in indices:
+                self.update_sync_status(sync_status_list, i, "Failed", status_box)
+            return
+        finally:
+            for pos, stream in enumerate(streams):
+                self.throughput.update(stream, copier.bytes_done[pos])
+                self.throughput.finish(stream)
+        if copier.resumed_files:
+            self.out_queue.put(f"Resumed {copier.resumed_files} partially copied files from the transfer journal\n")
+
+        for pos, i in enumerate(indices):
+            dest = dest_list[i]
+            mismatches = copier.mismatches[pos]
+            finished = False
+            if copier.errors[pos] is not None:
+                self.update_sync_status(sync_status_list, i, "Failed", status_box)
+                message = f"Sync failed for {dest}: {copier.errors[pos]}\n"
+            elif cancel_event.is_set():
+                self.update_sync_status(sync_status_list, i, "Cancelled", status_box)
+                message = f"Sync cancelled for {dest}\n"
+            elif mismatches:
+                self.update_sync_status(sync_status_list, i, f"Failed ({len(mismatches)} checksum mismatches)", status_box)
+                message = f"Checksum verification failed for {dest}:\n" + "".join(f"  {path}\n" for path in mismatches)
+            else:
+                self.update_sync_status(sync_status_list, i, "Completed", status_box)
+                message = f"Sync completed for {dest} ({copier.files_done[pos]} files)\n"
+                if hash_algorithm:
+                    message += f"Verified {len(copier.manifests[pos])} copied files with {hash_algorithm}\n"
+                finished = True
+            if manifest_format != "None" and copier.manifests[pos] and not cancel_event.is_set():
+                try:
+                    if manifest_format == "ASC-MHL":
+                        manifest_file = write_ascmhl_generation(copier.target_roots[pos], copier.manifests[pos], hash_algorithm)
+                    else:
+                        manifest_file = write_flat_manifest(copier.target_roots[pos], copier.manifests[pos], hash_algorithm)
+                    message += f"Manifest written: {manifest_file}\n"
+                except Exception as e:
+                    message += f"Could not write manifest for {dest}: {e}\n"
+                    finished = False
+            if finished:
+                # Nothing left to resume; a failed manifest keeps the rows so a rerun can rebuild it
+                copier.journal_done(pos)
+            self.out_queue.put(message)
+            if global_log_file and global_log_lock:
+                with global_log_lock:
+                    global_log_file.write(message)
+                    global_log_file.flush()
+            if dest in dest_log_files:
+                dest_log_files[dest].write(message)
+                dest_log_files[dest].write(f"--- Sync finished for {dest} ---\n\n")
+                dest_log_files[dest].close()
 
     def run_sync(self, source, dest_list, sync_status_list, status_box, cancel_event):
         # First, ensure we start with a clean cancel event
@@ -393,6 +622,10 @@ class NewSyncFrame(ttk.Frame):
             messagebox.showerror("Error", "At least one destination directory must be selected.")
             return
         self.refresh_status_box(sync_status_list, status_box)
+        try:
+            self.io_scheduler.streams_per_device = max(1, int(self.streams_per_device.get()))
+        except (tk.TclError, ValueError):
+            self.io_scheduler.streams_per_device = 1
         global_log_file = None
         global_log_lock = None
         if self.global_logging_enabled.get():
@@ -408,14 +641,23 @@ class NewSyncFrame(ttk.Frame):
             except Exception as e:
                 messagebox.showerror("Global Logging Error", f"Failed to open global log file: {e}")
                 global_log_file = None
-        if self.simultaneous_sync_enabled.get():
+        scan = self.prescan_source(source, cancel_event)
+        if self.use_copy_engine.get():
+            self.run_engine_sync(source, dest_list, global_log_file, global_log_lock,
+                                 sync_status_list, status_box, cancel_event, scan)
+            if global_log_file:
+                status_word = "Cancelled" if cancel_event.is_set() else "Finished"
+                global_log_file.write(f"--- Global Sync {status_word} for source: {source} ---\n\n")
+                global_log_file.close()
+                self.out_queue.put("Global sync complete, log file closed.\n")
+        elif self.simultaneous_sync_enabled.get():
             threads = []
             for i, dest in enumerate(dest_list):
                 if not dest.strip():
                     continue
                 t = threading.Thread(target=self.run_sync_for_dest,
                                      args=(source, dest, global_log_file, global_log_lock,
-                                           sync_status_list, i, status_box, cancel_event))
+                                           sync_status_list, i, status_box, cancel_event, scan))
                 t.daemon = True
                 t.start()
                 threads.append(t)
@@ -441,7 +683,7 @@ class NewSyncFrame(ttk.Frame):
                     self.update_sync_status(sync_status_list, i, "Skipped", status_box)
                     continue
                 self.run_sync_for_dest(source, dest, global_log_file, global_log_lock,
-                                       sync_status_list, i, status_box, cancel_event)
+                                       sync_status_list, i, status_box, cancel_event, scan)
             if global_log_file and not cancel_event.is_set():
                 global_log_file.write(f"--- Global Sync Finished for source: {source} ---\n\n")
                 global_log_file.close()
@@ -507,6 +749,105 @@ class NewSyncFrame(ttk.Frame):
             # Enable button immediately to allow user to try again
             self.sync2_button.config(state=tk.NORMAL)
 
+    def add_job_destination(self):
+        directory = filedialog.askdirectory(title="Select Destination")
+        if directory:
+            current = self.job_dests_entry.get().strip()
+            self.job_dests_entry.delete(0, tk.END)
+            self.job_dests_entry.insert(0, f"{current}; {directory}" if current else directory)
+
+    def add_job(self):
+        source = self.job_source_entry.get().strip()
+        dests = [dest.strip() for dest in self.job_dests_entry.get().split(";") if dest.strip()]
+        if not source or not dests:
+            messagebox.showerror("Error", "A queue job needs a source and at least one destination.")
+            return
+        checksum = self.checksum_algorithm.get() if self.use_xxh64_checksum.get() else None
+        job = self.job_queue.add(SyncJob(source, dests, self.job_priority.get(), checksum, self.manifest_format.get()))
+        self.out_queue.put(f"Queued {job.priority} job {job.job_id}: {source} -> {', '.join(dests)}\n")
+        self.job_source_entry.delete(0, tk.END)
+        self.job_dests_entry.delete(0, tk.END)
+        self.refresh_job_list()
+        self.job_scheduler.wake()
+
+    def selected_job_ids(self):
+        return list(self.job_tree.selection())
+
+    def remove_job(self):
+        job_ids = self.selected_job_ids()
+        if not job_ids:
+            self.job_queue.clear_finished()
+        for job_id in job_ids:
+            job = self.job_queue.get(job_id)
+            if job is not None and job.status == RUNNING:
+                self.out_queue.put(f"Job {job_id} is running; cancel it before removing it.\n")
+                continue
+            self.job_queue.remove(job_id)
+        self.refresh_job_list()
+
+    def start_job_queue(self):
+        try:
+            limit = max(1, int(self.job_device_limit.get()))
+        except (tk.TclError, ValueError):
+            limit = 1
+        self.job_scheduler.per_device_limit = limit
+        self.job_scheduler.start()
+        self.out_queue.put(f"Job queue started ({len(self.job_queue.pending())} waiting, {limit} per device).\n")
+
+    def pause_job_queue(self):
+        self.job_scheduler.pause()
+        self.out_queue.put("Job queue paused; running jobs will finish, no new jobs will start.\n")
+
+    def cancel_job(self):
+        for job_id in self.selected_job_ids():
+            self.job_scheduler.cancel(job_id)
+            self.out_queue.put(f"Cancellation requested for job {job_id}.\n")
+
+    def run_queue_job(self, job, cancel_event, progress_callback):
+        # Queue jobs also take turns with Sync Option 1/2 on shared disks
+        claim = self.io_scheduler.acquire(reads=[job.source], writes=job.dests, group=job.job_id, cancel_event=cancel_event)
+        if claim is None:
+            return CANCELLED, "Cancelled while waiting for a drive"
+        streams = [self.throughput.start(dest) for dest in job.dests]
+
+        def on_progress(job, bytes_done, total_bytes):
+            for stream in streams:
+                self.throughput.update(stream, bytes_done)
+            progress_callback(job, bytes_done, total_bytes)
+
+        try:
+            return run_job(job, cancel_event, on_progress)
+        finally:
+            for stream in streams:
+                self.throughput.finish(stream)
+            self.io_scheduler.release(claim)
+
+    def on_job_update(self, job):
+        # Called from scheduler threads; progress can arrive many times a second,
+        # so refreshes are coalesced into one pending after() call
+        if job.status != RUNNING or job.progress is None:
+            self.out_queue.put(f"Job {job.job_id} {job.status.lower()}" + (f": {job.message}\n" if job.message else "\n"))
+        with self._jobs_lock:
+            if self._jobs_refresh_scheduled:
+                return
+            self._jobs_refresh_scheduled = True
+        self.after(250, self.refresh_job_list)
+
+    def refresh_job_list(self):
+        with self._jobs_lock:
+            self._jobs_refresh_scheduled = False
+        selection = self.job_tree.selection()
+        self.job_tree.delete(*self.job_tree.get_children())
+        for job in self.job_queue.snapshot():
+            status = job.status
+            if job.status == RUNNING and job.progress is not None:
+                status = self.build_progress_status(job.progress[0], job.progress[1], job.started or time.time())
+            elif job.message and job.status != QUEUED:
+                status = f"{job.status} - {job.message}"
+            self.job_tree.insert("", tk.END, iid=job.job_id,
+                                 values=(job.priority, job.source, "; ".join(job.dests), status))
+        self.job_tree.selection_set([job_id for job_id in selection if self.job_tree.exists(job_id)])
+
     def clear_directories(self):
         self.sync1_source_entry.delete(0, tk.END)
         for entry in self.sync1_dest_entries:
@@ -558,7 +899,11 @@ class NewSyncFrame(ttk.Frame):
         self.use_higher_process_priority.set(settings.get("use_higher_process_priority", True))
         self.use_native_cp.set(settings.get("use_native_cp", False))
         self.use_xxh64_checksum.set(settings.get("use_xxh64_checksum", False))
+        self.use_copy_engine.set(settings.get("use_copy_engine", False))
+        self.checksum_algorithm.set(settings.get("checksum_algorithm", "xxh64"))
+        self.manifest_format.set(settings.get("manifest_format", "None"))
         self.global_log_dir.set(settings.get("global_log_dir", ""))
+        self.streams_per_device.set(settings.get("streams_per_device", 1))
 
         # Restore directory information
         sync1_source = settings.get("sync1_source", "")
@@ -593,7 +938,11 @@ class NewSyncFrame(ttk.Frame):
             "use_higher_process_priority": self.use_higher_process_priority.get(),
             "use_native_cp": self.use_native_cp.get(),
             "use_xxh64_checksum": self.use_xxh64_checksum.get(),
+            "use_copy_engine": self.use_copy_engine.get(),
+            "checksum_algorithm": self.checksum_algorithm.get(),
+            "manifest_format": self.manifest_format.get(),
             "global_log_dir": self.global_log_dir.get(),
+            "streams_per_device": self.streams_per_device.get(),
             # Include directory information
             "sync1_source": self.sync1_source_entry.get().strip(),
             "sync1_destinations": [entry.get().strip() for entry in self.sync1_dest_entries],
@@ -638,7 +987,11 @@ class NewSyncFrame(ttk.Frame):
             "use_higher_process_priority": True,
             "use_native_cp": False,
             "use_xxh64_checksum": False,
+            "use_copy_engine": False,
+            "checksum_algorithm": "xxh64",
+            "manifest_format": "None",
             "global_log_dir": "/path/to/global/log/dir",
+            "streams_per_device": 1,
             "sync1_source": "/path/to/sync1/source",
             "sync1_destinations": ["/path/to/sync1/dest1", "/path/to/sync1/dest2", "", ""],
             "sync2_source": "/path/to/sync2/source",
@@ -751,12 +1104,43 @@ class NewSyncFrame(ttk.Frame):
         self.sync2_status_box.config(state=tk.DISABLED)
         self.sync2_statuses = [""] * 4
 
+        # Job Queue Frame
+        queue_frame = ttk.LabelFrame(self, text="Job Queue", padding=4)
+        queue_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(queue_frame, text="Source Directory:", style="DIT.TLabel").grid(row=0, column=0, sticky="e", padx=2, pady=2)
+        self.job_source_entry = ttk.Entry(queue_frame, width=50)
+        self.job_source_entry.grid(row=0, column=1, padx=2, pady=2)
+        ttk.Button(queue_frame, text="Select Source", style="DIT.TButton", command=lambda: self.select_directory(self.job_source_entry)).grid(row=0, column=2, padx=2, pady=2)
+        ttk.Label(queue_frame, text="Destinations (; separated):", style="DIT.TLabel").grid(row=1, column=0, sticky="e", padx=2, pady=2)
+        self.job_dests_entry = ttk.Entry(queue_frame, width=50)
+        self.job_dests_entry.grid(row=1, column=1, padx=2, pady=2)
+        ttk.Button(queue_frame, text="Add Destination", style="DIT.TButton", command=self.add_job_destination).grid(row=1, column=2, padx=2, pady=2)
+        queue_buttons = ttk.Frame(queue_frame)
+        queue_buttons.grid(row=2, column=0, columnspan=3, padx=2, pady=4, sticky="w")
+        ttk.Label(queue_buttons, text="Priority:", style="DIT.TLabel").pack(side="left", padx=(0, 2))
+        ttk.Combobox(queue_buttons, textvariable=self.job_priority, values=list(PRIORITIES), state="readonly", width=7).pack(side="left", padx=2)
+        ttk.Label(queue_buttons, text="Jobs per Drive:", style="DIT.TLabel").pack(side="left", padx=(8, 2))
+        ttk.Spinbox(queue_buttons, textvariable=self.job_device_limit, from_=1, to=8, width=3).pack(side="left", padx=2)
+        ttk.Button(queue_buttons, text="Add Job", style="DIT.TButton", command=self.add_job).pack(side="left", padx=(8, 2))
+        ttk.Button(queue_buttons, text="Remove Job", style="DIT.TButton", command=self.remove_job).pack(side="left", padx=2)
+        ttk.Button(queue_buttons, text="Start Queue", style="DIT.TButton", command=self.start_job_queue).pack(side="left", padx=2)
+        ttk.Button(queue_buttons, text="Pause Queue", style="DIT.TButton", command=self.pause_job_queue).pack(side="left", padx=2)
+        ttk.Button(queue_buttons, text="Cancel Job", style="DIT.TButton", command=self.cancel_job).pack(side="left", padx=2)
+        self.job_tree = ttk.Treeview(queue_frame, columns=("priority", "source", "dests", "status"), show="headings", height=4)
+        for column, heading, width in (("priority", "Priority", 60), ("source", "Source", 180),
+                                       ("dests", "Destinations", 240), ("status", "Status", 280)):
+            self.job_tree.heading(column, text=heading)
+            self.job_tree.column(column, width=width, anchor="w")
+        self.job_tree.grid(row=3, column=0, columnspan=3, padx=2, pady=2, sticky="ew")
+
         # Global Options
         checkbox_frame = ttk.Frame(self)
         checkbox_frame.pack(padx=10, pady=5, anchor="w")
         ttk.Checkbutton(checkbox_frame, text="Enable Logging", variable=self.global_logging_enabled, style="DIT.TCheckbutton").pack(side="left", padx=4)
         ttk.Checkbutton(checkbox_frame, text="Enable Logging Destination", variable=self.logging_dest_enabled, style="DIT.TCheckbutton").pack(side="left", padx=4)
         ttk.Checkbutton(checkbox_frame, text="Sync Volumes Simultaneously", variable=self.simultaneous_sync_enabled, style="DIT.TCheckbutton").pack(side="left", padx=4)
+        ttk.Label(checkbox_frame, text="Streams per Drive:", style="DIT.TLabel").pack(side="left", padx=(8, 2))
+        ttk.Spinbox(checkbox_frame, textvariable=self.streams_per_device, from_=1, to=8, width=3).pack(side="left", padx=2)
         
         # Performance Options
         performance_frame = ttk.Frame(self)
@@ -770,6 +1154,15 @@ class NewSyncFrame(ttk.Frame):
         xxh64_frame.pack(padx=10, pady=2, anchor="w")
         ttk.Checkbutton(xxh64_frame, text="Use File Checksum Verification (XXH64 BE if available)", variable=self.use_xxh64_checksum, style="DIT.TCheckbutton").pack(side="left", padx=4)
         
+        # Built-in copy engine option
+        engine_frame = ttk.Frame(self)
+        engine_frame.pack(padx=10, pady=2, anchor="w")
+        ttk.Checkbutton(engine_frame, text="Use Built-in Copy Engine (Read Source Once for All Destinations)", variable=self.use_copy_engine, style="DIT.TCheckbutton").pack(side="left", padx=4)
+        ttk.Label(engine_frame, text="Checksum:", style="DIT.TLabel").pack(side="left", padx=(8, 2))
+        ttk.Combobox(engine_frame, textvariable=self.checksum_algorithm, values=ALGORITHMS, state="readonly", width=6).pack(side="left", padx=2)
+        ttk.Label(engine_frame, text="Manifest:", style="DIT.TLabel").pack(side="left", padx=(8, 2))
+        ttk.Combobox(engine_frame, textvariable=self.manifest_format, values=("None", "ASC-MHL", "Flat Manifest"), state="readonly", width=12).pack(side="left", padx=2)
+        
         # Log Directory
         log_dir_frame = ttk.Frame(self)
         log_dir_frame.pack(padx=10, pady=5, anchor="w")
@@ -783,7 +1176,7 @@ class NewSyncFrame(ttk.Frame):
         ttk.Button(settings_frame, text="Save Settings", style="DIT.TButton", command=self.save_settings).pack(side="left", padx=2)
         ttk.Button(settings_frame, text="Show Template", style="DIT.TButton", command=self.show_template).pack(side="left", padx=2)
         
-        self.output_window = tk.Text(self, height=11, width=100, borderwidth=2, relief="sunken")
+        self.output_window = LogView(self, height=11, width=100, borderwidth=2, relief="sunken")
         self.output_window.pack(padx=10, pady=10, fill="both", expand=True)
 
         # Bottom Frame with Clear Status and Clear Directories buttons
@@ -791,6 +1184,8 @@ class NewSyncFrame(ttk.Frame):
         bottom_frame.pack(fill="x", padx=10, pady=10)
         ttk.Button(bottom_frame, text="Clear Status", style="DIT.TButton", command=self.clear_status).pack(side="left")
         ttk.Button(bottom_frame, text="Clear Directories", style="DIT.TButton", command=self.clear_directories).pack(side="right")
+        self.queue_stats_label = ttk.Label(bottom_frame, text="", style="DIT.TLabel")
+        self.queue_stats_label.pack(side="left", padx=10)
 
         self.output_window.insert(tk.END, "Sync Tool Started.\n")
         self.output_window.insert(tk.END, "Select directories and click Sync to begin.\n")
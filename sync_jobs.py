@@ -0,0 +1,312 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from app_paths import app_support_dir
+from checksums import resolve_algorithm
+from copy_engine import FanOutCopier
+from devices import physical_device
+from mhl import write_ascmhl_generation, write_flat_manifest
+from source_scan import scan_source
+from transfer_journal import shared_journal
+
+JOBS_FILE = "sync_jobs.json"
+
+# Lower rank runs first
+PRIORITIES = {"Rush": 0, "Normal": 1, "Backup": 2}
+
+QUEUED = "Queued"
+RUNNING = "Running"
+COMPLETED = "Completed"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+
+class SyncJob:
+    """One source copied to one or more destinations by the built-in engine."""
+
+    FIELDS = ("job_id", "source", "dests", "priority", "checksum", "manifest", "status", "created", "message")
+
+    def __init__(self, source, dests, priority="Normal", checksum=None, manifest="None", job_id=None,
+                 status=QUEUED, created=None, message=""):
+        self.job_id = job_id or uuid.uuid4().hex[:8]
+        self.source = source
+        self.dests = list(dests)
+        self.priority = priority if priority in PRIORITIES else "Normal"
+        self.checksum = checksum
+        self.manifest = manifest
+        self.status = status
+        self.created = created or time.time()
+        self.message = message
+        # Runtime only, not persisted
+        self.started = None
+        self.progress = None  # (bytes_done, total_bytes)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+    def devices(self):
+        return {physical_device(self.source)} | {physical_device(dest) for dest in self.dests}
+
+    def sort_key(self):
+        return PRIORITIES[self.priority], self.created
+
+
+class JobQueue:
+    """
+    Sync jobs persisted as JSON in the app support folder after every change.
+    Jobs that were running when the app quit are queued again on load; the
+    engine skips files whose size and mtime already match, so they resume
+    where they stopped.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_support_dir(), JOBS_FILE)
+        self.jobs = []
+        self._lock = threading.RLock()
+        # Writes happen outside _lock, one at a time, newest state last
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self.resumed = 0
+        self.load()
+
+    def load(self):
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = []
+            self.jobs = []
+            for item in data:
+                try:
+                    job = SyncJob.from_dict(item)
+                except (KeyError, TypeError):
+                    continue
+                if job.status == RUNNING:
+                    job.status = QUEUED
+                    job.message = "Interrupted; will resume"
+                    self.resumed += 1
+                self.jobs.append(job)
+
+    def save(self):
+        with self._lock:
+            self._version += 1
+            version = self._version
+            data = [job.to_dict() for job in self.jobs]
+        with self._save_lock:
+            if version <= self._saved_version:
+                # A later change has already been written
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                return
+            self._saved_version = version
+
+    def add(self, job):
+        with self._lock:
+            self.jobs.append(job)
+        self.save()
+        return job
+
+    def remove(self, job_id):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.job_id != job_id or job.status == RUNNING]
+        self.save()
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status in (QUEUED, RUNNING)]
+        self.save()
+
+    def get(self, job_id):
+        with self._lock:
+            return next((job for job in self.jobs if job.job_id == job_id), None)
+
+    def update(self, job, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+        self.save()
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self.jobs, key=SyncJob.sort_key)
+
+    def pending(self):
+        with self._lock:
+            return sorted((job for job in self.jobs if job.status == QUEUED), key=SyncJob.sort_key)
+
+
+def run_job(job, cancel_event, progress_callback=None):
+    """Copy one job with the built-in engine. Returns (status, message)."""
+    hash_algorithm = None
+    if job.checksum or job.manifest != "None":
+        hash_algorithm = resolve_algorithm(job.checksum or "xxh64")
+    scan = scan_source(job.source, cancel_event)
+    if cancel_event.is_set():
+        return CANCELLED, "Cancelled while scanning"
+
+    def on_progress(copier):
+        if progress_callback:
+            active = [copier.bytes_done[i] for i in range(len(copier.dest_list)) if copier.errors[i] is None]
+            progress_callback(job, min(active) if active else 0, copier.total_bytes)
+
+    copier = FanOutCopier(job.source, job.dests, cancel_event=cancel_event, progress_callback=on_progress,
+                          hash_algorithm=hash_algorithm, scan=scan, journal=shared_journal())
+    copier.run()
+    if cancel_event.is_set():
+        return CANCELLED, "Cancelled"
+    problems = []
+    for i, dest in enumerate(copier.dest_list):
+        if copier.errors[i] is not None:
+            problems.append(f"{dest}: {copier.errors[i]}")
+        elif copier.mismatches[i]:
+            problems.append(f"{dest}: {len(copier.mismatches[i])} checksum mismatches")
+        else:
+            if job.manifest != "None" and copier.manifests[i]:
+                try:
+                    if job.manifest == "ASC-MHL":
+                        write_ascmhl_generation(copier.target_roots[i], copier.manifests[i], hash_algorithm)
+                    else:
+                        write_flat_manifest(copier.target_roots[i], copier.manifests[i], hash_algorithm)
+                except OSError as e:
+                    problems.append(f"{dest}: could not write manifest ({e})")
+                    continue
+            copier.journal_done(i)
+    if problems:
+        return FAILED, "; ".join(problems)
+    return COMPLETED, f"{copier.total_files} files to {len(copier.dest_list)} destinations"
+
+
+class JobScheduler:
+    """
+    Starts queued jobs in priority order whenever every device they touch
+    (source and destinations) has fewer than per_device_limit running jobs.
+    A rush job waiting on a busy reader doesn't hold back a backup job that
+    uses other drives. on_update(job) is called from worker threads.
+    """
+
+    def __init__(self, queue, per_device_limit=1, on_update=None, runner=run_job):
+        self.queue = queue
+        self.per_device_limit = per_device_limit
+        self.on_update = on_update
+        self.runner = runner
+        self._cond = threading.Condition()
+        self._running = {}  # job_id -> (cancel_event, devices)
+        self._active = False
+        self._changed = False
+        self._thread = None
+
+    @property
+    def active(self):
+        return self._active
+
+    def running_count(self):
+        with self._cond:
+            return len(self._running)
+
+    def start(self):
+        with self._cond:
+            self._active = True
+            self._changed = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def pause(self):
+        # Running jobs finish; nothing new starts until start() is called again
+        with self._cond:
+            self._active = False
+            self._cond.notify_all()
+
+    def wake(self):
+        with self._cond:
+            self._changed = True
+            self._cond.notify_all()
+
+    def cancel(self, job_id):
+        with self._cond:
+            entry = self._running.get(job_id)
+        if entry is not None:
+            entry[0].set()
+            return
+        job = self.queue.get(job_id)
+        if job is not None and job.status == QUEUED:
+            self.queue.update(job, status=CANCELLED, message="Cancelled before start")
+            self._notify(job)
+
+    def _device_load(self):
+        load = {}
+        for _cancel, devices in self._running.values():
+            for device in devices:
+                load[device] = load.get(device, 0) + 1
+        return load
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._active:
+                    self._thread = None
+                    return
+                self._changed = False
+            # Disks are resolved without the lock held; on macOS that may run diskutil
+            pending = [(job, job.devices()) for job in self.queue.pending()]
+            launches = []
+            with self._cond:
+                load = self._device_load()
+                for job, devices in pending:
+                    if not self._active:
+                        break
+                    if job.status != QUEUED or any(load.get(device, 0) >= self.per_device_limit
+                                                   for device in devices):
+                        continue
+                    for device in devices:
+                        load[device] = load.get(device, 0) + 1
+                    cancel_event = threading.Event()
+                    self._running[job.job_id] = (cancel_event, devices)
+                    launches.append((job, cancel_event))
+            for job, cancel_event in launches:
+                self._launch(job, cancel_event)
+            with self._cond:
+                self._cond.wait_for(lambda: self._changed or not self._active, timeout=5)
+
+    def _launch(self, job, cancel_event):
+        # The queue file is written after the scheduler lock is released
+        job.started = time.time()
+        self.queue.update(job, status=RUNNING, message="")
+        self._notify(job)
+        threading.Thread(target=self._run, args=(job, cancel_event), daemon=True).start()
+
+    def _run(self, job, cancel_event):
+        try:
+            status, message = self.runner(job, cancel_event, self._progress)
+        except Exception as e:
+            status, message = FAILED, str(e)
+        job.progress = None
+        self.queue.update(job, status=status, message=message)
+        with self._cond:
+            self._running.pop(job.job_id, None)
+            self._changed = True
+            self._cond.notify_all()
+        self._notify(job)
+
+    def _progress(self, job, bytes_done, total_bytes):
+        job.progress = (bytes_done, total_bytes)
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scan_cache  # noqa: E402
+import transfer_journal  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def app_support(tmp_path, monkeypatch):
+    """Keep caches, journals and queues out of the real application support folder."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("XDG_DATA_HOME", str(home / "share"))
+    monkeypatch.setattr(scan_cache, "_shared_cache", None)
+    monkeypatch.setattr(scan_cache, "_shared_hash_cache", None)
+    monkeypatch.setattr(transfer_journal, "_shared_journal", None)
+    return home
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+
+import compare_engine
+import scan_cache
+import traversal
+from compare_engine import compare_drives
+
+
+def write(path, data=b""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def compare(drives, reference=None, **options):
+    found = []
+    compare_drives(drives, reference, True, False, False, found.append, **options)
+    return found
+
+
+def test_drives_on_one_disk_share_its_listing_threads(tmp_path, monkeypatch):
+    drives = []
+    for name in ("DRIVE_01", "DRIVE_02"):
+        drive = str(tmp_path / name)
+        for folder in range(6):
+            write(os.path.join(drive, f"A{folder:03}", "clip.mov"), b"x")
+        drives.append(drive)
+    monkeypatch.setattr(traversal, "DEFAULT_WORKERS", 1)
+    # Hand entries over one at a time so both drives are walked at once
+    monkeypatch.setattr(compare_engine, "BATCH_SIZE", 1)
+    list_directory = scan_cache.list_directory
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def slow_listing(path):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        try:
+            return list_directory(path)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(scan_cache, "list_directory", slow_listing)
+    assert compare(drives, drives[0]) == []
+    assert peak[0] == 1
+
+
+def test_sorted_entries_follow_plain_string_order(tmp_path):
+    drive = str(tmp_path / "DRIVE")
+    # "-" and "." sort before "/", so x-1 and x.txt come before everything inside x/
+    for rel in ("x/a", "x/b/c", "x-1", "x.txt", "x0", "w"):
+        write(os.path.join(drive, rel))
+    keys = [entry.key for entry in compare_engine.sorted_entries(drive)]
+    sep = os.sep
+    assert keys == ["w", "x-1", "x.txt", f"x{sep}", f"x{sep}a", f"x{sep}b{sep}", f"x{sep}b{sep}c", "x0"]
+    assert keys == sorted(keys)
+
+
+def test_merge_reports_only_real_differences_around_x_dash_1(tmp_path):
+    reference = str(tmp_path / "DRIVE_01")
+    copy = str(tmp_path / "DRIVE_02")
+    for rel in ("x/a", "x-1/b", "x.txt"):
+        write(os.path.join(reference, rel), b"ref")
+    for rel in ("x/a", "x-1/b"):
+        write(os.path.join(copy, rel), b"ref")
+    write(os.path.join(copy, "x", "extra"), b"new")
+    found = sorted((os.path.basename(d.drive), d.kind, d.path) for d in compare([reference, copy], reference))
+    assert found == [("DRIVE_01", "missing", os.path.join("x", "extra")), ("DRIVE_02", "missing", "x.txt")]
+
+
+def test_progress_reports_each_drive_while_it_is_scanned(tmp_path):
+    small = str(tmp_path / "DRIVE_01")
+    large = str(tmp_path / "DRIVE_02")
+    write(os.path.join(small, "A001", "clip.mov"))
+    for folder in range(3):
+        write(os.path.join(large, f"A{folder:03}", "clip.mov"))
+    seen = []
+    compare([small, large], small,
+            progress_callback=lambda processed, stats: seen.append([(st.root, st.entries, st.dirs) for st in stats]))
+    assert [root for root, _, _ in seen[0]] == [small, large]
+    # Counts only ever grow and end at each drive's own totals
+    for drive in range(2):
+        counts = [step[drive][1:] for step in seen]
+        assert counts == sorted(counts)
+    assert seen[-1] == [(small, 2, 2), (large, 6, 4)]
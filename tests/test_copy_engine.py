@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import copy_engine
+from copy_engine import FanOutCopier
+from mhl import c4_id, parse_mhl, write_ascmhl_generation, write_flat_manifest
+from source_scan import scan_source
+from transfer_journal import TransferJournal
+
+CHUNK = 1024 * 1024  # the engine rounds chunks up to whole MiB
+
+
+def test_cancelled_copy_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(copy_engine, "CHECKPOINT_BYTES", 2 * CHUNK)
+    source = tmp_path / "A001"
+    source.mkdir()
+    data = os.urandom(6 * CHUNK + 123)
+    (source / "clip.mov").write_bytes(data)
+    dests = [str(tmp_path / "SHUTTLE_01"), str(tmp_path / "SHUTTLE_02")]
+    for dest in dests:
+        os.makedirs(dest)
+    journal = TransferJournal(str(tmp_path / "journal.sqlite3"))
+
+    cancel_event = threading.Event()
+    checkpoint = journal.checkpoint
+    offsets = []
+
+    def checkpoint_then_cancel(*args):
+        checkpoint(*args)
+        offsets.append(args[-1])
+        cancel_event.set()
+
+    monkeypatch.setattr(journal, "checkpoint", checkpoint_then_cancel)
+    first = FanOutCopier(str(source), dests, cancel_event=cancel_event, chunk_size=CHUNK, max_workers=1,
+                         hash_algorithm="md5", journal=journal)
+    first.run()
+    assert offsets and 0 < offsets[0] < len(data)
+    target = os.path.join(first.target_roots[0], "clip.mov")
+    assert os.path.getsize(target) < len(data)
+    mtime = os.stat(source / "clip.mov").st_mtime
+    resume_at = journal.resume_offset(first._journal_source, first._journal_keys[0], "clip.mov", len(data), mtime)
+    assert resume_at == max(offsets)
+
+    monkeypatch.setattr(journal, "checkpoint", checkpoint)
+    second = FanOutCopier(str(source), dests, chunk_size=CHUNK, max_workers=1, hash_algorithm="md5",
+                          journal=journal)
+    written = [0, 0]
+    write_block = second._write_block
+
+    def counting_write(index, handle, block):
+        written[index] += len(block)
+        write_block(index, handle, block)
+
+    monkeypatch.setattr(second, "_write_block", counting_write)
+    assert second.run() == [None, None]
+    assert second.resumed_files == 1
+    digest = hashlib.md5(data).hexdigest()
+    for i, root in enumerate(second.target_roots):
+        with open(os.path.join(root, "clip.mov"), "rb") as f:
+            assert f.read() == data
+        # The source prefix is re-hashed, so the manifest digest covers the whole file
+        assert [entry[3] for entry in second.manifests[i]] == [digest]
+    # Only the bytes after the checkpoint were written again
+    assert written == [len(data) - resume_at] * 2
+    assert second.bytes_done == [len(data)] * 2
+    finished = journal.entries(second._journal_source, second._journal_keys[0])
+    assert finished["clip.mov"][:3] == (len(data), mtime, "md5") and finished["clip.mov"].digest == digest
+
+    # A third run takes the verified digests from the journal instead of reading the copies back
+    third = FanOutCopier(str(source), dests, chunk_size=CHUNK, hash_algorithm="md5", journal=journal)
+    monkeypatch.setattr(copy_engine, "hash_file", None)
+    assert third.run() == [None, None]
+    assert third.manifests == second.manifests
+
+    # Once the manifest is written a destination's rows are dropped
+    third.journal_done(0)
+    assert journal.entries(third._journal_source, third._journal_keys[0]) == {}
+    assert journal.entries(third._journal_source, third._journal_keys[1])
+
+
+def test_unreadable_source_link_fails_only_that_link(tmp_path):
+    source = tmp_path / "A001"
+    source.mkdir()
+    (source / "clip.mov").write_bytes(b"clip")
+    os.symlink("clip.mov", source / "latest.mov")
+    os.symlink("clip.mov", source / "vanished.mov")
+    scan = scan_source(str(source))
+    # Gone between the scan and the copy
+    os.remove(source / "vanished.mov")
+    dests = [str(tmp_path / "SHUTTLE_01"), str(tmp_path / "SHUTTLE_02")]
+    copier = FanOutCopier(str(source), dests, scan=scan)
+    errors = copier.run()
+    assert all(error.startswith("vanished.mov: ") for error in errors)
+    for root in copier.target_roots:
+        assert (tmp_path / root / "clip.mov").read_bytes() == b"clip"
+        assert os.readlink(os.path.join(root, "latest.mov")) == "clip.mov"
+        assert not os.path.lexists(os.path.join(root, "vanished.mov"))
+
+
+def test_up_to_date_copies_are_verified_for_the_manifest(tmp_path):
+    source = tmp_path / "A001"
+    source.mkdir()
+    (source / "clip_01.mov").write_bytes(b"first clip")
+    (source / "clip_02.mov").write_bytes(b"second clip")
+    for clip in source.iterdir():
+        # Shot an hour ago, as card footage would be
+        os.utime(clip, (time.time() - 3600,) * 2)
+    dests = [str(tmp_path / "SHUTTLE_01"), str(tmp_path / "SHUTTLE_02")]
+    FanOutCopier(str(source), dests).run()
+    # Same size and mtime as the source, but not the same bytes
+    bad = os.path.join(dests[1], "A001", "clip_02.mov")
+    st = os.stat(bad)
+    with open(bad, "r+b") as f:
+        f.write(b"S")
+    os.utime(bad, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    copier = FanOutCopier(str(source), dests, hash_algorithm="md5")
+    assert copier.run() == [None, None]
+    assert copier.files_done == [2, 2]
+    digests = {name: hashlib.md5((source / name).read_bytes()).hexdigest() for name in ("clip_01.mov", "clip_02.mov")}
+    assert sorted((path, digest) for path, _, _, digest in copier.manifests[0]) == sorted(digests.items())
+    assert [path for path, _, _, _ in copier.manifests[1]] == ["clip_01.mov"]
+    assert copier.mismatches == [[], ["clip_02.mov"]]
+
+    # The bad copy no longer passes the quick check, so the next run copies it again
+    again = FanOutCopier(str(source), dests, hash_algorithm="md5")
+    assert again.run() == [None, None]
+    assert again.mismatches == [[], []]
+    with open(bad, "rb") as f:
+        assert f.read() == b"second clip"
+
+
+def test_fan_out_copy_writes_verified_ascmhl_generations(tmp_path):
+    source = tmp_path / "A001"
+    clips = {os.path.join("CLIPS", "A001C001.mov"): os.urandom(3 * CHUNK + 17),
+             os.path.join("CLIPS", "A001C002.mov"): b"short",
+             "A001.xml": b"<xml/>"}
+    for rel, data in clips.items():
+        (source / rel).parent.mkdir(parents=True, exist_ok=True)
+        (source / rel).write_bytes(data)
+    dests = [str(tmp_path / "SHUTTLE_01"), str(tmp_path / "SHUTTLE_02")]
+    copier = FanOutCopier(str(source), dests, chunk_size=CHUNK, hash_algorithm="md5")
+    assert copier.run() == [None, None]
+    assert copier.total_files == 3 and copier.files_done == [3, 3]
+    expected = sorted((rel, hashlib.md5(data).hexdigest()) for rel, data in clips.items())
+    for i, root in enumerate(copier.target_roots):
+        assert root == os.path.join(dests[i], "A001")
+        for rel, data in clips.items():
+            with open(os.path.join(root, rel), "rb") as f:
+                assert f.read() == data
+            assert int(os.stat(os.path.join(root, rel)).st_mtime) == int(os.stat(source / rel).st_mtime)
+        assert sorted((rel, digest) for rel, _, _, digest in copier.manifests[i]) == expected
+
+    root = copier.target_roots[0]
+    first = write_ascmhl_generation(root, copier.manifests[0], "md5")
+    second = write_ascmhl_generation(root, copier.manifests[0], "md5")
+    assert [os.path.basename(path)[:5] for path in (first, second)] == ["0001_", "0002_"]
+    assert sorted((entry.path, entry.digest) for entry in parse_mhl(second)) == expected
+    chain = ET.parse(os.path.join(root, "ascmhl", "ascmhl_chain.xml")).getroot()
+    recorded = [(hashlist.get("sequencenr"), [child.text for child in hashlist]) for hashlist in chain]
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert recorded == [("1", [os.path.basename(first), c4_id(f1.read())]),
+                            ("2", [os.path.basename(second), c4_id(f2.read())])]
+
+    flat = write_flat_manifest(copier.target_roots[1], copier.manifests[1], "md5")
+    with open(flat, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"{digest}  {rel.replace(os.sep, '/')}" for rel, digest in expected]
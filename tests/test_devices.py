@@ -0,0 +1,62 @@
+import threading
+import time
+
+import devices
+from devices import DeviceScheduler
+
+DISKS = {"/Volumes/CARD_A": "disk:a", "/Volumes/SHUTTLE_01": "disk:b", "/Volumes/SHUTTLE_02": "disk:b",
+         "/Volumes/RAID": "disk:c"}
+
+
+def run_streams(monkeypatch, writes):
+    monkeypatch.setattr(devices, "physical_device", DISKS.__getitem__)
+    scheduler = DeviceScheduler()
+    running = set()
+    overlaps = []
+    lock = threading.Lock()
+    start = threading.Barrier(len(writes))
+
+    def stream(dest):
+        start.wait()
+        with scheduler.slot(writes=[dest]):
+            with lock:
+                running.add(dest)
+            time.sleep(0.05)
+            with lock:
+                overlaps.append(set(running))
+                assert scheduler.busy([dest])
+                running.discard(dest)
+
+    threads = [threading.Thread(target=stream, args=(dest,)) for dest in writes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not scheduler.busy(writes)
+    return overlaps
+
+
+def test_streams_on_one_disk_take_turns(monkeypatch):
+    overlaps = run_streams(monkeypatch, ["/Volumes/SHUTTLE_01", "/Volumes/SHUTTLE_02"])
+    assert overlaps == [{"/Volumes/SHUTTLE_01"}, {"/Volumes/SHUTTLE_02"}] or \
+        overlaps == [{"/Volumes/SHUTTLE_02"}, {"/Volumes/SHUTTLE_01"}]
+
+
+def test_streams_on_different_disks_run_together(monkeypatch):
+    overlaps = run_streams(monkeypatch, ["/Volumes/SHUTTLE_01", "/Volumes/RAID"])
+    assert {"/Volumes/SHUTTLE_01", "/Volumes/RAID"} in overlaps
+
+
+def test_busy_resolves_devices_outside_the_lock(monkeypatch):
+    scheduler = DeviceScheduler()
+
+    def lookup(path):
+        # Another caller must be able to use the scheduler while a disk is being resolved
+        other = threading.Thread(target=scheduler.release, args=({"disk:b": {"token"}},))
+        other.start()
+        other.join(timeout=1)
+        assert not other.is_alive()
+        return DISKS[path]
+
+    monkeypatch.setattr(devices, "physical_device", lookup)
+    assert not scheduler.busy(["/Volumes/CARD_A"])
@@ -0,0 +1,55 @@
+import json
+import os
+
+import ditools
+
+
+def events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def make_card(root):
+    for rel, data in (("CLIPS/A001C001.mov", b"first"), ("CLIPS/A001C002.mov", b"second"), ("A001.xml", b"<x/>")):
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def test_sync_prints_json_events_and_writes_manifests(tmp_path, capsys):
+    source = str(tmp_path / "A001")
+    make_card(source)
+    dests = [str(tmp_path / "SHUTTLE_01"), str(tmp_path / "SHUTTLE_02")]
+    status = ditools.main(["sync", source, *dests, "--checksum", "md5", "--manifest", "ascmhl"])
+    assert status == ditools.EXIT_OK
+    found = events(capsys)
+    kinds = [event["event"] for event in found]
+    assert kinds[:2] == ["scan_started", "scan_finished"] and kinds[-1] == "finished"
+    assert "progress" in kinds
+    assert found[1]["files"] == 3 and found[1]["bytes"] == 15
+    finished = [event for event in found if event["event"] == "destination_finished"]
+    assert [event["dest"] for event in finished] == dests
+    for event in finished:
+        assert event["files_done"] == 3 and event["error"] is None and event["mismatches"] == []
+        assert os.path.basename(os.path.dirname(event["manifest"])) == "ascmhl"
+        assert os.path.exists(event["manifest"])
+
+
+def test_compare_exit_status_and_discrepancy_events(tmp_path, capsys):
+    reference = str(tmp_path / "DRIVE_01")
+    copy = str(tmp_path / "DRIVE_02")
+    make_card(reference)
+    make_card(copy)
+    assert ditools.main(["compare", reference, copy, "--reference", reference, "--hash", "md5"]) == ditools.EXIT_OK
+    assert events(capsys)[-1]["discrepancies"] == 0
+
+    with open(os.path.join(copy, "CLIPS", "A001C002.mov"), "wb") as f:
+        f.write(b"SECOND")
+    os.remove(os.path.join(copy, "A001.xml"))
+    assert ditools.main(["compare", reference, copy, "--reference", reference, "--hash", "md5"]) \
+        == ditools.EXIT_FAILED
+    found = events(capsys)
+    discrepancies = sorted((event["kind"], event["path"]) for event in found if event["event"] == "discrepancy")
+    assert discrepancies == [("checksum", os.path.join("CLIPS", "A001C002.mov")), ("missing", "A001.xml")]
+    assert found[-1]["event"] == "finished" and found[-1]["discrepancies"] == 2
+    assert [drive["drive"] for drive in found[-1]["scanned"]] == [reference, copy]
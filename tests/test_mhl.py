@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+import checksums
+from checksums import hash_file
+from compare_engine import compare_drives, drive_manifest_hashes
+from mhl import ManifestHash, c4_id, load_manifest_hashes, parse_mhl
+
+LEGACY_MHL = """<?xml version="1.0" encoding="UTF-8"?>
+<hashlist version="1.1">
+  <creatorinfo><name>Offload</name><tool>Silverstack</tool></creatorinfo>
+  <hash>
+    <file>A001/A001C001.mov</file>
+    <size>11</size>
+    <lastmodificationdate>2024-05-01T10:00:00Z</lastmodificationdate>
+    <md5>{md5}</md5>
+    <hashdate>2024-05-01T10:05:00Z</hashdate>
+  </hash>
+  <hash>
+    <file>A001/A001C002.mov</file>
+    <size>3</size>
+    <xxhash64>1234567890</xxhash64>
+  </hash>
+</hashlist>
+"""
+
+ASC_MHL = """<?xml version="1.0" encoding="UTF-8"?>
+<hashlist version="2.0" xmlns="urn:ASC:MHL:v2.0">
+  <creatorinfo><tool version="1.0">ascmhl</tool></creatorinfo>
+  <hashes>
+    <hash>
+      <path size="11" lastmodificationdate="2024-05-01T10:00:00Z">A001/A001C001.mov</path>
+      <xxh128 action="original">00112233445566778899aabbccddeeff</xxh128>
+      <sha1 action="original">{sha1}</sha1>
+    </hash>
+    <hash>
+      <path size="12">A001/A001C003.mov</path>
+      <c4 action="original">{c4}</c4>
+    </hash>
+    <hash>
+      <path size="5">A001/A001C004.mov</path>
+      <xxh128 action="original">00112233445566778899aabbccddeeff</xxh128>
+    </hash>
+    <directoryhash>
+      <path>A001</path>
+      <c4>c4notafile</c4>
+    </directoryhash>
+  </hashes>
+</hashlist>
+"""
+
+CLIP_1 = b"first clip!"
+CLIP_3 = b"third clip!!"
+
+
+def make_drive(tmp_path, monkeypatch, clip_1=CLIP_1):
+    # xxHash manifests stay unreadable here whether or not the module is installed
+    monkeypatch.setattr(checksums, "xxhash", None)
+    drive = tmp_path / "DRIVE_01"
+    (drive / "A001").mkdir(parents=True)
+    (drive / "A001" / "A001C001.mov").write_bytes(clip_1)
+    (drive / "A001" / "A001C003.mov").write_bytes(CLIP_3)
+    (drive / "A001" / "A001C004.mov").write_bytes(b"fifth")
+    (drive / "DRIVE_01.mhl").write_text(LEGACY_MHL.format(md5=hashlib.md5(CLIP_1).hexdigest().upper()))
+    (drive / "ascmhl").mkdir()
+    (drive / "ascmhl" / "0001_DRIVE_01_2024-05-01_100000Z.mhl").write_text(
+        ASC_MHL.format(sha1=hashlib.sha1(CLIP_1).hexdigest(), c4=c4_id(CLIP_3)))
+    return drive
+
+
+def test_parse_legacy_mhl(tmp_path, monkeypatch):
+    drive = make_drive(tmp_path, monkeypatch)
+    assert list(parse_mhl(str(drive / "DRIVE_01.mhl"))) == [
+        ManifestHash(os.path.join("A001", "A001C001.mov"), 11, "md5", hashlib.md5(CLIP_1).hexdigest()),
+        # Decimal xxhash64 is not something we can check
+        ManifestHash(os.path.join("A001", "A001C002.mov"), 3, None, None),
+    ]
+
+
+def test_parse_ascmhl_picks_a_usable_hash_and_keeps_c4_case(tmp_path, monkeypatch):
+    drive = make_drive(tmp_path, monkeypatch)
+    entries = list(parse_mhl(str(drive / "ascmhl" / "0001_DRIVE_01_2024-05-01_100000Z.mhl")))
+    assert entries == [
+        ManifestHash(os.path.join("A001", "A001C001.mov"), 11, "sha1", hashlib.sha1(CLIP_1).hexdigest()),
+        ManifestHash(os.path.join("A001", "A001C003.mov"), 12, "c4", c4_id(CLIP_3)),
+        ManifestHash(os.path.join("A001", "A001C004.mov"), 5, None, None),
+    ]
+    assert hash_file(str(drive / "A001" / "A001C003.mov"), "c4") == c4_id(CLIP_3)
+
+
+def test_ascmhl_generations_override_legacy_manifests(tmp_path, monkeypatch):
+    drive = make_drive(tmp_path, monkeypatch)
+    hashes = load_manifest_hashes(str(drive), [str(drive / "ascmhl" / "0001_DRIVE_01_2024-05-01_100000Z.mhl"),
+                                               str(drive / "DRIVE_01.mhl")])
+    assert hashes[os.path.join("A001", "A001C001.mov")] == ("sha1", hashlib.sha1(CLIP_1).hexdigest())
+    assert hashes[os.path.join("A001", "A001C002.mov")] == (None, None)
+
+
+def test_verify_reports_mismatches_and_unverifiable_files(tmp_path, monkeypatch):
+    drive = make_drive(tmp_path, monkeypatch, clip_1=b"first clip?")
+    reference = tmp_path / "DRIVE_02"
+    (reference / "A001").mkdir(parents=True)
+    for name in ("A001C001.mov", "A001C003.mov", "A001C004.mov"):
+        (reference / "A001" / name).write_bytes((drive / "A001" / name).read_bytes())
+    drives = [str(reference), str(drive)]
+    manifests = {str(drive): drive_manifest_hashes(str(drive))}
+    found = []
+    compare_drives(drives, str(reference), True, False, False, found.append, skip_mhl=True, manifests=manifests)
+    found = sorted((d.kind, d.path) for d in found)
+    assert ("checksum", os.path.join("A001", "A001C001.mov")) in found
+    assert ("unverifiable", os.path.join("A001", "A001C004.mov")) in found
+    assert not any(path == os.path.join("A001", "A001C003.mov") for _, path in found)
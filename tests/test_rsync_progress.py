@@ -0,0 +1,41 @@
+from rsync_progress import (FILE_MARKER, OUT_FORMAT, FileDone, FileStarted, Message, Progress,
+                            RsyncProgressParser, Summary, structured_command, supports_progress2)
+
+
+def test_progress2_lines_split_on_carriage_returns():
+    parser = RsyncProgressParser()
+    events = parser.feed(b"      1,234,567  45%   12.34MB/s    0:00:10 (xfr#12, to-chk=100/200)\r"
+                         b"      2,469,134  90%   12.34MB/s    0:00:01 (xfr#13, ir-chk=5/300)\r  3,0")
+    assert events == [
+        Progress(1234567, 45, "12.34MB/s", "0:00:10", 12, 100, 200),
+        FileDone(12),
+        Progress(2469134, 90, "12.34MB/s", "0:00:01", 13, 5, 300),
+        FileDone(13),
+    ]
+    # The redraw in progress is held back until its line ends
+    assert parser.close() == [Message("  3,0")]
+
+
+def test_file_lines_summary_and_utf8_split_across_reads():
+    parser = RsyncProgressParser()
+    name = "clip é.mov".encode()
+    data = f"{FILE_MARKER}2048|".encode() + name + b"\n"
+    cut = data.index(b"\xc3") + 1
+    assert parser.feed(data[:cut]) == []
+    assert parser.feed(data[cut:]) == [FileStarted("clip é.mov", 2048)]
+    events = parser.feed(b"sent 1,024 bytes  received 35 bytes  2,118.00 bytes/sec\ntotal size is 2,048  speedup is 1.93\n")
+    assert [(e.sent, e.received, e.total_size) for e in events] == [(1024, 35, None), (None, None, 2048)]
+    assert all(isinstance(e, Summary) for e in events)
+
+
+def test_legacy_progress_line_keeps_transfer_count():
+    parser = RsyncProgressParser()
+    assert parser.parse_line("     32,768 100%  512.00kB/s    0:00:00") == [
+        Progress(32768, 100, "512.00kB/s", "0:00:00", 0, None, None)]
+
+
+def test_structured_command():
+    command = ["rsync", "-a", "--progress", "src/", "dst/"]
+    assert structured_command(command, True) == ["rsync", "-a", "--info=progress2", OUT_FORMAT, "src/", "dst/"]
+    assert structured_command(command, False) == ["rsync", "-a", "--progress", OUT_FORMAT, "src/", "dst/"]
+    assert supports_progress2(3, 1) and not supports_progress2(2, 6)
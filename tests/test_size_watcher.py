@@ -0,0 +1,35 @@
+import os
+
+from size_watcher import DestinationSizeWatcher
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_progress_counts_only_what_the_copy_writes(tmp_path):
+    root = str(tmp_path / "A001")
+    write(os.path.join(root, "clip_01.mov"), 1000)
+    write(os.path.join(root, "sub", "clip_02.mov"), 2000)
+    watcher = DestinationSizeWatcher(root)
+    watcher.baseline()
+    # A re-sync starts from zero, not from what is already on the drive
+    assert watcher.poll() == 0
+
+    # cp overwrites an existing file in place: truncated, then written again
+    with open(os.path.join(root, "clip_01.mov"), "wb") as f:
+        f.write(b"y" * 400)
+        f.flush()
+        assert watcher.poll() == 400
+        f.write(b"y" * 600)
+    assert watcher.poll() == 1000
+
+    write(os.path.join(root, "sub", "clip_03.mov"), 300)
+    assert watcher.poll() == 1300
+
+    write(os.path.join(root, "sub", "clip_02.mov"), 2000)
+    os.utime(os.path.join(root, "sub", "clip_02.mov"), ns=(0, 10**9))
+    assert watcher.poll() == 3300
+    assert watcher.poll() == 3300
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import sync_jobs
+from sync_jobs import COMPLETED, QUEUED, RUNNING, JobQueue, JobScheduler, SyncJob
+
+
+def disk_of(path):
+    # /Volumes/<disk>/...
+    return path.split("/")[2]
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def run_queue(queue, per_device_limit=1, hold=0.05):
+    started = []
+    running = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def runner(job, cancel_event, progress_callback):
+        with lock:
+            started.append(job.source)
+            running.add(job.job_id)
+            overlaps.append(len(running))
+        time.sleep(hold)
+        with lock:
+            running.discard(job.job_id)
+        return COMPLETED, "done"
+
+    scheduler = JobScheduler(queue, per_device_limit, runner=runner)
+    scheduler.start()
+    wait_until(lambda: all(job.status == COMPLETED for job in queue.snapshot()))
+    scheduler.pause()
+    return started, max(overlaps)
+
+
+def test_jobs_on_one_disk_run_in_priority_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_jobs, "physical_device", disk_of)
+    queue = JobQueue(str(tmp_path / "jobs.json"))
+    queue.add(SyncJob("/Volumes/CARD/backup", ["/Volumes/RAID/a"], "Backup", created=1))
+    queue.add(SyncJob("/Volumes/CARD/normal_late", ["/Volumes/RAID/b"], "Normal", created=3))
+    queue.add(SyncJob("/Volumes/CARD/normal", ["/Volumes/RAID/c"], "Normal", created=2))
+    queue.add(SyncJob("/Volumes/CARD/rush", ["/Volumes/RAID/d"], "Rush", created=4))
+    started, most = run_queue(queue)
+    assert started == ["/Volumes/CARD/rush", "/Volumes/CARD/normal", "/Volumes/CARD/normal_late",
+                       "/Volumes/CARD/backup"]
+    assert most == 1
+
+
+def test_per_device_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_jobs, "physical_device", disk_of)
+    queue = JobQueue(str(tmp_path / "jobs.json"))
+    # Two cards to two shuttles each: disjoint disks may run side by side
+    queue.add(SyncJob("/Volumes/CARD_A/A001", ["/Volumes/SHUTTLE_1/x"], created=1))
+    queue.add(SyncJob("/Volumes/CARD_B/B001", ["/Volumes/SHUTTLE_2/x"], created=2))
+    assert run_queue(queue, hold=0.2)[1] == 2
+
+    queue = JobQueue(str(tmp_path / "shared.json"))
+    queue.add(SyncJob("/Volumes/CARD_A/A001", ["/Volumes/RAID/x"], created=1))
+    queue.add(SyncJob("/Volumes/CARD_B/B001", ["/Volumes/RAID/y"], created=2))
+    queue.add(SyncJob("/Volumes/CARD_C/C001", ["/Volumes/RAID/z"], created=3))
+    assert run_queue(queue, hold=0.1)[1] == 1
+
+    queue = JobQueue(str(tmp_path / "two.json"))
+    for n in range(3):
+        queue.add(SyncJob(f"/Volumes/CARD_{n}/A001", ["/Volumes/RAID/x"], created=n))
+    assert run_queue(queue, per_device_limit=2, hold=0.2)[1] == 2
+
+
+def test_persisted_queue_reloads_and_requeues_running_jobs(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    queue = JobQueue(path)
+    done = queue.add(SyncJob("/src/a", ["/dst/1", "/dst/2"], "Rush", checksum="xxh64", manifest="ASC-MHL"))
+    interrupted = queue.add(SyncJob("/src/b", ["/dst/1"], "Backup"))
+    queue.update(done, status=COMPLETED, message="2 files")
+    queue.update(interrupted, status=RUNNING)
+
+    reloaded = JobQueue(path)
+    assert reloaded.resumed == 1
+    assert [job.to_dict() for job in reloaded.snapshot()] == [
+        done.to_dict(), dict(interrupted.to_dict(), status=QUEUED, message="Interrupted; will resume")]
+    assert [job.job_id for job in reloaded.pending()] == [interrupted.job_id]
+
+
+def test_queue_file_is_written_outside_the_scheduler_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_jobs, "physical_device", disk_of)
+    queue = JobQueue(str(tmp_path / "jobs.json"))
+    queue.add(SyncJob("/Volumes/CARD/A001", ["/Volumes/RAID/x"]))
+    scheduler = JobScheduler(queue, runner=lambda job, cancel_event, progress: (COMPLETED, ""))
+    save = queue.save
+    held = []
+
+    def checked_save():
+        # Another thread must still be able to reach the scheduler and the queue
+        other = threading.Thread(target=lambda: (scheduler.running_count(), queue.get("none")))
+        other.start()
+        other.join(timeout=1)
+        held.append(other.is_alive())
+        save()
+
+    monkeypatch.setattr(queue, "save", checked_save)
+    scheduler.start()
+    wait_until(lambda: queue.snapshot()[0].status == COMPLETED)
+    scheduler.pause()
+    assert held and not any(held)
@@ -0,0 +1,42 @@
+import os
+
+import ditools
+from source_scan import scan_source
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_copy(dest, name):
+    for dirpath, _dirs, files in os.walk(dest):
+        if name in files:
+            with open(os.path.join(dirpath, name), "rb") as f:
+                return f.read()
+    raise AssertionError(f"{name} not copied")
+
+
+def test_sync_copies_file_rewritten_without_folder_change(tmp_path):
+    source = str(tmp_path / "A001")
+    dest = str(tmp_path / "SHUTTLE")
+    clip = os.path.join(source, "CLIPS", "clip.mov")
+    write(clip, b"old")
+    os.makedirs(dest)
+    assert ditools.main(["sync", source, dest]) == ditools.EXIT_OK
+    assert read_copy(dest, "clip.mov") == b"old"
+
+    # Prime the scan cache, then rewrite the file in place: the folder's mtime doesn't move
+    scan_source(source, use_cache=True)
+    folder = os.path.dirname(clip)
+    folder_times = os.stat(folder)
+    with open(clip, "r+b") as f:
+        f.write(b"twenty-four bytes of new")
+    os.utime(clip, (folder_times.st_atime + 10, folder_times.st_mtime + 10))
+    os.utime(folder, ns=(folder_times.st_atime_ns, folder_times.st_mtime_ns))
+    cached = scan_source(source, use_cache=True)
+    assert [size for _rel, size, _mtime in cached.files] == [3]
+
+    assert ditools.main(["sync", source, dest]) == ditools.EXIT_OK
+    assert read_copy(dest, "clip.mov") == b"twenty-four bytes of new"
@@ -0,0 +1,118 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+
+import scan_cache
+import traversal
+
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def listing(root, use_cache=True, **options):
+    return {os.path.relpath(dirpath, root): (list(subdirs), sorted(info.name for info in files))
+            for dirpath, subdirs, files, links in traversal.walk(root, use_cache=use_cache, **options)}
+
+
+def count_listings(monkeypatch):
+    listed = []
+    list_directory = scan_cache.list_directory
+    monkeypatch.setattr(scan_cache, "list_directory", lambda path: listed.append(path) or list_directory(path))
+    return listed
+
+
+def test_unchanged_directories_are_served_from_the_cache(tmp_path, monkeypatch):
+    root = str(tmp_path / "DRIVE")
+    write(os.path.join(root, "a", "one.mov"))
+    write(os.path.join(root, "b", "two.mov"))
+    first = listing(root)
+    assert first == listing(root, use_cache=False)
+
+    listed = count_listings(monkeypatch)
+    assert listing(root) == first
+    assert listing(root, ordered=False) == first
+    assert listed == []
+
+
+def test_changed_directory_mtime_forces_a_relist(tmp_path, monkeypatch):
+    root = str(tmp_path / "DRIVE")
+    write(os.path.join(root, "a", "one.mov"))
+    write(os.path.join(root, "b", "two.mov"))
+    listing(root)
+    listed = count_listings(monkeypatch)
+
+    # Same entries, new mtime: the cached listing can no longer be trusted
+    st = os.stat(os.path.join(root, "a"))
+    os.utime(os.path.join(root, "a"), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    listing(root)
+    assert listed == [os.path.join(root, "a")]
+
+    del listed[:]
+    write(os.path.join(root, "b", "three.mov"))
+    assert listing(root)["b"] == ([], ["three.mov", "two.mov"])
+    assert listed == [os.path.join(root, "b")]
+
+
+def test_removed_subtrees_are_forgotten(tmp_path):
+    root = str(tmp_path / "DRIVE")
+    write(os.path.join(root, "a", "deep", "one.mov"))
+    listing(root)
+    os.remove(os.path.join(root, "a", "deep", "one.mov"))
+    os.rmdir(os.path.join(root, "a", "deep"))
+    os.rmdir(os.path.join(root, "a"))
+    assert listing(root) == listing(root, use_cache=False) == {".": ([], [])}
+    conn = scan_cache.shared_cache().connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM dirs WHERE path LIKE ?", (root + os.sep + "%",)).fetchone() == (0,)
+    finally:
+        conn.close()
+
+
+def make_tree(root):
+    for rel in ("a/1", "a/b/2", "a/b/c/3", "a-1/4", "d/5", "d/e/6", "f/7"):
+        write(os.path.join(root, rel))
+
+
+def test_cache_is_read_on_workers_and_written_on_the_walking_thread(tmp_path, monkeypatch):
+    root = str(tmp_path / "DRIVE")
+    make_tree(root)
+    walker = threading.current_thread()
+    threads = {"lookup": set(), "store": set()}
+    for name in threads:
+        method = getattr(scan_cache.ScanCache, name)
+        monkeypatch.setattr(scan_cache.ScanCache, name,
+                            lambda self, *args, name=name, method=method:
+                            threads[name].add(threading.current_thread()) or method(self, *args))
+    for ordered in (True, False):
+        listing(root, ordered=ordered, workers=4)
+    assert threads["store"] == {walker}
+    assert threads["lookup"] and walker not in threads["lookup"]
+
+
+def test_shared_pool_gives_the_same_ordered_walk(tmp_path):
+    first = str(tmp_path / "DRIVE_01")
+    second = str(tmp_path / "DRIVE_02")
+    make_tree(first)
+    make_tree(second)
+
+    def order(root, **options):
+        return [(os.path.relpath(dirpath, root), list(subdirs), sorted(info.name for info in files))
+                for dirpath, subdirs, files, links in traversal.walk(root, **options)]
+
+    expected = order(first, workers=1)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # Two interleaved walks on one pool, as compare_drives runs drives on the same disk
+        walks = [traversal.walk(root, pool=pool) for root in (first, second)]
+        results = [[], []]
+        for steps in zip_longest(*walks):
+            for result, root, step in zip(results, (first, second), steps):
+                if step is not None:
+                    dirpath, subdirs, files, links = step
+                    result.append((os.path.relpath(dirpath, root), list(subdirs), sorted(info.name for info in files)))
+        # The pool is the caller's and still takes work after both walks end
+        assert pool.submit(lambda: 1).result() == 1
+    assert results == [expected, expected] == [order(first), order(second)]
@@ -0,0 +1,54 @@
+import os
+import threading
+
+from tree_engine import write_tree
+
+
+def make_tree(root):
+    files = {
+        "A001/clip_01.mov": b"x" * 2048,
+        "A001/meta/clip_01.xml": b"<xml/>",
+        "A002/clip_02.mov": b"y" * 10,
+        "notes.txt": b"hi",
+        ".hidden": b"secret",
+    }
+    for rel, data in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    os.makedirs(os.path.join(root, "empty"))
+
+
+def test_tree_lists_sizes_bottom_up(tmp_path):
+    root = str(tmp_path / "DRIVE")
+    make_tree(root)
+    output = str(tmp_path / "INDEX.txt")
+    assert write_tree(root, output) == 2048 + 6 + 10 + 2
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == (
+            f"{root}\n"
+            "A001 [2.0 KB]\n"
+            "├── clip_01.mov [2.0 KB]\n"
+            "└── meta [6.0 B]\n"
+            "│   └── clip_01.xml [6.0 B]\n"
+            "A002 [10.0 B]\n"
+            "└── clip_02.mov [10.0 B]\n"
+            "empty [0.0 B]\n"
+            "notes.txt [2.0 B]\n"
+        )
+    assert not os.path.exists(output + ".part")
+
+
+def test_cancelled_tree_keeps_visited_entries(tmp_path):
+    root = str(tmp_path / "DRIVE")
+    make_tree(root)
+    output = str(tmp_path / "INDEX.txt")
+    cancel_event = threading.Event()
+    write_tree(root, output, cancel_event=cancel_event, progress_callback=lambda stats: cancel_event.set())
+    with open(output, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # Only the root was listed: its first folder is open but unsized
+    assert lines[1] == "A001 [incomplete]"
+    assert lines[-1].startswith("[Incomplete: tree generation was cancelled")
+    assert not os.path.exists(output + ".part")
@@ -0,0 +1,38 @@
+import csv
+import hashlib
+import json
+import os
+
+from test_tree_engine import make_tree
+from tree_export import write_tree_reports
+
+
+def test_reports_share_one_walk(tmp_path):
+    root = str(tmp_path / "DRIVE")
+    make_tree(root)
+    output = str(tmp_path / "INDEX.txt")
+    total, paths = write_tree_reports(root, output, formats=("jsonl", "csv", "html"), algorithm="md5")
+    assert total == 2048 + 6 + 10 + 2
+    assert sorted(paths) == ["csv", "html", "jsonl"]
+
+    with open(paths["jsonl"], encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    by_path = {r["path"]: r for r in records}
+    clip = os.path.join("A001", "clip_01.mov")
+    assert by_path[clip]["size"] == 2048
+    assert by_path[clip]["md5"] == hashlib.md5(b"x" * 2048).hexdigest()
+    assert by_path["A001"] == {"type": "folder", "path": "A001", "size": 2048 + 6}
+    assert by_path["."]["size"] == total
+    assert ".hidden" not in by_path
+    # Folders are written after their contents
+    assert records.index(by_path["A001"]) > records.index(by_path[clip])
+
+    with open(paths["csv"], newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["type", "path", "size", "mtime", "md5", "error"]
+    assert [row[:3] for row in rows[1:]] == [[r["type"], r["path"], str(r["size"])] for r in records]
+
+    with open(paths["html"], encoding="utf-8") as f:
+        page = f.read()
+    assert page.count("<details") == page.count("</details>") == 5
+    assert "clip_01.mov" in page
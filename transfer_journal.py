@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from app_paths import app_support_dir
+
+DB_NAME = "transfer_journal.sqlite3"
+COMMIT_INTERVAL = 1.0
+
+JournalEntry = namedtuple("JournalEntry", "size mtime algorithm digest completed")
+
+# One row per file copied to a target root. A row with offset < size is a
+# partial copy: the first offset bytes are on the destination and were synced
+# to disk before the row was written.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    source TEXT,
+    target TEXT,
+    path TEXT,
+    size INTEGER,
+    mtime REAL,
+    offset INTEGER,
+    algorithm TEXT,
+    digest TEXT,
+    completed REAL,
+    PRIMARY KEY (source, target, path)
+) WITHOUT ROWID;
+"""
+
+
+class TransferJournal:
+    """
+    Per-file record of built-in engine copies, keyed by source root, target
+    root and relative path. Finished files carry the size and mtime they were
+    copied from plus the verified digest, so an interrupted job skips them on
+    restart and can still list them in its manifest. Unfinished files carry
+    the last synced offset so the copy picks up where it stopped. A target's
+    rows are discarded once its job has finished and its manifest is written.
+    Safe to share between copy threads.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(app_support_dir(), DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._last_commit = time.time()
+
+    def _commit(self, force=False):
+        if force or time.time() - self._last_commit >= COMMIT_INTERVAL:
+            self._conn.commit()
+            self._last_commit = time.time()
+
+    def resume_offset(self, source, target, path, size, mtime):
+        """Bytes of an interrupted copy known to be on disk, or 0."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, offset, completed FROM transfers WHERE source = ? AND target = ? AND path = ?",
+                (source, target, path)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime or row[3] is not None:
+            return 0
+        return row[2]
+
+    def checkpoint(self, source, target, path, size, mtime, offset):
+        # Committed straight away: a checkpoint only helps if it survives a power cut
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, NULL)",
+                               (source, target, path, size, mtime, offset))
+            self._commit(force=True)
+
+    def complete(self, source, target, path, size, mtime, algorithm=None, digest=None):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (source, target, path, size, mtime, size, algorithm, digest, time.time()))
+            self._commit()
+
+    def forget(self, source, target, path):
+        with self._lock:
+            self._conn.execute("DELETE FROM transfers WHERE source = ? AND target = ? AND path = ?",
+                               (source, target, path))
+            self._commit()
+
+    def entries(self, source, target):
+        """Every finished file copied to one target root, as {path: JournalEntry}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime, algorithm, digest, completed FROM transfers "
+                "WHERE source = ? AND target = ? AND completed IS NOT NULL", (source, target)).fetchall()
+        return {row[0]: JournalEntry(*row[1:]) for row in rows}
+
+    def discard(self, source, target):
+        """Drop every row for one target root once its job is done and its manifest written."""
+        with self._lock:
+            self._conn.execute("DELETE FROM transfers WHERE source = ? AND target = ?", (source, target))
+            self._commit(force=True)
+
+    def flush(self):
+        with self._lock:
+            self._commit(force=True)
+
+
+_shared_journal = None
+_shared_lock = threading.Lock()
+
+
+def shared_journal():
+    global _shared_journal
+    with _shared_lock:
+        if _shared_journal is None:
+            try:
+                _shared_journal = TransferJournal()
+            except (OSError, sqlite3.Error):
+                _shared_journal = False
+    return _shared_journal or None
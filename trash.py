@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import shutil
+from log_view import LogView
+from traversal import TraversalFilter, TraversalStats, walk
 
 def move_drx_files(target_directory, output_callback=None):
     trash_dir = os.path.expanduser("~/.Trash")
@@ -15,35 +17,37 @@ def move_drx_files(target_directory, output_callback=None):
         return
     files_moved = 0
     files_failed = 0
+    stats = TraversalStats(target_directory)
     try:
-        for root_dir, dirs, files in os.walk(target_directory):
-            for file in files:
-                if file.lower().endswith(".drx"):
-                    src = os.path.join(root_dir, file)
-                    dest = os.path.join(trash_dir, file)
-                    base, ext = os.path.splitext(file)
-                    counter = 1
-                    if not os.access(src, os.R_OK):
-                        if output_callback:
-                            output_callback(f"Error: No read permission for file: {src}")
-                        files_failed += 1
-                        continue
-                    while os.path.exists(dest):
-                        dest = os.path.join(trash_dir, f"{base}_{counter}{ext}")
-                        counter += 1
-                    try:
-                        if output_callback:
-                            output_callback(f"Moving: {src} -> {dest}")
-                        shutil.move(src, dest)
-                        files_moved += 1
-                    except (PermissionError, OSError) as e:
-                        if output_callback:
-                            output_callback(f"Error moving file {src}: {str(e)}")
-                        files_failed += 1
+        for root_dir, _dirs, files, _links in walk(target_directory, TraversalFilter(extensions=(".drx",)),
+                                                  ordered=False, stats=stats):
+            for file in (info.name for info in files):
+                src = os.path.join(root_dir, file)
+                dest = os.path.join(trash_dir, file)
+                base, ext = os.path.splitext(file)
+                counter = 1
+                if not os.access(src, os.R_OK):
+                    if output_callback:
+                        output_callback(f"Error: No read permission for file: {src}")
+                    files_failed += 1
+                    continue
+                while os.path.exists(dest):
+                    dest = os.path.join(trash_dir, f"{base}_{counter}{ext}")
+                    counter += 1
+                try:
+                    if output_callback:
+                        output_callback(f"Moving: {src} -> {dest}")
+                    shutil.move(src, dest)
+                    files_moved += 1
+                except (PermissionError, OSError) as e:
+                    if output_callback:
+                        output_callback(f"Error moving file {src}: {str(e)}")
+                    files_failed += 1
     except Exception as e:
         if output_callback:
             output_callback(f"An unexpected error occurred: {str(e)}")
     if output_callback:
+        output_callback(f"Scanned {stats.summary()}")
         output_callback(f"Total .drx files moved: {files_moved}")
         if files_failed > 0:
             output_callback(f"Failed to move {files_failed} files due to permission errors.")
@@ -62,7 +66,7 @@ class TrashDrxFrame(ttk.Frame):
         self.dir_label.pack(pady=5)
         self.trash_btn = ttk.Button(self, text="Trash .drx", style="DIT.TButton", command=self.trash_drx)
         self.trash_btn.pack(pady=10)
-        self.output_text = tk.Text(self, height=15, width=100)
+        self.output_text = LogView(self, height=15, width=100)
         self.output_text.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
         self.bottom_frame = ttk.Frame(self)
         self.bottom_frame.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=5)
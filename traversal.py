@@ -0,0 +1,257 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scan_cache
+from devices import physical_device
+
+# Directory listings in flight at once. Network shares and RAIDs answer many
+# small requests in parallel far faster than one after another.
+DEFAULT_WORKERS = 8
+PREFETCH_PER_WORKER = 4
+
+
+class TraversalFilter:
+    """
+    What a walk skips. Pruned directories are never listed; file filters apply
+    to the files list only (links are reported unfiltered).
+    extensions, when set, keeps only files with one of those extensions.
+    """
+
+    def __init__(self, skip_hidden_dirs=False, skip_hidden_files=False, skip_dirs=(), skip_files=(),
+                 extensions=None, skip_extensions=()):
+        self.skip_hidden_dirs = skip_hidden_dirs
+        self.skip_hidden_files = skip_hidden_files
+        self.skip_dirs = frozenset(skip_dirs)
+        self.skip_files = frozenset(skip_files)
+        self.extensions = tuple(ext.lower() for ext in extensions) if extensions else None
+        self.skip_extensions = tuple(ext.lower() for ext in skip_extensions)
+
+    def keep_dir(self, name):
+        return name not in self.skip_dirs and not (self.skip_hidden_dirs and name.startswith('.'))
+
+    def keep_file(self, name):
+        if name in self.skip_files or (self.skip_hidden_files and name.startswith('.')):
+            return False
+        lower = name.lower()
+        if self.skip_extensions and lower.endswith(self.skip_extensions):
+            return False
+        return self.extensions is None or lower.endswith(self.extensions)
+
+
+class TraversalStats:
+    """Counters for one walk, readable from other threads while it runs."""
+
+    def __init__(self, root):
+        self.root = root
+        self.volume = physical_device(root)
+        self.dirs = 0
+        self.entries = 0
+        self.bytes = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def entries_per_sec(self):
+        return self.entries / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.root}: {self.entries} entries in {self.dirs} folders, "
+                f"{self.elapsed:.1f} s ({self.entries_per_sec:,.0f} entries/s on {self.volume})")
+
+
+class _Lister:
+    """
+    Lists one directory per call, through the scan cache when one is given.
+    Workers only read the cache; fresh listings are handed back and stored by
+    the walking thread on a single connection, so writers never queue on locks.
+    """
+
+    def __init__(self, cache, filters):
+        self.cache = cache
+        self.filters = filters
+        self._local = threading.local()
+        self._conns = []
+        self._lock = threading.Lock()
+        self._writer = None
+        self._last_commit = time.time()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self.cache is not None:
+            try:
+                conn = self.cache.connect(check_same_thread=False)
+            except sqlite3.Error:
+                conn = False
+            self._local.conn = conn
+            if conn:
+                with self._lock:
+                    self._conns.append(conn)
+        return conn or None
+
+    def __call__(self, path):
+        st = os.stat(path)
+        conn = self._conn()
+        listing = None
+        if conn is not None:
+            try:
+                listing = self.cache.lookup(conn, path, st)
+            except sqlite3.Error:
+                listing = None
+        fresh = None
+        if listing is None:
+            subdirs, files, links, rows = scan_cache.list_directory(path)
+            if conn is not None:
+                fresh = (path, st, list(subdirs), rows)
+        else:
+            subdirs, files, links = listing
+        if self.filters is not None:
+            subdirs = [name for name in subdirs if self.filters.keep_dir(name)]
+            files = [info for info in files if self.filters.keep_file(info.name)]
+        subdirs.sort()
+        return subdirs, files, links, fresh
+
+    def store(self, fresh):
+        """Called on the walking thread only."""
+        if fresh is None or self._writer is False:
+            return
+        try:
+            if self._writer is None:
+                self._writer = self.cache.connect()
+            self.cache.store(self._writer, *fresh)
+            if time.time() - self._last_commit >= scan_cache.COMMIT_INTERVAL:
+                self._writer.commit()
+                self._last_commit = time.time()
+        except sqlite3.Error:
+            self._writer = False
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = self._conns, []
+        if self._writer:
+            conns.append(self._writer)
+        self._writer = None
+        for conn in conns:
+            try:
+                conn.commit()
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+def walk(root, filters=None, use_cache=False, cancel_event=None, workers=DEFAULT_WORKERS, ordered=True,
+         stats=None, on_error=None, pool=None):
+    """
+    os.walk-style generator yielding (dirpath, subdirs, files, links), with
+    files as scan_cache.CachedFile tuples, listed by a pool of worker threads.
+
+    ordered=True yields depth-first in sorted order, like a top-down os.walk
+    with sorted names: upcoming directories are listed ahead in parallel and
+    callers may reorder or prune subdirs in place. ordered=False yields
+    listings as soon as they finish, which is fastest when order doesn't matter.
+    Directories that can't be listed are skipped and passed to on_error(path, error).
+    pool, if given, is a listing pool shared with other walks (one per
+    physical disk, say) and owned by the caller; workers then only sets how
+    far ahead this walk queues listings.
+    """
+    root = os.path.abspath(root)
+    cache = scan_cache.shared_cache() if use_cache else None
+    lister = _Lister(cache, filters)
+    stats = stats if stats is not None else TraversalStats(root)
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    walker = _walk_ordered if ordered else _walk_unordered
+    try:
+        for dirpath, subdirs, files, links in walker(root, pool, lister, cancel_event, max(1, workers), on_error,
+                                                     stats):
+            stats.dirs += 1
+            stats.entries += len(subdirs) + len(files)
+            stats.bytes += sum(info.size for info in files)
+            yield dirpath, subdirs, files, links
+    finally:
+        stats.finished = time.monotonic()
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        lister.close()
+
+
+def _failed(path, error, on_error, stats):
+    stats.errors += 1
+    if on_error is not None:
+        on_error(path, error)
+
+
+def _walk_ordered(root, pool, lister, cancel_event, workers, on_error, stats):
+    prefetch = workers * PREFETCH_PER_WORKER
+    pending = {}
+    stack = [root]
+    try:
+        while stack:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            path = stack.pop()
+            future = pending.pop(path, None) or pool.submit(lister, path)
+            # List the directories that come next while this one is handed out
+            for upcoming in stack[:-prefetch - 1:-1]:
+                if upcoming not in pending:
+                    pending[upcoming] = pool.submit(lister, upcoming)
+            try:
+                subdirs, files, links, fresh = future.result()
+            except OSError as e:
+                _failed(path, e, on_error, stats)
+                continue
+            lister.store(fresh)
+            yield path, subdirs, files, links
+            stack.extend(os.path.join(path, name) for name in reversed(subdirs))
+    finally:
+        # Prefetched listings nobody will read; matters when the pool is shared
+        for future in pending.values():
+            future.cancel()
+
+
+def _walk_unordered(root, pool, lister, cancel_event, workers, on_error, stats):
+    lock = threading.Lock()
+    done = []
+    ready = threading.Event()
+    in_flight = 0
+
+    def submit(path):
+        nonlocal in_flight
+        in_flight += 1
+        future = pool.submit(lister, path)
+        future.add_done_callback(lambda f, path=path: finished(path, f))
+
+    def finished(path, future):
+        with lock:
+            done.append((path, future))
+        ready.set()
+
+    waiting = [root]
+    while waiting or in_flight:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        # Keep the pool busy without queueing the whole tree at once
+        while waiting and in_flight < workers * PREFETCH_PER_WORKER:
+            submit(waiting.pop())
+        ready.wait(timeout=0.5)
+        with lock:
+            batch, done[:] = done[:], []
+            ready.clear()
+        for path, future in batch:
+            in_flight -= 1
+            try:
+                subdirs, files, links, fresh = future.result()
+            except OSError as e:
+                _failed(path, e, on_error, stats)
+                continue
+            lister.store(fresh)
+            yield path, subdirs, files, links
+            waiting.extend(os.path.join(path, name) for name in subdirs)
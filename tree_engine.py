@@ -0,0 +1,240 @@
+import os
+from array import array
+from datetime import datetime
+
+from traversal import TraversalFilter, TraversalStats, walk
+
+WRITE_BUFFER = 1024 * 1024
+# Folders with more entries than this are listed as counts per extension
+LIST_SUMMARY_THRESHOLD = 1000
+
+
+def format_size(size_in_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size_in_bytes < 1024.0:
+            return f"{size_in_bytes:.1f} {unit}"
+        size_in_bytes /= 1024.0
+    return f"{size_in_bytes:.1f} PB"
+
+
+def tree_output_path(start_path):
+    """INDEX_OF_<dir>_<timestamp>.txt inside the directory being indexed."""
+    dir_name_underscored = os.path.basename(start_path).replace(' ', '_')
+    timestamp = datetime.now().strftime("%Y_%m_%d_at_%H_%M_%S")
+    return os.path.join(start_path, f"INDEX_OF_{dir_name_underscored}_{timestamp}.txt")
+
+
+def directory_entries(path, skip_hidden=True, cancel_event=None):
+    """
+    Immediate entries of path as (name, is_dir, size) tuples sorted by name,
+    from one scandir pass. size is None for folders and unreadable entries.
+    Returns None if cancelled.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for i, entry in enumerate(it):
+            if i % 1000 == 0 and cancel_event is not None and cancel_event.is_set():
+                return None
+            if skip_hidden and entry.name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                size = None if is_dir else entry.stat().st_size
+            except OSError:
+                is_dir, size = False, None
+            entries.append((entry.name, is_dir, size))
+    entries.sort()
+    return entries
+
+
+def extension_summary(entries):
+    """[(extension, files, bytes)] for the files among entries, largest total first."""
+    totals = {}
+    for name, is_dir, size in entries:
+        if is_dir:
+            continue
+        ext = os.path.splitext(name)[1].lower() or "(no extension)"
+        count, total = totals.get(ext, (0, 0))
+        totals[ext] = (count + 1, total + (size or 0))
+    return sorted(((ext, count, total) for ext, (count, total) in totals.items()),
+                  key=lambda item: (-item[2], item[0]))
+
+
+def _prefix(level, is_last):
+    if level == 0:
+        return ''
+    return '│   ' * (level - 1) + ('└── ' if is_last else '├── ')
+
+
+# Folder sizes not known (yet): the walk was cancelled inside the folder, or it couldn't be read
+UNFINISHED = -1
+DENIED = -2
+
+
+class _Frame:
+    """A folder on the current walk path: its sorted entries and how far they have been written."""
+    __slots__ = ("path", "folder_id", "level", "entries", "next", "size")
+
+    def __init__(self, path, folder_id, level, entries):
+        self.path = path
+        self.folder_id = folder_id
+        self.level = level
+        self.entries = entries
+        self.next = 0
+        self.size = 0
+
+
+class _TreeWriter:
+    """
+    Writes the tree as the depth-first walk visits it. A folder's size is
+    only known once its subtree is done, so folder lines are written with a
+    placeholder naming the folder's slot in an array of sizes, which
+    fill_sizes() swaps for the size in one sequential pass at the end.
+    Memory is the open folders on the walk path plus one int per folder.
+    """
+
+    def __init__(self, out, on_folder=None):
+        self.out = out
+        self.on_folder = on_folder
+        self.sizes = array("q")
+        self.stack = []
+        self.child_id = None  # slot of the folder whose listing comes next
+        self.denied = False
+        self._total = 0
+
+    def add_listing(self, dirpath, subdirs, files, links):
+        entries = [(name, None) for name in subdirs]
+        entries.extend((info.name, info.size) for info in files)
+        entries.extend((name, False) for name in links)
+        entries.sort(key=lambda item: item[0])
+        level = self.stack[-1].level + 1 if self.stack else 0
+        self.stack.append(_Frame(dirpath, self.child_id, level, entries))
+        self._advance()
+
+    def add_error(self, dirpath, error):
+        if not self.stack:
+            self.out.write(f"[Error accessing directory: {str(error)}]\n")
+            self.denied = True
+            return
+        self.sizes[self.child_id] = DENIED
+        if self.on_folder is not None:
+            self.on_folder(dirpath, 0, True)
+        self._advance()
+
+    def _advance(self):
+        # Write entries up to the next subfolder, whose listing is the walk's next step.
+        # Folders whose entries are all written are done and hand their size up.
+        lines = []
+        while self.stack:
+            frame = self.stack[-1]
+            if frame.next < len(frame.entries):
+                name, size = frame.entries[frame.next]
+                frame.next += 1
+                label = _prefix(frame.level, frame.next == len(frame.entries)) + name
+                if size is None:
+                    self.child_id = len(self.sizes)
+                    self.sizes.append(UNFINISHED)
+                    lines.append(f"{label}\0{self.child_id}\n")
+                    break
+                if size is False:
+                    lines.append(f"{label} [link]\n")
+                else:
+                    lines.append(f"{label} [{format_size(size)}]\n")
+                    frame.size += size
+                continue
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1].size += frame.size
+            else:
+                self._total = frame.size
+            if frame.folder_id is not None:
+                self.sizes[frame.folder_id] = frame.size
+                if self.on_folder is not None:
+                    self.on_folder(frame.path, frame.size, False)
+        self.out.write("".join(lines))
+
+    @property
+    def total(self):
+        """Bytes counted so far; the full total once the walk is done."""
+        if self.stack:
+            return sum(frame.size for frame in self.stack)
+        return self._total
+
+    def fill_sizes(self, draft_path, output_file):
+        with open(draft_path, 'rb') as draft, open(output_file, 'wb', buffering=WRITE_BUFFER) as out:
+            for line in draft:
+                label, sep, folder_id = line.partition(b"\0")
+                if sep:
+                    size = self.sizes[int(folder_id)]
+                    if size == DENIED:
+                        suffix = "access denied"
+                    elif size == UNFINISHED:
+                        suffix = "incomplete"
+                    else:
+                        suffix = format_size(size)
+                    line = label + f" [{suffix}]".encode() + folder_id[len(folder_id.rstrip(b"\r\n")):]
+                out.write(line)
+
+
+def _visible_links(files, links, skip_hidden):
+    # Links to folders and dangling links are listed but never followed
+    file_names = {info.name for info in files}
+    return [name for name in links if name not in file_names and not (skip_hidden and name.startswith('.'))]
+
+
+def partial_marker(stats):
+    return (f"[Incomplete: tree generation was cancelled after {stats.entries} entries in "
+            f"{stats.dirs} folders; folders marked [incomplete] were not fully scanned]")
+
+
+def write_tree(start_path, output_file, skip_hidden=True, stats=None, reports=None, cancel_event=None,
+               progress_callback=None):
+    """
+    Write a text tree of start_path with a size next to every file and folder.
+    One parallel walk streams the tree to a draft file next to output_file;
+    folder sizes, summed bottom-up as folders finish, are filled in while
+    the draft is copied to output_file. reports (tree_export.TreeReports) is
+    fed from the same walk. progress_callback(stats) is called after every
+    folder. If cancel_event is set, everything visited so far is kept and
+    closed by partial_marker(). Returns the total size.
+    """
+    root = os.path.abspath(start_path)
+    filters = TraversalFilter(skip_hidden_dirs=skip_hidden, skip_hidden_files=skip_hidden)
+    stats = stats if stats is not None else TraversalStats(root)
+    draft_path = output_file + ".part"
+    outputs = {os.path.abspath(output_file), os.path.abspath(draft_path)}
+    if reports is not None:
+        outputs.update(os.path.abspath(path) for path in reports.paths.values())
+    output_dirs = {os.path.dirname(path) for path in outputs}
+
+    def add_error(dirpath, error):
+        tree.add_error(dirpath, error)
+        if reports is not None:
+            reports.add_error(dirpath, error)
+
+    try:
+        with open(draft_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+            tree = _TreeWriter(f, reports.folder_done if reports is not None else None)
+            f.write(f"{start_path}\n")
+            for dirpath, subdirs, files, links in walk(root, filters, cancel_event=cancel_event, stats=stats,
+                                                       on_error=add_error):
+                if dirpath in output_dirs:
+                    files = [info for info in files if os.path.join(dirpath, info.name) not in outputs]
+                links = _visible_links(files, links, skip_hidden)
+                if reports is not None:
+                    reports.add_listing(dirpath, files, links)
+                tree.add_listing(dirpath, subdirs, files, links)
+                if progress_callback is not None:
+                    progress_callback(stats)
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled:
+                f.write(partial_marker(stats) + "\n")
+        tree.fill_sizes(draft_path, output_file)
+    finally:
+        try:
+            os.remove(draft_path)
+        except OSError:
+            pass
+    if reports is not None and not cancelled:
+        reports.folder_done(root, tree.total, tree.denied)
+    return tree.total
@@ -0,0 +1,282 @@
+import csv
+import html
+import json
+import os
+from datetime import datetime
+
+from compare_engine import cached_hash
+from scan_cache import shared_hash_cache
+from traversal import TraversalStats
+from tree_engine import format_size, partial_marker, write_tree
+
+REPORT_FORMATS = ("jsonl", "csv", "html")
+
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Index of {title}</title>
+<style>
+body {{ font: 13px -apple-system, Helvetica, Arial, sans-serif; margin: 20px; }}
+ul {{ list-style: none; margin: 0; padding-left: 18px; }}
+summary {{ cursor: pointer; font-weight: 600; }}
+.s, .m {{ color: #888; margin-left: 8px; }}
+code {{ color: #666; margin-left: 8px; }}
+.e {{ color: #b00; }}
+</style></head><body>
+<h1>Index of {title}</h1>
+<p>Generated {generated}. <input id="q" placeholder="Filter names" oninput="filter(this.value)"></p>
+<ul>
+"""
+
+HTML_TAIL = """</ul>
+<script>
+var sizes = {sizes};
+for (var id in sizes) document.getElementById("d" + id).textContent = sizes[id];
+function filter(q) {{
+  q = q.toLowerCase();
+  document.querySelectorAll("li").forEach(function (li) {{
+    li.hidden = q && li.textContent.toLowerCase().indexOf(q) < 0;
+  }});
+  document.querySelectorAll("details").forEach(function (d) {{ d.open = !!q || d.id === "d0r"; }});
+}}
+</script>
+</body></html>
+"""
+
+
+def report_path(output_file, fmt):
+    """Report next to the text tree: INDEX_OF_<dir>_<timestamp>.<fmt>."""
+    return os.path.splitext(output_file)[0] + "." + fmt
+
+
+def _iso(mtime):
+    return datetime.fromtimestamp(mtime).isoformat(timespec="seconds")
+
+
+class _JsonLinesReport:
+    """One JSON object per file, link and folder. Folders follow their contents, once sized."""
+
+    def __init__(self, f, algorithm):
+        self.f = f
+        self.algorithm = algorithm
+
+    def listing(self, rel_dir, files, links, digests):
+        for info, digest in zip(files, digests):
+            record = {"type": "file", "path": os.path.join(rel_dir, info.name), "size": info.size,
+                      "mtime": _iso(info.mtime)}
+            if self.algorithm:
+                record[self.algorithm] = digest
+            self.f.write(json.dumps(record) + "\n")
+        for name in links:
+            self.f.write(json.dumps({"type": "link", "path": os.path.join(rel_dir, name)}) + "\n")
+
+    def error(self, rel_dir, error):
+        pass
+
+    def folder(self, rel_dir, size, denied):
+        record = {"type": "folder", "path": rel_dir or ".", "size": None if denied else size}
+        if denied:
+            record["error"] = "access denied"
+        self.f.write(json.dumps(record) + "\n")
+
+    def partial(self, message):
+        self.f.write(json.dumps({"type": "incomplete", "message": message}) + "\n")
+
+    def close(self, total):
+        pass
+
+
+class _CsvReport(_JsonLinesReport):
+    """type,path,size,mtime[,hash],error rows in the same order as the JSON lines."""
+
+    def __init__(self, f, algorithm):
+        super().__init__(f, algorithm)
+        self.writer = csv.writer(f)
+        header = ["type", "path", "size", "mtime"]
+        if algorithm:
+            header.append(algorithm)
+        self.writer.writerow(header + ["error"])
+
+    def listing(self, rel_dir, files, links, digests):
+        for info, digest in zip(files, digests):
+            row = ["file", os.path.join(rel_dir, info.name), info.size, _iso(info.mtime)]
+            if self.algorithm:
+                row.append(digest or "")
+            self.writer.writerow(row + [""])
+        for name in links:
+            self.writer.writerow(self._pad(["link", os.path.join(rel_dir, name), "", ""], ""))
+
+    def folder(self, rel_dir, size, denied):
+        row = ["folder", rel_dir or ".", "" if denied else size, ""]
+        self.writer.writerow(self._pad(row, "access denied" if denied else ""))
+
+    def partial(self, message):
+        self.writer.writerow(self._pad(["incomplete", "", "", ""], message))
+
+    def _pad(self, row, error):
+        return row + ([""] if self.algorithm else []) + [error]
+
+
+class _HtmlReport:
+    """
+    Nested <details> folders written in walk order, files before subfolders.
+    Folder sizes are only known once a subtree is done, so they are filled
+    in by a short script at the end of the page.
+    """
+
+    def __init__(self, f, algorithm, root):
+        self.f = f
+        self.algorithm = algorithm
+        self.root = root
+        self.open = []  # relative paths of folders whose <details> is still open
+        self.ids = {}  # open folders waiting for their size
+        self.sizes = {}
+        self.next_id = 0
+        title = html.escape(root)
+        f.write(HTML_HEAD.format(title=title, generated=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    def _close_until(self, rel_parent):
+        while self.open and self.open[-1] != rel_parent:
+            self.open.pop()
+            self.f.write("</ul></details></li>\n")
+
+    def listing(self, rel_dir, files, links, digests):
+        folder_id = self.next_id
+        self.next_id += 1
+        self.ids[rel_dir] = folder_id
+        if rel_dir:
+            self._close_until(os.path.dirname(rel_dir))
+            name = os.path.basename(rel_dir)
+            self.f.write(f'<li><details><summary>{html.escape(name)}<span class="s" id="d{folder_id}"></span>'
+                         f'</summary><ul>\n')
+        else:
+            self.f.write(f'<li><details open id="d0r"><summary>{html.escape(self.root)}'
+                         f'<span class="s" id="d{folder_id}"></span></summary><ul>\n')
+        self.open.append(rel_dir)
+        lines = []
+        for info, digest in zip(files, digests):
+            line = (f'<li>{html.escape(info.name)}<span class="s">{format_size(info.size)}</span>'
+                    f'<span class="m">{datetime.fromtimestamp(info.mtime):%Y-%m-%d %H:%M}</span>')
+            if digest:
+                line += f"<code>{digest}</code>"
+            lines.append(line + "</li>\n")
+        lines.extend(f"<li>{html.escape(name)} [link]</li>\n" for name in links)
+        self.f.write("".join(lines))
+
+    def error(self, rel_dir, error):
+        if not rel_dir:
+            self.f.write(f'<li class="e">Error accessing directory: {html.escape(str(error))}</li>\n')
+            return
+        self._close_until(os.path.dirname(rel_dir))
+        self.f.write(f'<li class="e">{html.escape(os.path.basename(rel_dir))} [access denied]</li>\n')
+
+    def folder(self, rel_dir, size, denied):
+        folder_id = self.ids.pop(rel_dir, None)
+        if folder_id is not None and not denied:
+            self.sizes[folder_id] = format_size(size)
+
+    def partial(self, message):
+        self._close_until(None)
+        self.f.write(f'<li class="e">{html.escape(message)}</li>\n')
+
+    def close(self, total):
+        self._close_until(None)
+        self.f.write(HTML_TAIL.format(sizes=json.dumps(self.sizes)))
+
+
+class TreeReports:
+    """
+    Structured reports written alongside the text tree from the same walk.
+    Files are written as their folder is listed; folder records follow once
+    the folder has been sized. With an algorithm, every file is hashed as it
+    is reported, reusing verified hashes from the hash cache.
+    """
+
+    def __init__(self, root, paths, algorithm=None, hash_cache=None, cancel_event=None):
+        self.root = root
+        self.cancel_event = cancel_event
+        self.paths = paths
+        self.algorithm = algorithm
+        self.hash_cache = hash_cache
+        self.files = []
+        self.reports = []
+        try:
+            for fmt, path in paths.items():
+                f = open(path, "w", encoding="utf-8", newline="" if fmt == "csv" else None)
+                self.files.append(f)
+                if fmt == "jsonl":
+                    self.reports.append(_JsonLinesReport(f, algorithm))
+                elif fmt == "csv":
+                    self.reports.append(_CsvReport(f, algorithm))
+                else:
+                    self.reports.append(_HtmlReport(f, algorithm, root))
+        except OSError:
+            self.abort()
+            raise
+
+    def _rel(self, dirpath):
+        rel = os.path.relpath(dirpath, self.root)
+        return "" if rel == "." else rel
+
+    def _digest(self, path, info):
+        try:
+            return cached_hash(path, info, self.algorithm, self.hash_cache, self.cancel_event)
+        except OSError:
+            return None
+
+    def add_listing(self, dirpath, files, links):
+        files = sorted(files)
+        if self.algorithm:
+            digests = [self._digest(os.path.join(dirpath, info.name), info) for info in files]
+        else:
+            digests = [None] * len(files)
+        rel_dir = self._rel(dirpath)
+        for report in self.reports:
+            report.listing(rel_dir, files, links, digests)
+
+    def add_error(self, dirpath, error):
+        rel_dir = self._rel(dirpath)
+        for report in self.reports:
+            report.error(rel_dir, error)
+
+    def folder_done(self, dirpath, size, denied):
+        rel_dir = self._rel(dirpath)
+        for report in self.reports:
+            report.folder(rel_dir, size, denied)
+
+    def close(self, total, partial=None):
+        for report in self.reports:
+            if partial:
+                report.partial(partial)
+            report.close(total)
+        self.abort()
+
+    def abort(self):
+        for f in self.files:
+            f.close()
+        self.files = []
+
+
+def write_tree_reports(start_path, output_file, formats=(), algorithm=None, skip_hidden=True, stats=None,
+                       cancel_event=None, progress_callback=None):
+    """
+    write_tree plus a report per format in REPORT_FORMATS, all from one walk.
+    Cancelled reports end with the same incomplete marker as the text tree.
+    Returns (total size, {format: report path}).
+    """
+    root = os.path.abspath(start_path)
+    stats = stats if stats is not None else TraversalStats(root)
+    paths = {fmt: report_path(output_file, fmt) for fmt in REPORT_FORMATS if fmt in formats}
+    reports = None
+    if paths:
+        hash_cache = shared_hash_cache() if algorithm else None
+        reports = TreeReports(root, paths, algorithm, hash_cache, cancel_event)
+    try:
+        total = write_tree(start_path, output_file, skip_hidden=skip_hidden, stats=stats, reports=reports,
+                           cancel_event=cancel_event, progress_callback=progress_callback)
+    except BaseException:
+        if reports is not None:
+            reports.abort()
+        raise
+    if reports is not None:
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        reports.close(total, partial_marker(stats) if cancelled else None)
+    return total, paths
@@ -1,8 +1,17 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, scrolledtext
+from tkinter import ttk, filedialog
 from datetime import datetime
 import os
 import threading
+from log_view import ScrolledLogView
+from checksums import ALGORITHMS, resolve_algorithm
+from tree_engine import LIST_SUMMARY_THRESHOLD, directory_entries, extension_summary, format_size, tree_output_path
+from traversal import TraversalStats
+from tree_export import write_tree_reports
+
+# Listing lines handed to the log per insert
+LIST_BATCH_LINES = 500
+TREE_PROGRESS_MS = 500
 
 class TreeGeneratorFrame(ttk.Frame):
     def __init__(self, parent):
@@ -14,7 +23,13 @@ class TreeGeneratorFrame(ttk.Frame):
         self.directories = [default_dir] * 4
         self.active_dir_index = 0
         self.skip_hidden = tk.BooleanVar(value=True)
+        self.report_vars = {fmt: tk.BooleanVar(value=False) for fmt in ("jsonl", "csv", "html")}
+        self.hash_reports = tk.BooleanVar(value=False)
+        self.hash_algorithm = tk.StringVar(value="xxh64")
         self.radio_var = tk.IntVar(value=0)
+        self.list_cancel = None
+        self.tree_cancel = None
+        self.tree_stats = None
         self.create_widgets()
         self.log("Tree Generator Tool Started. Select a directory to generate a text-based tree inventory of your files.")
         self.update_all_dir_labels()
@@ -44,6 +59,16 @@ class TreeGeneratorFrame(ttk.Frame):
         options_frame.pack(fill=tk.X, pady=5)
         skip_check = ttk.Checkbutton(options_frame, text="Skip Hidden Files/Directories", variable=self.skip_hidden, style="DIT.TCheckbutton")
         skip_check.pack(anchor=tk.W, padx=5)
+        reports_frame = ttk.Frame(options_frame)
+        reports_frame.pack(anchor=tk.W, padx=5, pady=(2, 0))
+        ttk.Label(reports_frame, text="Also Export:").pack(side=tk.LEFT)
+        for fmt, text in (("jsonl", "JSON Lines"), ("csv", "CSV"), ("html", "HTML Index")):
+            ttk.Checkbutton(reports_frame, text=text, variable=self.report_vars[fmt],
+                            style="DIT.TCheckbutton").pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Checkbutton(reports_frame, text="Include Checksums", variable=self.hash_reports,
+                        style="DIT.TCheckbutton").pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Combobox(reports_frame, textvariable=self.hash_algorithm, values=ALGORITHMS,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=(5, 0))
         
         # Action Buttons
         btn_frame = ttk.Frame(main_frame, padding="5")
@@ -52,15 +77,19 @@ class TreeGeneratorFrame(ttk.Frame):
         gen_btn.pack(side=tk.LEFT, padx=5)
         list_btn = ttk.Button(btn_frame, text="List Directory", style="DIT.TButton", command=self.log_directory)
         list_btn.pack(side=tk.LEFT, padx=5)
+        cancel_btn = ttk.Button(btn_frame, text="Cancel", style="DIT.TButton", command=self.cancel)
+        cancel_btn.pack(side=tk.LEFT, padx=5)
         save_btn = ttk.Button(btn_frame, text="Save Log To...", style="DIT.TButton", command=self.save_log)
         save_btn.pack(side=tk.LEFT, padx=5)
         clear_btn = ttk.Button(btn_frame, text="Clear Status", style="DIT.TButton", command=self.clear_log)
         clear_btn.pack(side=tk.LEFT, padx=5)
+        self.status_label = ttk.Label(main_frame, text="Status: Idle", style="DIT.TLabel")
+        self.status_label.pack(anchor=tk.W, padx=5)
         
         # Log Area
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="5")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=20)
+        self.log_text = ScrolledLogView(log_frame, height=20)
         self.log_text.pack(fill=tk.BOTH, expand=True)
     
     def update_all_dir_labels(self):
@@ -81,26 +110,68 @@ class TreeGeneratorFrame(ttk.Frame):
             self.set_active_directory(index)
     
     def log(self, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        self.log_text.insert(tk.END, self._stamp(message))
         self.log_text.see(tk.END)
     
+    def _stamp(self, message):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{timestamp}] {message}\n"
+    
     def log_directory(self):
+        if self.list_cancel is not None:
+            self.log("A directory listing is already running.")
+            return
         active_dir = self.directories[self.active_dir_index]
         self.log(f"Contents of Directory {self.active_dir_index+1}: {active_dir}")
+        self.list_cancel = threading.Event()
+        threading.Thread(target=self._list_directory_thread,
+                         args=(active_dir, self.skip_hidden.get(), self.list_cancel), daemon=True).start()
+    
+    def _list_directory_thread(self, active_dir, skip_hidden, cancel_event):
+        # LogView.insert is safe from any thread and coalesces into one widget insert per tick
         try:
-            items = os.listdir(active_dir)
-            for item in sorted(items):
-                if self.skip_hidden.get() and item.startswith('.'):
-                    continue
-                full_path = os.path.join(active_dir, item)
-                if os.path.isdir(full_path):
-                    self.log(f"  [DIR] {item}")
-                else:
-                    size = self.format_size(os.path.getsize(full_path))
-                    self.log(f"  [FILE] {item} ({size})")
+            entries = directory_entries(active_dir, skip_hidden, cancel_event)
+            if entries is None:
+                lines = ["Directory listing cancelled."]
+            elif len(entries) > LIST_SUMMARY_THRESHOLD:
+                lines = self._listing_summary(entries)
+            else:
+                lines = []
+                for name, is_dir, size in entries:
+                    if is_dir:
+                        lines.append(f"  [DIR] {name}")
+                    else:
+                        lines.append(f"  [FILE] {name} ({self.format_size(size or 0)})")
+            for start in range(0, len(lines), LIST_BATCH_LINES):
+                if cancel_event.is_set():
+                    self.log_text.insert(tk.END, self._stamp("Directory listing cancelled."))
+                    break
+                self.log_text.insert(tk.END, "".join(self._stamp(line) for line in lines[start:start + LIST_BATCH_LINES]))
         except Exception as e:
-            self.log(f"Error listing directory: {str(e)}")
+            self.log_text.insert(tk.END, self._stamp(f"Error listing directory: {str(e)}"))
+        finally:
+            self.after(0, self._listing_finished, cancel_event)
+    
+    def _listing_summary(self, entries):
+        folders = sum(1 for _name, is_dir, _size in entries if is_dir)
+        by_extension = extension_summary(entries)
+        total = sum(size for _ext, _count, size in by_extension)
+        lines = [f"  {len(entries):,} entries: {folders:,} folders, {len(entries) - folders:,} files, "
+                 f"{self.format_size(total)} (summarised by extension)"]
+        lines.extend(f"  [{ext}] {count:,} files ({self.format_size(size)})" for ext, count, size in by_extension)
+        return lines
+    
+    def _listing_finished(self, cancel_event):
+        if self.list_cancel is cancel_event:
+            self.list_cancel = None
+    
+    def cancel(self):
+        if self.list_cancel is not None:
+            self.list_cancel.set()
+            self.log("Cancelling directory listing...")
+        if self.tree_cancel is not None and not self.tree_cancel.is_set():
+            self.tree_cancel.set()
+            self.log("Cancelling tree generation...")
     
     def save_log(self):
         active_dir = self.directories[self.active_dir_index]
@@ -123,75 +194,63 @@ class TreeGeneratorFrame(ttk.Frame):
         self.log("Status cleared")
     
     def generate_tree(self):
+        if self.tree_cancel is not None:
+            self.log("A tree is already being generated.")
+            return
         active_dir = self.directories[self.active_dir_index]
         if not os.path.exists(active_dir):
             self.log(f"Error: Directory doesn't exist: {active_dir}")
             return
-        dir_name = os.path.basename(active_dir)
-        dir_name_underscored = dir_name.replace(' ', '_')
-        timestamp = datetime.now().strftime("%Y_%m_%d_at_%H_%M_%S")
-        output_filename = f"INDEX_OF_{dir_name_underscored}_{timestamp}.txt"
-        output_path = os.path.join(active_dir, output_filename)
+        output_path = tree_output_path(active_dir)
+        formats = [fmt for fmt, var in self.report_vars.items() if var.get()]
+        algorithm = None
+        if formats and self.hash_reports.get():
+            algorithm = resolve_algorithm(self.hash_algorithm.get())
+            if algorithm != self.hash_algorithm.get():
+                self.log(f"{self.hash_algorithm.get()} needs the xxhash module; using {algorithm} instead.")
         self.log(f"Generating directory tree for: {active_dir}")
-        self.log(f"Output file will be saved as: {output_filename}")
-        threading.Thread(target=self._generate_tree_thread, args=(active_dir, output_path)).start()
+        self.log(f"Output file will be saved as: {os.path.basename(output_path)}")
+        self.tree_cancel = threading.Event()
+        self.tree_stats = TraversalStats(os.path.abspath(active_dir))
+        threading.Thread(target=self._generate_tree_thread,
+                         args=(active_dir, output_path, self.skip_hidden.get(), formats, algorithm,
+                               self.tree_stats, self.tree_cancel), daemon=True).start()
+        self.after(TREE_PROGRESS_MS, self._poll_tree_progress, self.tree_stats)
     
-    def _generate_tree_thread(self, start_path, output_file):
+    def _generate_tree_thread(self, start_path, output_file, skip_hidden, formats, algorithm, stats, cancel_event):
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(f"{start_path}\n")
-            self._generate_tree_recursive(start_path, output_file, level=0)
-            self.after(0, lambda: self.log(f"Tree generation complete: {output_file}"))
+            total, reports = write_tree_reports(start_path, output_file, formats, algorithm, skip_hidden=skip_hidden,
+                                                stats=stats, cancel_event=cancel_event)
+            if cancel_event.is_set():
+                self.after(0, lambda: self.log(f"Tree generation cancelled; partial tree saved to: {output_file}"))
+            else:
+                self.after(0, lambda: self.log(f"Tree generation complete: {output_file} ({self.format_size(total)})"))
+            for path in reports.values():
+                self.after(0, lambda path=path: self.log(f"Report written: {path}"))
+            self.after(0, lambda: self.log(f"Scanned {stats.summary()}"))
         except Exception as e:
-            self.after(0, lambda: self.log(f"Error generating tree: {str(e)}"))
+            message = f"Error generating tree: {str(e)}"
+            self.after(0, lambda: self.log(message))
+        finally:
+            self.after(0, self._tree_finished, stats, cancel_event)
     
-    def _generate_tree_recursive(self, path, output_file, level=0):
-        try:
-            items = os.listdir(path)
-            items.sort()
-            for i, item in enumerate(items):
-                if self.skip_hidden.get() and item.startswith('.'):
-                    continue
-                item_path = os.path.join(path, item)
-                is_last = i == len(items) - 1
-                prefix = ('│   ' * (level - 1) + ('└── ' if is_last else '├── ')) if level > 0 else ''
-                with open(output_file, 'a', encoding='utf-8') as f:
-                    if os.path.isfile(item_path):
-                        try:
-                            size = os.path.getsize(item_path)
-                            size_str = self.format_size(size)
-                            f.write(f"{prefix}{item} [{size_str}]\n")
-                        except (OSError, FileNotFoundError):
-                            f.write(f"{prefix}{item} [access denied]\n")
-                    else:
-                        try:
-                            dir_size = self.get_dir_size(item_path)
-                            size_str = self.format_size(dir_size)
-                            f.write(f"{prefix}{item} [{size_str}]\n")
-                            self._generate_tree_recursive(item_path, output_file, level + 1)
-                        except (OSError, FileNotFoundError):
-                            f.write(f"{prefix}{item} [access denied]\n")
-        except (OSError, FileNotFoundError) as e:
-            with open(output_file, 'a', encoding='utf-8') as f:
-                f.write(f"{' ' * 4 * level}[Error accessing directory: {str(e)}]\n")
-    
-    def get_dir_size(self, path):
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(path):
-            if self.skip_hidden.get():
-                dirnames[:] = [d for d in dirnames if not d.startswith('.')]
-                filenames = [f for f in filenames if not f.startswith('.')]
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    pass
-        return total_size
+    def _tree_progress_text(self, stats):
+        return (f"{stats.entries:,} entries, {self.format_size(stats.bytes)}, "
+                f"{stats.entries_per_sec:,.0f} entries/s")
+    
+    def _poll_tree_progress(self, stats):
+        if self.tree_stats is not stats:
+            return
+        self.status_label.config(text=f"Status: Scanning {self._tree_progress_text(stats)}")
+        self.after(TREE_PROGRESS_MS, self._poll_tree_progress, stats)
+    
+    def _tree_finished(self, stats, cancel_event):
+        # Tree state is only ever reset here, by the run that owns it
+        if self.tree_cancel is cancel_event:
+            self.tree_stats = None
+            self.tree_cancel = None
+        state = "Cancelled" if cancel_event.is_set() else "Done"
+        self.status_label.config(text=f"Status: {state} - {self._tree_progress_text(stats)}")
     
     def format_size(self, size_in_bytes):
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_in_bytes < 1024.0:
-                return f"{size_in_bytes:.1f} {unit}"
-            size_in_bytes /= 1024.0
-        return f"{size_in_bytes:.1f} PB"
\ No newline at end of file
+        return format_size(size_in_bytes)